@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 """
 比较REST API和WebSocket API数据完整性
+
+用法: python compare_apis.py [服务器地址, 默认 http://10.10.99.98:5000]
+多台主机的健康检查请使用 `tegrastats-api scan`。
 """
 
 import requests
 import socketio
 import json
+import sys
 import time
 from datetime import datetime
 
+BASE_URL = (sys.argv[1] if len(sys.argv) > 1 else "http://10.10.99.98:5000").rstrip("/")
+
 def compare_data_structures(rest_data, ws_data, path=""):
     """递归比较两个数据结构"""
     differences = []
@@ -55,7 +61,7 @@ def main():
     # 1. 获取REST API数据
     print("📡 获取REST API数据...")
     try:
-        response = requests.get("http://10.10.99.98:5000/api/status", timeout=5)
+        response = requests.get(f"{BASE_URL}/api/status", timeout=5)
         rest_data = response.json()
         print("✅ REST API数据获取成功")
     except Exception as e:
@@ -75,7 +81,7 @@ def main():
         print("✅ WebSocket数据获取成功")
     
     try:
-        sio.connect('http://10.10.99.98:5000')
+        sio.connect(BASE_URL)
         # 等待接收数据
         start_time = time.time()
         while ws_data is None and (time.time() - start_time) < 10:
@@ -140,7 +146,7 @@ def main():
     
     for section, endpoint in endpoints:
         try:
-            response = requests.get(f"http://10.10.99.98:5000{endpoint}", timeout=3)
+            response = requests.get(f"{BASE_URL}{endpoint}", timeout=3)
             endpoint_data = response.json()
             
             # 比较专门端点和完整数据
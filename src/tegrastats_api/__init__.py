@@ -25,6 +25,7 @@ __license__ = "MIT"
 from .server import TegrastatsServer, ConnectionLimiter
 from .parser import TegrastatsParser
 from .config import Config
+from .delta import DeltaDecoder
 from .cli import main as cli_main
 
 __all__ = [
@@ -32,6 +33,7 @@ __all__ = [
     "TegrastatsParser", 
     "Config",
     "ConnectionLimiter",
+    "DeltaDecoder",
     "cli_main",
     "__version__",
 ]
\ No newline at end of file
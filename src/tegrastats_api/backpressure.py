@@ -0,0 +1,169 @@
+"""
+Backpressure module for slow WebSocket clients.
+
+Every connection has an outbound packet queue in the Socket.IO transport
+that grows without bound while the client does not read (a stalled ESP32 on
+flaky Wi-Fi). BackpressureController watches that backlog. A client whose
+backlog reaches ``queue_size`` is taken out of room broadcasts, so it no
+longer grows the transport queue or slows the shared emit loop, and its
+frames go to a small per-client queue instead:
+
+    latest       keep only the newest broadcast (conflate)
+    drop-oldest  keep the newest ``queue_size`` frames
+    disconnect   keep the newest broadcast; disconnect the client after
+                 ``max_missed`` frames in a row could not be delivered
+
+Once the backlog drains the queued frames are flushed and the client
+rejoins the broadcasts. Delta clients that missed frames get a keyframe.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+OVERFLOW_POLICIES = ("latest", "drop-oldest", "disconnect")
+
+# (event name, payload)
+Frame = Tuple[str, Any]
+
+
+class _SlowClient:
+    """Delivery state of a client over its backlog limit."""
+
+    __slots__ = ("since", "frames", "missed", "needs_keyframe")
+
+    def __init__(self, maxlen: Optional[int]):
+        self.since = time.time()
+        self.frames: Deque[Frame] = deque(maxlen=maxlen)
+        self.missed = 0
+        self.needs_keyframe = False
+
+
+class BackpressureController:
+    """Tracks per-client backlog and holds frames for slow clients."""
+
+    def __init__(self, backlog: Callable[[str], int], queue_size: int = 8,
+                 policy: str = "latest", max_missed: int = 30):
+        """
+        Initialize controller.
+
+        Args:
+            backlog: Returns the number of packets waiting in a client's
+                transport queue
+            queue_size: Backlog at which a client counts as slow, and the
+                per-client queue length for ``drop-oldest``
+            policy: One of OVERFLOW_POLICIES
+            max_missed: Frames in a row a slow client may miss before it is
+                disconnected (``disconnect`` policy)
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy '{policy}', "
+                             f"expected one of {OVERFLOW_POLICIES}")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.backlog = backlog
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_missed = max_missed
+        self._slow: Dict[str, _SlowClient] = {}
+        self._dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def check(self, sids: Iterable[str], superseded: bool = False
+              ) -> Tuple[Set[str], List[Tuple[str, List[Frame], bool]]]:
+        """
+        Classify clients before a broadcast.
+
+        Args:
+            sids: Clients about to receive a broadcast
+            superseded: The caller is about to send a newer frame, so queued
+                frames of recovered clients can be discarded under the
+                ``latest`` and ``disconnect`` policies
+
+        Returns:
+            Tuple of (slow clients to leave out of the broadcast, recovered
+            clients as (sid, queued frames to flush first, needs keyframe))
+        """
+        slow: Set[str] = set()
+        recovered = []
+        with self._lock:
+            for sid in sids:
+                lagging = self.backlog(sid) >= self.queue_size
+                state = self._slow.get(sid)
+                if lagging:
+                    if state is None:
+                        self._slow[sid] = _SlowClient(
+                            self.queue_size if self.policy == "drop-oldest" else None)
+                    slow.add(sid)
+                elif state is not None:
+                    del self._slow[sid]
+                    frames = list(state.frames)
+                    if superseded and self.policy != "drop-oldest":
+                        self._dropped[sid] = self._dropped.get(sid, 0) + len(frames)
+                        frames = []
+                    recovered.append((sid, frames, state.needs_keyframe))
+        return slow, recovered
+
+    def defer(self, sid: str, frames: List[Frame], delta: bool = False) -> bool:
+        """
+        Queue the frames of one broadcast for a slow client.
+
+        Args:
+            sid: Slow client
+            frames: Frames it would have received
+            delta: The client also missed a delta frame
+
+        Returns:
+            False if the client should be disconnected
+        """
+        with self._lock:
+            state = self._slow.get(sid)
+            if state is None:
+                return True
+            state.missed += 1
+            if delta:
+                state.needs_keyframe = True
+            if self.policy == "drop-oldest":
+                overflow = max(0, len(state.frames) + len(frames) - self.queue_size)
+            else:
+                # Conflate: this broadcast replaces the previous one
+                overflow = len(state.frames)
+                state.frames.clear()
+            if overflow:
+                self._dropped[sid] = self._dropped.get(sid, 0) + overflow
+            state.frames.extend(frames)
+            return not (self.policy == "disconnect" and state.missed > self.max_missed)
+
+    def slow_clients(self) -> List[str]:
+        """Get the clients currently over their backlog limit."""
+        with self._lock:
+            return list(self._slow)
+
+    def remove(self, sid: str) -> None:
+        """Forget a disconnected client."""
+        with self._lock:
+            self._slow.pop(sid, None)
+            self._dropped.pop(sid, None)
+
+    def lag(self, sid: str) -> Dict[str, Any]:
+        """
+        Get delivery lag of a client.
+
+        Returns:
+            Dictionary with ``backlog`` (packets in the transport queue),
+            ``slow``, ``slow_for`` (seconds), ``missed`` (frames not sent
+            live during the current slow period), ``queued`` and ``dropped``
+            (frames discarded since connecting)
+        """
+        backlog = self.backlog(sid)
+        with self._lock:
+            state = self._slow.get(sid)
+            return {
+                "backlog": backlog,
+                "slow": state is not None,
+                "slow_for": round(time.time() - state.since, 3) if state else 0.0,
+                "missed": state.missed if state else 0,
+                "queued": len(state.frames) if state else 0,
+                "dropped": self._dropped.get(sid, 0),
+            }
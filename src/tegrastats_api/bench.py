@@ -0,0 +1,360 @@
+"""
+Load generator for Tegrastats API servers.
+
+Runs N Socket.IO subscribers and M HTTP pollers against a server for a fixed
+duration and reports throughput, delivery latency, dropped or duplicate
+frames and errors. By default the server is started on localhost in a child
+process and fed synthetic samples, so no Jetson or tegrastats binary is
+needed and the numbers can be used to size ``max_connections``.
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+import socketio
+
+from .config import Config
+from .parser import TegrastatsParser
+from .server import TegrastatsServer
+from .snapshot import format_timestamp
+from .sources import Pacer, SampleSource
+
+
+def synthetic_line(rng: random.Random) -> str:
+    """
+    Generate a plausible Orin AGX tegrastats line with random values.
+
+    Args:
+        rng: Random number generator
+
+    Returns:
+        tegrastats output line
+    """
+    cores = ",".join(f"{rng.randint(0, 100)}%@{rng.choice((729, 1420, 2201))}" for _ in range(12))
+    temps = " ".join(f"{name}@{rng.uniform(40, 60):.3f}C"
+                     for name in ("cpu", "soc2", "soc0", "tj", "soc1"))
+    rails = " ".join(f"{name} {rng.randint(200, 15000)}mW/{rng.randint(200, 15000)}mW"
+                     for name in ("VDD_GPU_SOC", "VDD_CPU_CV", "VIN_SYS_5V0"))
+    return (f"{time.strftime('%m-%d-%Y %H:%M:%S')} RAM {rng.randint(2000, 8000)}/30536MB "
+            f"(lfb 5660x4MB) SWAP 0/15268MB (cached 0MB) CPU [{cores}] "
+            f"GR3D_FREQ {rng.randint(0, 99)}% {temps} {rails}")
+
+
+class SyntheticSource(SampleSource):
+    """Generated tegrastats lines, one per interval."""
+
+    def __init__(self, interval: int = 1000, seed: int = 0):
+        """
+        Initialize synthetic source.
+
+        Args:
+            interval: Sampling interval in milliseconds
+            seed: Random seed for the generated values
+        """
+        self._rng = random.Random(seed)
+        self._pacer = Pacer(interval)
+
+    @property
+    def interval(self) -> int:
+        return self._pacer.interval
+
+    def open(self) -> None:
+        self._pacer.reset()
+
+    def lines(self) -> Iterator[str]:
+        while self._pacer.wait():
+            yield synthetic_line(self._rng)
+
+    def set_interval(self, interval: int) -> None:
+        self._pacer.set_interval(interval)
+
+    def close(self) -> None:
+        self._pacer.close()
+
+    def describe(self) -> str:
+        return f"synthetic ({self.interval}ms)"
+
+
+class _ErrorCounter(logging.Handler):
+    """
+    Counts ERROR log records and keeps the first few messages.
+
+    Werkzeug's request log is skipped: it reports client protocol errors
+    (HTTP failures are counted on the client side anyway).
+    """
+
+    def __init__(self, keep: int = 10):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+        self.keep = keep
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.name == "werkzeug":
+            return
+        self.count += 1
+        if len(self.messages) < self.keep:
+            self.messages.append(f"{record.name}: {record.getMessage()}")
+
+
+def _serve(config_values: Dict[str, Any], conn: Any) -> None:
+    """Child process: run a server on synthetic samples until told to stop."""
+    # Keep the server banner out of the bench's (possibly JSON) output
+    sys.stdout = open(os.devnull, "w")
+    config = Config(**config_values)
+    parser = TegrastatsParser(interval=config.tegrastats_interval,
+                              source=SyntheticSource(interval=config.tegrastats_interval))
+    server = TegrastatsServer(config, parser=parser)
+
+    # (sequence, capture timestamp) of every stored sample
+    published: List[Tuple[int, float]] = []
+    parser.add_sample_listener(
+        lambda data: published.append((parser.get_current_sample()[0], data["timestamp"])))
+    errors = _ErrorCounter()
+    logging.getLogger().addHandler(errors)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    def report() -> None:
+        conn.recv()
+        conn.send({"published": published, "errors": errors.count,
+                   "error_messages": errors.messages})
+        os._exit(0)
+
+    threading.Thread(target=report, daemon=True).start()
+    server.run()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 15.0) -> None:
+    """Wait until the server answers /api/health."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def _parse_timestamp(value: str) -> float:
+    """Parse an API timestamp (ISO 8601 UTC with a Z suffix)."""
+    return datetime.fromisoformat(value.rstrip("Z")).replace(tzinfo=timezone.utc).timestamp()
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """
+    Summarize values (seconds) in milliseconds.
+
+    Returns:
+        Dictionary with avg, p50, p95, p99 and max (empty if no values)
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {
+        "avg": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": at(0.5),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+class _Subscriber:
+    """One Socket.IO client recording when each update arrived."""
+
+    def __init__(self):
+        self.client = socketio.Client(reconnection=False)
+        self.received: List[Tuple[float, str]] = []
+        self.client.on("tegrastats_update", self._on_update)
+
+    def _on_update(self, data: Dict[str, Any]) -> None:
+        self.received.append((time.time(), data.get("timestamp", "")))
+
+
+class _Poller(threading.Thread):
+    """HTTP client polling /api/status."""
+
+    def __init__(self, url: str, interval: float, stop: threading.Event):
+        super().__init__(daemon=True)
+        self.url = url
+        self.interval = interval
+        self.stop_event = stop
+        self.results: List[Tuple[float, float, int]] = []  # (start, duration, status)
+
+    def run(self) -> None:
+        session = requests.Session()
+        while not self.stop_event.is_set():
+            start = time.time()
+            began = time.perf_counter()
+            try:
+                status = session.get(f"{self.url}/api/status", timeout=5).status_code
+            except requests.RequestException:
+                status = 0
+            self.results.append((start, time.perf_counter() - began, status))
+            self.stop_event.wait(self.interval)
+
+
+def run_bench(subscribers: int = 10, pollers: int = 2, duration: float = 10.0,
+              rate: float = 10.0, poll_interval: float = 1.0, url: Optional[str] = None,
+              async_mode: str = "threading", max_connections: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run a load test.
+
+    Args:
+        subscribers: Number of Socket.IO subscribers
+        pollers: Number of HTTP clients polling /api/status
+        duration: Measurement duration in seconds
+        rate: Sample rate (Hz) of the local source; subscribers request
+            one update per sample
+        poll_interval: Pause between requests of one poller (seconds)
+        url: Existing server to test; None starts a local server on
+            synthetic samples (drops and server errors are only known then)
+        async_mode: Serving mode of the local server
+        max_connections: Connection limit of the local server (None for the
+            Config default)
+
+    Returns:
+        Report dictionary
+    """
+    process = None
+    conn = None
+    if url is None:
+        port = _free_port()
+        period = 1.0 / rate
+        config_values = {
+            "host": "127.0.0.1",
+            "port": port,
+            "update_interval": period,
+            "min_update_interval": min(period, Config().min_update_interval),
+            "tegrastats_interval": max(1, int(round(period * 1000))),
+            "async_mode": async_mode,
+            "log_level": "WARNING",
+            "log_file": None,
+        }
+        if max_connections is not None:
+            config_values["max_connections"] = max_connections
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        process = context.Process(target=_serve, args=(config_values, child_conn), daemon=True)
+        process.start()
+        url = f"http://127.0.0.1:{port}"
+
+    try:
+        _wait_ready(url)
+
+        clients: List[_Subscriber] = []
+        connect_errors = 0
+        for _ in range(subscribers):
+            subscriber = _Subscriber()
+            try:
+                subscriber.client.connect(f"{url}?interval={1.0 / rate}",
+                                          transports=["websocket"], wait_timeout=5)
+                clients.append(subscriber)
+            except socketio.exceptions.ConnectionError:
+                connect_errors += 1
+
+        window_start = time.time()
+        stop = threading.Event()
+        poller_threads = [_Poller(url, poll_interval, stop) for _ in range(pollers)]
+        for poller in poller_threads:
+            poller.start()
+
+        time.sleep(duration)
+        window_end = time.time()
+
+        stop.set()
+        for poller in poller_threads:
+            poller.join(timeout=10)
+
+        # Collect the server report before the clients hang up, so
+        # disconnect noise is not counted as server errors
+        server_report = None
+        if conn is not None:
+            conn.send("stop")
+            if conn.poll(10):
+                server_report = conn.recv()
+        for subscriber in clients:
+            subscriber.client.disconnect()
+    finally:
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    return _report(clients, connect_errors, subscribers, poller_threads,
+                   window_start, window_end, server_report)
+
+
+def _report(clients: List[_Subscriber], connect_errors: int, requested: int,
+            pollers: List[_Poller], window_start: float, window_end: float,
+            server_report: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the bench report from the recorded events."""
+    elapsed = window_end - window_start
+    sequences = None
+    if server_report is not None:
+        sequences = {format_timestamp(ts): seq for seq, ts in server_report["published"]}
+
+    messages = 0
+    duplicates = 0
+    dropped = 0
+    latencies: List[float] = []
+    for subscriber in clients:
+        received = [(t, ts) for t, ts in subscriber.received if window_start <= t < window_end]
+        messages += len(received)
+        seen = set()
+        for recv_time, timestamp in received:
+            if timestamp in seen:
+                duplicates += 1
+                continue
+            seen.add(timestamp)
+            latencies.append(recv_time - _parse_timestamp(timestamp))
+        if sequences is not None:
+            got = {sequences[ts] for ts in seen if ts in sequences}
+            if got:
+                dropped += (max(got) - min(got) + 1) - len(got)
+
+    requests_made = [r for poller in pollers for r in poller.results
+                     if window_start <= r[0] < window_end]
+    return {
+        "duration": round(elapsed, 3),
+        "subscribers": {
+            "requested": requested,
+            "connected": len(clients),
+            "connect_errors": connect_errors,
+        },
+        "messages": messages,
+        "messages_per_sec": round(messages / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+        "duplicates": duplicates,
+        "dropped": dropped if sequences is not None else None,
+        "http": {
+            "requests": len(requests_made),
+            "requests_per_sec": round(len(requests_made) / elapsed, 2) if elapsed else 0.0,
+            "errors": sum(1 for _, _, status in requests_made if status != 200),
+            "latency_ms": percentiles([d for _, d, _ in requests_made]),
+        },
+        "server_errors": server_report["errors"] if server_report is not None else None,
+        "server_error_messages": server_report["error_messages"] if server_report is not None else [],
+        "samples_published": len(server_report["published"]) if server_report is not None else None,
+    }
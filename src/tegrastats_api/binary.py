@@ -0,0 +1,219 @@
+"""
+Compact binary sample encoding module.
+
+A fixed-layout, little-endian alternative to the JSON status document for
+microcontroller clients. All integers, no parsing needed::
+
+    header       "TG" magic, u8 version, u8 core count, u8 temperature count,
+                 u8 rail count, u16 frame size, u32 layout id, u32 sequence,
+                 u64 timestamp (ms since epoch)
+    memory       u32 RAM used, u32 RAM total, u32 SWAP used, u32 SWAP total (MB)
+    gpu          u8 GR3D_FREQ (%), 3 padding bytes
+    cores        per core: u8 id, u8 usage (%), u16 frequency (MHz)
+    temperatures per sensor: i16 centi-degrees Celsius
+    rails        per rail: u32 current, u32 average (mW)
+
+Missing values are all bits set (``-32768`` for temperatures). The names
+and order of temperature sensors and power rails are given by the schema
+descriptor; its layout id changes whenever they do, so firmware can check
+that a frame matches the layout it was built for.
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+BINARY_VERSION = 1
+MAGIC = b"TG"
+
+HEADER = struct.Struct("<2sBBBBHIIQ")
+MEMORY = struct.Struct("<IIII")
+GPU = struct.Struct("<B3x")
+CORE = struct.Struct("<BBH")
+TEMPERATURE = struct.Struct("<h")
+RAIL = struct.Struct("<II")
+
+_MISSING_U8 = 0xFF
+_MISSING_U16 = 0xFFFF
+_MISSING_U32 = 0xFFFFFFFF
+_MISSING_I16 = -0x8000
+
+
+def _u8(value: Any) -> int:
+    return value if isinstance(value, int) and 0 <= value < _MISSING_U8 else _MISSING_U8
+
+
+def _u16(value: Any) -> int:
+    return value if isinstance(value, int) and 0 <= value < _MISSING_U16 else _MISSING_U16
+
+
+def _u32(value: Any) -> int:
+    return value if isinstance(value, int) and 0 <= value < _MISSING_U32 else _MISSING_U32
+
+
+def _centi(value: Any) -> int:
+    if not isinstance(value, (int, float)):
+        return _MISSING_I16
+    centi = round(value * 100)
+    return centi if _MISSING_I16 < centi <= 0x7FFF else _MISSING_I16
+
+
+def _layout(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the variable part of the layout of a sample."""
+    return {
+        "cores": len(sample.get("cpu", {}).get("cores", [])),
+        "temperatures": list(sample.get("temperature", {})),
+        "rails": list(sample.get("power", {})),
+    }
+
+
+def _frame_size(cores: int, temperatures: int, rails: int) -> int:
+    return (HEADER.size + MEMORY.size + GPU.size + CORE.size * cores
+            + TEMPERATURE.size * temperatures + RAIL.size * rails)
+
+
+def layout_id(sample: Dict[str, Any]) -> int:
+    """Get the CRC32 identifying the layout of a sample's binary frame."""
+    return zlib.crc32(json.dumps(_layout(sample), sort_keys=True).encode("utf-8"))
+
+
+def encode_sample(sequence: int, timestamp: float, sample: Dict[str, Any]) -> bytes:
+    """
+    Encode a parsed sample as a binary frame.
+
+    Args:
+        sequence: Sample sequence number
+        timestamp: Capture time (UNIX seconds)
+        sample: Document produced by TegrastatsParser.parse_line
+
+    Returns:
+        Encoded frame
+    """
+    cores = sample.get("cpu", {}).get("cores", [])
+    temperatures = sample.get("temperature", {})
+    rails = sample.get("power", {})
+    memory = sample.get("memory", {})
+    ram = memory.get("ram", {})
+    swap = memory.get("swap", {})
+    size = _frame_size(len(cores), len(temperatures), len(rails))
+
+    parts = [
+        HEADER.pack(MAGIC, BINARY_VERSION, len(cores), len(temperatures), len(rails),
+                    size, layout_id(sample), sequence & _MISSING_U32,
+                    max(0, int(timestamp * 1000))),
+        MEMORY.pack(_u32(ram.get("used")), _u32(ram.get("total")),
+                    _u32(swap.get("used")), _u32(swap.get("total"))),
+        GPU.pack(_u8(sample.get("gpu", {}).get("gr3d_freq"))),
+    ]
+    parts.extend(CORE.pack(_u8(core.get("id")), _u8(core.get("usage")), _u16(core.get("freq")))
+                 for core in cores)
+    parts.extend(TEMPERATURE.pack(_centi(value)) for value in temperatures.values())
+    parts.extend(RAIL.pack(_u32(rail.get("current")), _u32(rail.get("average")))
+                 for rail in rails.values())
+    return b"".join(parts)
+
+
+def schema(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Describe the binary frame layout of a sample.
+
+    Args:
+        sample: Document produced by TegrastatsParser.parse_line
+
+    Returns:
+        Schema descriptor with field types, record sizes and the sensor
+        and rail names in frame order
+    """
+    layout = _layout(sample)
+    size = _frame_size(layout["cores"], len(layout["temperatures"]), len(layout["rails"]))
+    return {
+        "version": BINARY_VERSION,
+        "byte_order": "little",
+        "layout_id": layout_id(sample),
+        "size": size,
+        "header": [
+            ["magic", "char[2]"], ["version", "u8"], ["core_count", "u8"],
+            ["temperature_count", "u8"], ["rail_count", "u8"], ["size", "u16"],
+            ["layout_id", "u32"], ["sequence", "u32"], ["timestamp_ms", "u64"],
+        ],
+        "memory": [["ram_used_mb", "u32"], ["ram_total_mb", "u32"],
+                   ["swap_used_mb", "u32"], ["swap_total_mb", "u32"]],
+        "gpu": [["gr3d_freq", "u8"], ["padding", "u8[3]"]],
+        "core": [["id", "u8"], ["usage", "u8"], ["freq_mhz", "u16"]],
+        "temperature": [["centi_celsius", "i16"]],
+        "rail": [["current_mw", "u32"], ["average_mw", "u32"]],
+        "cores": layout["cores"],
+        "temperatures": layout["temperatures"],
+        "rails": layout["rails"],
+    }
+
+
+def decode_frame(frame: bytes, names: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    Decode a binary frame (reference decoder for clients and tests).
+
+    Args:
+        frame: Encoded frame
+        names: Optional ``temperatures``/``rails`` name lists from the schema;
+            without them sensors and rails are keyed by position
+
+    Returns:
+        Dictionary shaped like the JSON status document, plus ``seq``
+    """
+    (magic, version, n_cores, n_temps, n_rails, size, layout,
+     sequence, timestamp_ms) = HEADER.unpack_from(frame, 0)
+    if magic != MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"Unsupported frame: magic={magic!r} version={version}")
+    if size != len(frame):
+        raise ValueError(f"Frame size mismatch: header says {size}, got {len(frame)}")
+
+    def value(raw: int, missing: int) -> Optional[int]:
+        return None if raw == missing else raw
+
+    offset = HEADER.size
+    ram_used, ram_total, swap_used, swap_total = MEMORY.unpack_from(frame, offset)
+    offset += MEMORY.size
+    (gr3d,) = GPU.unpack_from(frame, offset)
+    offset += GPU.size
+
+    cores = []
+    for _ in range(n_cores):
+        core_id, usage, freq = CORE.unpack_from(frame, offset)
+        cores.append({"id": core_id, "usage": value(usage, _MISSING_U8),
+                      "freq": value(freq, _MISSING_U16)})
+        offset += CORE.size
+
+    names = names or {}
+    temp_names = names.get("temperatures") or []
+    if len(temp_names) != n_temps:
+        temp_names = [str(i) for i in range(n_temps)]
+    temperatures = {}
+    for name in temp_names:
+        (centi,) = TEMPERATURE.unpack_from(frame, offset)
+        temperatures[name] = None if centi == _MISSING_I16 else centi / 100
+        offset += TEMPERATURE.size
+
+    rail_names = names.get("rails") or []
+    if len(rail_names) != n_rails:
+        rail_names = [str(i) for i in range(n_rails)]
+    power = {}
+    for name in rail_names:
+        current, average = RAIL.unpack_from(frame, offset)
+        power[name] = {"current": value(current, _MISSING_U32),
+                       "average": value(average, _MISSING_U32), "unit": "mW"}
+        offset += RAIL.size
+
+    return {
+        "seq": sequence,
+        "layout_id": layout,
+        "timestamp": timestamp_ms / 1000,
+        "cpu": {"cores": cores},
+        "memory": {
+            "ram": {"used": value(ram_used, _MISSING_U32), "total": value(ram_total, _MISSING_U32)},
+            "swap": {"used": value(swap_used, _MISSING_U32), "total": value(swap_total, _MISSING_U32)},
+        },
+        "temperature": temperatures,
+        "power": power,
+        "gpu": {"gr3d_freq": value(gr3d, _MISSING_U8)},
+    }
@@ -42,7 +42,36 @@ def cli():
 @click.option('--max-connections', type=int, default=None, help='最大WebSocket连接数')
 @click.option('--update-interval', type=float, default=None, help='数据更新间隔(秒)')
 @click.option('--tegrastats-interval', type=float, default=None, help='Tegrastats采样间隔(秒)')
-def run(host, port, debug, log_level, max_connections, update_interval, tegrastats_interval):
+@click.option('--async-mode', default=None, type=click.Choice(['threading', 'eventlet']),
+              help='服务模式: threading (每连接一个线程) 或 eventlet (单事件循环)')
+@click.option('--replay', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='回放录制的tegrastats日志, 代替运行tegrastats')
+@click.option('--replay-speed', type=float, default=None, help='回放倍速 (1=实时, 0=最快)')
+@click.option('--replay-loop', is_flag=True, default=False, help='回放到结尾后从头循环')
+@click.option('--source', default=None, type=click.Choice(['tegrastats', 'native', 'hub']),
+              help='数据源: tegrastats (运行tegrastats), native (直接读取procfs/sysfs) '
+                   '或 hub (汇聚 --hub-nodes 中的多个节点)')
+@click.option('--hub-nodes', default=None,
+              help='hub模式的上游节点, 逗号分隔的 [名称=]主机[:端口]')
+@click.option('--sysfs-root', type=click.Path(exists=True, file_okay=False), default=None,
+              help='native数据源的根目录 (包含proc和sys)')
+@click.option('--idle-timeout', type=float, default=None,
+              help='无客户端和请求多少秒后暂停采样 (0=始终采样)')
+@click.option('--idle-interval', type=int, default=None,
+              help='空闲时的保温采样间隔(毫秒, 0=完全停止)')
+@click.option('--record-dir', type=click.Path(file_okay=False), default=None,
+              help='将采样录制到此目录的二进制分段文件')
+@click.option('--perf', is_flag=True, default=False, help='启动时开启性能统计 (/api/debug/perf)')
+@click.option('--no-compression', is_flag=True, default=False,
+              help='关闭REST响应和WebSocket更新的gzip/deflate压缩')
+@click.option('--udp-target', default=None,
+              help='每个采样以UDP数据报发送到这些地址或组播组, 逗号分隔的 主机[:端口]')
+@click.option('--udp-node-id', default=None, help='UDP数据报中的节点ID (默认: 主机名)')
+@click.option('--udp-interface', default=None, help='发送UDP组播的本地IPv4地址')
+def run(host, port, debug, log_level, max_connections, update_interval, tegrastats_interval,
+        async_mode, replay, replay_speed, replay_loop, source, hub_nodes, sysfs_root, idle_timeout,
+        idle_interval, record_dir, perf, no_compression, udp_target, udp_node_id,
+        udp_interface):
     """启动Tegrastats API服务器。"""
     global _server_instance
     
@@ -64,6 +93,36 @@ def run(host, port, debug, log_level, max_connections, update_interval, tegrasta
         config.update_interval = update_interval
     if tegrastats_interval is not None:
         config.tegrastats_interval = tegrastats_interval
+    if async_mode is not None:
+        config.async_mode = async_mode
+    if replay is not None:
+        config.replay_file = replay
+    if replay_speed is not None:
+        config.replay_speed = replay_speed
+    if replay_loop:
+        config.replay_loop = True
+    if source is not None:
+        config.source = source
+    if hub_nodes is not None:
+        config.hub_nodes = hub_nodes
+    if sysfs_root is not None:
+        config.sysfs_root = sysfs_root
+    if idle_timeout is not None:
+        config.idle_timeout = idle_timeout
+    if idle_interval is not None:
+        config.idle_interval = idle_interval
+    if record_dir is not None:
+        config.record_dir = record_dir
+    if perf:
+        config.perf_enabled = True
+    if no_compression:
+        config.compression = False
+    if udp_target is not None:
+        config.udp_targets = udp_target
+    if udp_node_id is not None:
+        config.udp_node_id = udp_node_id
+    if udp_interface is not None:
+        config.udp_interface = udp_interface
     
     # Setup logging
     logging.basicConfig(
@@ -196,6 +255,149 @@ def monitor(host, port, duration):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--subscribers', '-n', type=int, default=10, help='Socket.IO订阅者数量')
+@click.option('--pollers', '-m', type=int, default=2, help='HTTP轮询客户端数量')
+@click.option('--duration', '-d', type=float, default=10.0, help='测试时长(秒)')
+@click.option('--rate', type=float, default=10.0, help='模拟采样频率(Hz), 订阅者按此频率请求更新')
+@click.option('--poll-interval', type=float, default=1.0, help='每个轮询客户端的请求间隔(秒)')
+@click.option('--url', default=None, help='测试已运行的服务器 (默认在本机启动模拟数据服务器)')
+@click.option('--async-mode', default='threading', type=click.Choice(['threading', 'eventlet']),
+              help='本机服务器的服务模式')
+@click.option('--max-connections', type=int, default=None, help='本机服务器的最大连接数')
+@click.option('--json', 'as_json', is_flag=True, default=False, help='以JSON输出结果')
+def bench(subscribers, pollers, duration, rate, poll_interval, url, async_mode,
+          max_connections, as_json):
+    """压力测试: N个WebSocket订阅者与M个HTTP轮询客户端。"""
+    import json
+    from .bench import run_bench
+    
+    if not as_json:
+        target = url or f"本机模拟服务器 ({async_mode}, {rate}Hz)"
+        click.echo(f"压力测试 {target}: {subscribers} 个订阅者, {pollers} 个轮询客户端, {duration}秒")
+    try:
+        report = run_bench(subscribers=subscribers, pollers=pollers, duration=duration,
+                           rate=rate, poll_interval=poll_interval, url=url,
+                           async_mode=async_mode, max_connections=max_connections)
+    except Exception as e:
+        click.echo(f"压力测试失败: {e}", err=True)
+        sys.exit(1)
+    
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    
+    def latency(values):
+        if not values:
+            return "-"
+        return (f"p50 {values['p50']}ms  p95 {values['p95']}ms  "
+                f"p99 {values['p99']}ms  max {values['max']}ms")
+    
+    def known(value):
+        return "未知" if value is None else value
+    
+    clients = report['subscribers']
+    click.echo(f"  订阅者: {clients['connected']}/{clients['requested']} 已连接, "
+               f"连接失败 {clients['connect_errors']}")
+    click.echo(f"  消息: {report['messages']} ({report['messages_per_sec']}/秒)")
+    click.echo(f"  推送延迟: {latency(report['latency_ms'])}")
+    click.echo(f"  丢帧: {known(report['dropped'])}  重复帧: {report['duplicates']}")
+    http = report['http']
+    click.echo(f"  HTTP请求: {http['requests']} ({http['requests_per_sec']}/秒), 错误 {http['errors']}")
+    click.echo(f"  HTTP延迟: {latency(http['latency_ms'])}")
+    click.echo(f"  服务器错误: {known(report['server_errors'])}")
+
+
+@cli.command()
+@click.argument('targets', nargs=-1)
+@click.option('--file', '-f', 'hosts_file', type=click.Path(exists=True, dir_okay=False),
+              default=None, help='主机列表文件 (每行一个主机或CIDR)')
+@click.option('--port', '-p', type=int, default=58090, help='未指定端口时使用的服务器端口')
+@click.option('--timeout', '-t', type=float, default=2.0, help='每台主机每个请求的超时(秒)')
+@click.option('--workers', '-w', type=int, default=32, help='并发查询的主机数')
+@click.option('--sort', 'sort_key', default='host',
+              type=click.Choice(['host', 'temperature', 'ram', 'power', 'latency']),
+              help='表格排序列 (指标列按从高到低)')
+@click.option('--json', 'as_json', is_flag=True, default=False, help='以JSON输出结果')
+def scan(targets, hosts_file, port, timeout, workers, sort_key, as_json):
+    """并发扫描多台主机 (主机名、主机:端口或CIDR) 的健康状态和关键指标。"""
+    import json
+    from .scan import expand_targets, format_table, run_scan, sort_results
+    
+    entries = list(targets)
+    if hosts_file:
+        with open(hosts_file, 'r') as f:
+            for line in f:
+                entries.extend(line.split('#', 1)[0].split())
+    try:
+        hosts = expand_targets(entries, port=port)
+    except ValueError as e:
+        click.echo(f"无效的目标: {e}", err=True)
+        sys.exit(1)
+    if not hosts:
+        click.echo("未指定要扫描的主机", err=True)
+        sys.exit(1)
+    
+    report = run_scan(hosts, timeout=timeout, workers=workers)
+    report['hosts'] = sort_results(report['hosts'], sort_key)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    for row in format_table(report['hosts']):
+        click.echo(row)
+    click.echo(f"\n{report['online']}/{report['scanned']} 台在线, 用时 {report['elapsed_ms']}ms")
+
+
+@cli.command()
+@click.option('--port', '-p', type=int, default=58091, help='UDP端口')
+@click.option('--group', '-g', default=None, help='加入的IPv4组播组 (如 239.255.0.1)')
+@click.option('--interface', '-i', default='0.0.0.0', help='绑定和加入组播组的本地地址')
+@click.option('--schema', 'schema_url', default=None,
+              help='从此服务器获取温度传感器和电源轨名称 (如 http://10.10.99.98:58090)')
+@click.option('--count', '-n', type=int, default=0, help='收到多少个数据报后退出 (0=不退出)')
+@click.option('--json', 'as_json', is_flag=True, default=False, help='每个数据报输出一行JSON')
+def listen(port, group, interface, schema_url, count, as_json):
+    """接收UDP发布的采样 (参考监听器)。"""
+    import json
+    from .udp import UdpListener
+    
+    names = None
+    if schema_url:
+        import requests
+        try:
+            response = requests.get(f"{schema_url.rstrip('/')}/api/status.schema", timeout=5)
+            response.raise_for_status()
+            names = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            click.echo(f"无法获取布局描述: {e}", err=True)
+    
+    try:
+        listener = UdpListener(port=port, group=group, interface=interface, names=names)
+    except OSError as e:
+        click.echo(f"无法监听UDP端口 {port}: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"正在监听 UDP {group or interface}:{listener.port} ...", err=True)
+    try:
+        for sample in listener:
+            if as_json:
+                click.echo(json.dumps(sample))
+            else:
+                temperatures = {k: v for k, v in sample['temperature'].items() if v is not None}
+                ram = sample['memory']['ram']
+                click.echo(f"{sample['node']} #{sample['seq']}  "
+                           f"温度: {max(temperatures.values(), default='-')}°C  "
+                           f"RAM: {ram['used']}/{ram['total']}MB  "
+                           f"GPU: {sample['gpu']['gr3d_freq']}%"
+                           + (f"  丢失: {sample['missed']}" if sample['missed'] else ""))
+            if count and listener.received >= count:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+    click.echo(f"共收到 {listener.received} 个数据报, 丢失 {listener.missed} 个", err=True)
+
+
 @cli.command()
 def config():
     """显示当前配置。"""
@@ -212,6 +414,19 @@ def config():
     click.echo(f"  更新间隔: {config.update_interval}秒")
     click.echo(f"  Tegrastats间隔: {config.tegrastats_interval}秒")
     click.echo(f"  CORS源: {config.cors_origins}")
+    click.echo(f"  服务模式: {config.async_mode}")
+    click.echo(f"  数据源: {config.source}"
+               f"{f' ({config.sysfs_root})' if config.source == 'native' and config.sysfs_root != '/' else ''}")
+    if config.idle_timeout > 0:
+        click.echo(f"  空闲暂停: {config.idle_timeout}秒后, 保温间隔 {config.idle_interval}ms")
+    if config.record_dir:
+        click.echo(f"  录制目录: {config.record_dir} (每段 {config.record_segment_duration}秒, "
+                   f"保留 {config.record_retention}秒)")
+    if config.udp_targets:
+        click.echo(f"  UDP发布: {config.udp_targets} (节点 {config.udp_node_id or '主机名'})")
+    if config.replay_file:
+        click.echo(f"  回放日志: {config.replay_file} ({config.replay_speed}x"
+                   f"{', 循环' if config.replay_loop else ''})")
 
 
 def main():
@@ -0,0 +1,259 @@
+"""
+Native metrics collector.
+
+Reads CPU, memory, temperature, GPU load and INA3221 power rail values
+directly from procfs and sysfs instead of running ``tegrastats``. Every file
+is opened once and re-read in place with ``os.pread``, so a sample costs one
+system call per file and no process, pipe or text parsing of a tegrastats
+line. Documents have the same schema as TegrastatsParser.parse_line.
+"""
+
+import glob
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# GPU load (per mille) of the integrated GPU, by Jetson generation
+GPU_LOAD_PATHS = (
+    "sys/devices/platform/17000000.ga10b/load",  # Orin
+    "sys/devices/platform/17000000.gv11b/load",  # Xavier
+    "sys/devices/gpu.0/load",                    # Nano, TX1, TX2
+    "sys/devices/platform/gpu.0/load",
+)
+
+
+class _Attribute:
+    """A procfs/sysfs file kept open and re-read from offset 0."""
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> str:
+        return os.pread(self.fd, self.size, 0).decode("ascii", "replace")
+
+    def read_int(self) -> int:
+        return int(self.read().strip())
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def _open(path: str, size: int = 4096) -> Optional[_Attribute]:
+    """Open an attribute file, or return None if it is missing or unreadable."""
+    try:
+        return _Attribute(path, size)
+    except OSError:
+        return None
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def _cpu_times(text: str) -> Dict[int, Tuple[int, int]]:
+    """
+    Extract per-core (busy, total) jiffies from /proc/stat.
+
+    Only online cores have a ``cpuN`` line. Guest time is already included
+    in user time, so only the first eight fields are summed.
+    """
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu") or not line[3:4].isdigit():
+            continue
+        fields = line.split()
+        values = [int(v) for v in fields[1:9]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        total = sum(values)
+        times[int(fields[0][3:])] = (total - idle, total)
+    return times
+
+
+def _meminfo(text: str) -> Dict[str, int]:
+    """Parse /proc/meminfo into kB values."""
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts and parts[0].isdigit():
+            values[name] = int(parts[0])
+    return values
+
+
+def _zone_name(zone_type: str) -> str:
+    """Map a thermal zone type (``cpu-thermal``) to the tegrastats sensor name (``cpu``)."""
+    name = zone_type.strip().lower()
+    if name.endswith("-thermal"):
+        name = name[:-len("-thermal")]
+    return name
+
+
+class NativeCollector:
+    """Reads Jetson metrics from procfs and sysfs with persistent descriptors."""
+
+    def __init__(self, root: str = "/"):
+        """
+        Initialize collector and open all metric files.
+
+        Args:
+            root: Directory containing ``proc`` and ``sys`` (a fake tree
+                in tests)
+        """
+        self.root = root
+        self._stat = _Attribute(self._path("proc/stat"), size=65536)
+        self._meminfo = _Attribute(self._path("proc/meminfo"))
+        self._freqs: Dict[int, Optional[_Attribute]] = {}
+        self._zones = self._open_zones()
+        self._rails = self._open_rails()
+        self._gpu_load = next(filter(None, (_open(self._path(p)) for p in GPU_LOAD_PATHS)), None)
+        # Running average per rail, like tegrastats' "cur/avg" pairs
+        self._power_totals: Dict[str, Tuple[int, int]] = {}
+        self._cpu_last = _cpu_times(self._stat.read())
+        logger.info(f"原生采集已就绪: {len(self._zones)}个温度传感器, {len(self._rails)}个电源轨"
+                    f"{', GPU负载' if self._gpu_load else ''}")
+
+    def _path(self, relative: str) -> str:
+        return os.path.join(self.root, relative)
+
+    def _open_zones(self) -> List[Tuple[str, _Attribute]]:
+        zones = []
+        pattern = self._path("sys/class/thermal/thermal_zone*")
+        for zone in sorted(glob.glob(pattern), key=lambda p: int(p.rsplit("thermal_zone", 1)[1] or 0)):
+            try:
+                name = _zone_name(_read_text(os.path.join(zone, "type")))
+            except OSError:
+                continue
+            temp = _open(os.path.join(zone, "temp"))
+            if temp:
+                zones.append((name, temp))
+        return zones
+
+    def _open_rails(self) -> List[Tuple[str, _Attribute, _Attribute]]:
+        """Open (name, voltage mV, current mA) files of every INA3221 channel."""
+        rails = []
+        for hwmon in sorted(glob.glob(self._path("sys/class/hwmon/hwmon*"))):
+            try:
+                if _read_text(os.path.join(hwmon, "name")) != "ina3221":
+                    continue
+            except OSError:
+                continue
+            labels = glob.glob(os.path.join(hwmon, "in*_label"))
+            for label in sorted(labels, key=lambda p: int(os.path.basename(p)[2:-6] or 0)):
+                channel = os.path.basename(label)[2:-6]
+                voltage = _open(os.path.join(hwmon, f"in{channel}_input"))
+                current = _open(os.path.join(hwmon, f"curr{channel}_input"))
+                if voltage and current:
+                    rails.append((_read_text(label).lower(), voltage, current))
+        return rails
+
+    def _cores(self) -> List[Dict[str, int]]:
+        times = _cpu_times(self._stat.read())
+        cores = []
+        for core_id, (busy, total) in sorted(times.items()):
+            last_busy, last_total = self._cpu_last.get(core_id, (0, 0))
+            elapsed = total - last_total
+            usage = round(100 * (busy - last_busy) / elapsed) if elapsed > 0 else 0
+            if core_id not in self._freqs:
+                self._freqs[core_id] = _open(self._path(
+                    f"sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_cur_freq"))
+            freq = self._freqs[core_id]
+            try:
+                mhz = freq.read_int() // 1000 if freq else 0
+            except (OSError, ValueError):
+                mhz = 0
+            cores.append({"id": core_id, "usage": max(0, min(100, usage)), "freq": mhz})
+        self._cpu_last = times
+        return cores
+
+    def _memory(self) -> Dict[str, Any]:
+        info = _meminfo(self._meminfo.read())
+        total = info.get("MemTotal", 0)
+        swap_total = info.get("SwapTotal", 0)
+        return {
+            "ram": {
+                "used": (total - info.get("MemAvailable", info.get("MemFree", 0))) // 1024,
+                "total": total // 1024,
+                "unit": "MB"
+            },
+            "swap": {
+                "used": (swap_total - info.get("SwapFree", 0)) // 1024,
+                "total": swap_total // 1024,
+                "cached": info.get("SwapCached", 0) // 1024,
+                "unit": "MB"
+            }
+        }
+
+    def _temperatures(self) -> Dict[str, float]:
+        temperatures = {}
+        for name, temp in self._zones:
+            try:
+                temperatures[name] = temp.read_int() / 1000
+            except (OSError, ValueError):
+                # Sensors of powered-down blocks fail to read
+                continue
+        return temperatures
+
+    def _power(self) -> Dict[str, Dict[str, Any]]:
+        power = {}
+        for name, voltage, current in self._rails:
+            try:
+                milliwatts = voltage.read_int() * current.read_int() // 1000
+            except (OSError, ValueError):
+                continue
+            total, count = self._power_totals.get(name, (0, 0))
+            total, count = total + milliwatts, count + 1
+            self._power_totals[name] = (total, count)
+            power[name] = {"current": milliwatts, "average": round(total / count), "unit": "mW"}
+        return power
+
+    def _gpu(self) -> Dict[str, int]:
+        if not self._gpu_load:
+            return {}
+        try:
+            return {"gr3d_freq": self._gpu_load.read_int() // 10}
+        except (OSError, ValueError):
+            return {}
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Read one sample.
+
+        CPU usage is computed over the time since the previous call (or since
+        the collector was created).
+
+        Returns:
+            Sample dictionary in the TegrastatsParser.parse_line schema
+        """
+        return {
+            "timestamp": time.time(),
+            "cpu": {"cores": self._cores()},
+            "memory": self._memory(),
+            "temperature": self._temperatures(),
+            "power": self._power(),
+            "gpu": self._gpu()
+        }
+
+    def close(self) -> None:
+        """Close all open descriptors."""
+        attributes = [self._stat, self._meminfo, self._gpu_load]
+        attributes += list(self._freqs.values())
+        attributes += [temp for _, temp in self._zones]
+        for _, voltage, current in self._rails:
+            attributes += [voltage, current]
+        for attribute in attributes:
+            if attribute:
+                attribute.close()
+        self._freqs.clear()
+        self._zones = []
+        self._rails = []
+        self._gpu_load = None
@@ -20,7 +20,36 @@ class Config:
         cors_origins: str = "*",
         log_level: str = "INFO",
         log_file: Optional[str] = "app.log",
-        allow_unsafe_werkzeug: bool = True
+        allow_unsafe_werkzeug: bool = True,
+        history_size: int = 86400,
+        rollup_tiers: str = "10:86400,60:604800,900:2592000",
+        delta_keyframe_interval: int = 30,
+        min_update_interval: float = 0.1,
+        async_mode: str = "threading",
+        replay_file: Optional[str] = None,
+        replay_speed: float = 1.0,
+        replay_loop: bool = False,
+        source: str = "tegrastats",
+        sysfs_root: str = "/",
+        idle_timeout: float = 0.0,
+        idle_interval: int = 10000,
+        record_dir: Optional[str] = None,
+        record_segment_duration: float = 3600,
+        record_retention: float = 604800,
+        record_query_limit: int = 10000,
+        perf_enabled: bool = False,
+        client_queue_size: int = 8,
+        overflow_policy: str = "latest",
+        max_missed_frames: int = 30,
+        compression: bool = True,
+        compression_threshold: int = 512,
+        compression_level: int = 6,
+        hub_nodes: Optional[str] = None,
+        stream_replay_size: int = 60,
+        udp_targets: Optional[str] = None,
+        udp_node_id: Optional[str] = None,
+        udp_ttl: int = 1,
+        udp_interface: Optional[str] = None
     ):
         """
         Initialize configuration.
@@ -36,6 +65,48 @@ class Config:
             log_level: Logging level
             log_file: Log file path (None to disable file logging)
             allow_unsafe_werkzeug: Allow unsafe Werkzeug for production
+            history_size: Number of samples kept in memory for /api/history (0 to disable)
+            rollup_tiers: History rollups as "resolution:retention" seconds, comma-separated ("" to disable)
+            delta_keyframe_interval: Delta frames between keyframes for delta WebSocket clients
+            min_update_interval: Smallest update interval a WebSocket client may request
+            async_mode: Serving mode, "threading" (Werkzeug, one thread per connection)
+                or "eventlet" (one event loop for all connections; eventlet is
+                deprecated upstream)
+            replay_file: Replay this recorded tegrastats log instead of running tegrastats
+            replay_speed: Replay speed factor (1 = real time, 0 = as fast as possible)
+            replay_loop: Restart the replay at the end of the log
+            source: Sample source, "tegrastats" (run the tegrastats binary),
+                "native" (read procfs/sysfs directly) or "hub" (merge the
+                updates of the hub_nodes servers into a fleet document)
+            sysfs_root: Directory containing ``proc`` and ``sys`` for the native source
+            idle_timeout: Seconds without WebSocket clients or REST requests before
+                sampling is suspended (0 to sample continuously)
+            idle_interval: Keep-warm sampling interval in milliseconds while
+                suspended (0 to stop sampling)
+            record_dir: Directory for on-disk binary recordings (None to disable)
+            record_segment_duration: Seconds per recording segment file
+            record_retention: Seconds to keep recording segments (0 to keep forever)
+            record_query_limit: Most samples one /api/recordings response holds
+            perf_enabled: Start with self-instrumentation (/api/debug/perf) enabled
+            client_queue_size: Outbound packets a WebSocket client may have pending
+                before it is treated as slow
+            overflow_policy: Frames for slow clients, "latest" (keep the newest),
+                "drop-oldest" (keep the newest client_queue_size) or "disconnect"
+            max_missed_frames: Frames in a row a slow client may miss before it is
+                disconnected ("disconnect" policy)
+            compression: Compress REST responses (gzip/deflate, negotiated via
+                Accept-Encoding) and offer pre-compressed WebSocket updates
+            compression_threshold: Smallest body in bytes that gets compressed
+            compression_level: zlib compression level (1-9)
+            hub_nodes: Upstream servers for source "hub", comma-separated
+                ``[name=]host[:port]`` entries
+            stream_replay_size: Recent samples kept for resuming /api/stream
+                with Last-Event-ID (0 disables resuming)
+            udp_targets: UDP unicast addresses or multicast groups receiving
+                every sample, comma-separated ``host[:port]`` (None to disable)
+            udp_node_id: Node id carried in UDP datagrams (default: host name)
+            udp_ttl: Multicast TTL of UDP datagrams
+            udp_interface: Local IPv4 address multicast datagrams are sent from
         """
         self.host = host
         self.port = port
@@ -47,6 +118,35 @@ class Config:
         self.log_level = log_level
         self.log_file = log_file
         self.allow_unsafe_werkzeug = allow_unsafe_werkzeug
+        self.history_size = history_size
+        self.rollup_tiers = rollup_tiers
+        self.delta_keyframe_interval = delta_keyframe_interval
+        self.min_update_interval = min_update_interval
+        self.async_mode = async_mode
+        self.replay_file = replay_file
+        self.replay_speed = replay_speed
+        self.replay_loop = replay_loop
+        self.source = source
+        self.sysfs_root = sysfs_root
+        self.idle_timeout = idle_timeout
+        self.idle_interval = idle_interval
+        self.record_dir = record_dir
+        self.record_segment_duration = record_segment_duration
+        self.record_retention = record_retention
+        self.record_query_limit = record_query_limit
+        self.perf_enabled = perf_enabled
+        self.client_queue_size = client_queue_size
+        self.overflow_policy = overflow_policy
+        self.max_missed_frames = max_missed_frames
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.hub_nodes = hub_nodes
+        self.stream_replay_size = stream_replay_size
+        self.udp_targets = udp_targets
+        self.udp_node_id = udp_node_id
+        self.udp_ttl = udp_ttl
+        self.udp_interface = udp_interface
     
     @classmethod
     def from_env(cls) -> "Config":
@@ -61,7 +161,36 @@ class Config:
             cors_origins=os.getenv("TEGRASTATS_API_CORS_ORIGINS", os.getenv("TEGRASTATS_CORS_ORIGINS", "*")),
             log_level=os.getenv("TEGRASTATS_API_LOG_LEVEL", os.getenv("TEGRASTATS_LOG_LEVEL", "INFO")),
             log_file=os.getenv("TEGRASTATS_API_LOG_FILE", os.getenv("TEGRASTATS_LOG_FILE", "app.log")),
-            allow_unsafe_werkzeug=os.getenv("TEGRASTATS_API_ALLOW_UNSAFE_WERKZEUG", os.getenv("TEGRASTATS_ALLOW_UNSAFE_WERKZEUG", "true")).lower() == "true"
+            allow_unsafe_werkzeug=os.getenv("TEGRASTATS_API_ALLOW_UNSAFE_WERKZEUG", os.getenv("TEGRASTATS_ALLOW_UNSAFE_WERKZEUG", "true")).lower() == "true",
+            history_size=int(os.getenv("TEGRASTATS_API_HISTORY_SIZE", os.getenv("TEGRASTATS_HISTORY_SIZE", "86400"))),
+            rollup_tiers=os.getenv("TEGRASTATS_API_ROLLUP_TIERS", os.getenv("TEGRASTATS_ROLLUP_TIERS", "10:86400,60:604800,900:2592000")),
+            delta_keyframe_interval=int(os.getenv("TEGRASTATS_API_DELTA_KEYFRAME_INTERVAL", os.getenv("TEGRASTATS_DELTA_KEYFRAME_INTERVAL", "30"))),
+            min_update_interval=float(os.getenv("TEGRASTATS_API_MIN_UPDATE_INTERVAL", os.getenv("TEGRASTATS_MIN_UPDATE_INTERVAL", "0.1"))),
+            async_mode=os.getenv("TEGRASTATS_API_ASYNC_MODE", os.getenv("TEGRASTATS_ASYNC_MODE", "threading")),
+            replay_file=os.getenv("TEGRASTATS_API_REPLAY_FILE", os.getenv("TEGRASTATS_REPLAY_FILE")) or None,
+            replay_speed=float(os.getenv("TEGRASTATS_API_REPLAY_SPEED", os.getenv("TEGRASTATS_REPLAY_SPEED", "1.0"))),
+            replay_loop=os.getenv("TEGRASTATS_API_REPLAY_LOOP", os.getenv("TEGRASTATS_REPLAY_LOOP", "false")).lower() == "true",
+            source=os.getenv("TEGRASTATS_API_SOURCE", os.getenv("TEGRASTATS_SOURCE", "tegrastats")),
+            sysfs_root=os.getenv("TEGRASTATS_API_SYSFS_ROOT", os.getenv("TEGRASTATS_SYSFS_ROOT", "/")),
+            idle_timeout=float(os.getenv("TEGRASTATS_API_IDLE_TIMEOUT", os.getenv("TEGRASTATS_IDLE_TIMEOUT", "0"))),
+            idle_interval=int(os.getenv("TEGRASTATS_API_IDLE_INTERVAL", os.getenv("TEGRASTATS_IDLE_INTERVAL", "10000"))),
+            record_dir=os.getenv("TEGRASTATS_API_RECORD_DIR", os.getenv("TEGRASTATS_RECORD_DIR")) or None,
+            record_segment_duration=float(os.getenv("TEGRASTATS_API_RECORD_SEGMENT_DURATION", os.getenv("TEGRASTATS_RECORD_SEGMENT_DURATION", "3600"))),
+            record_retention=float(os.getenv("TEGRASTATS_API_RECORD_RETENTION", os.getenv("TEGRASTATS_RECORD_RETENTION", "604800"))),
+            record_query_limit=int(os.getenv("TEGRASTATS_API_RECORD_QUERY_LIMIT", os.getenv("TEGRASTATS_RECORD_QUERY_LIMIT", "10000"))),
+            perf_enabled=os.getenv("TEGRASTATS_API_PERF_ENABLED", os.getenv("TEGRASTATS_PERF_ENABLED", "false")).lower() == "true",
+            client_queue_size=int(os.getenv("TEGRASTATS_API_CLIENT_QUEUE_SIZE", os.getenv("TEGRASTATS_CLIENT_QUEUE_SIZE", "8"))),
+            overflow_policy=os.getenv("TEGRASTATS_API_OVERFLOW_POLICY", os.getenv("TEGRASTATS_OVERFLOW_POLICY", "latest")),
+            max_missed_frames=int(os.getenv("TEGRASTATS_API_MAX_MISSED_FRAMES", os.getenv("TEGRASTATS_MAX_MISSED_FRAMES", "30"))),
+            compression=os.getenv("TEGRASTATS_API_COMPRESSION", os.getenv("TEGRASTATS_COMPRESSION", "true")).lower() == "true",
+            compression_threshold=int(os.getenv("TEGRASTATS_API_COMPRESSION_THRESHOLD", os.getenv("TEGRASTATS_COMPRESSION_THRESHOLD", "512"))),
+            compression_level=int(os.getenv("TEGRASTATS_API_COMPRESSION_LEVEL", os.getenv("TEGRASTATS_COMPRESSION_LEVEL", "6"))),
+            hub_nodes=os.getenv("TEGRASTATS_API_HUB_NODES", os.getenv("TEGRASTATS_HUB_NODES")),
+            stream_replay_size=int(os.getenv("TEGRASTATS_API_STREAM_REPLAY_SIZE", os.getenv("TEGRASTATS_STREAM_REPLAY_SIZE", "60"))),
+            udp_targets=os.getenv("TEGRASTATS_API_UDP_TARGETS", os.getenv("TEGRASTATS_UDP_TARGETS")) or None,
+            udp_node_id=os.getenv("TEGRASTATS_API_UDP_NODE_ID", os.getenv("TEGRASTATS_UDP_NODE_ID")) or None,
+            udp_ttl=int(os.getenv("TEGRASTATS_API_UDP_TTL", os.getenv("TEGRASTATS_UDP_TTL", "1"))),
+            udp_interface=os.getenv("TEGRASTATS_API_UDP_INTERFACE", os.getenv("TEGRASTATS_UDP_INTERFACE")) or None
         )
     
     def to_dict(self) -> dict:
@@ -76,7 +205,36 @@ class Config:
             "cors_origins": self.cors_origins,
             "log_level": self.log_level,
             "log_file": self.log_file,
-            "allow_unsafe_werkzeug": self.allow_unsafe_werkzeug
+            "allow_unsafe_werkzeug": self.allow_unsafe_werkzeug,
+            "history_size": self.history_size,
+            "rollup_tiers": self.rollup_tiers,
+            "delta_keyframe_interval": self.delta_keyframe_interval,
+            "min_update_interval": self.min_update_interval,
+            "async_mode": self.async_mode,
+            "replay_file": self.replay_file,
+            "replay_speed": self.replay_speed,
+            "replay_loop": self.replay_loop,
+            "source": self.source,
+            "sysfs_root": self.sysfs_root,
+            "idle_timeout": self.idle_timeout,
+            "idle_interval": self.idle_interval,
+            "record_dir": self.record_dir,
+            "record_segment_duration": self.record_segment_duration,
+            "record_retention": self.record_retention,
+            "record_query_limit": self.record_query_limit,
+            "perf_enabled": self.perf_enabled,
+            "client_queue_size": self.client_queue_size,
+            "overflow_policy": self.overflow_policy,
+            "max_missed_frames": self.max_missed_frames,
+            "compression": self.compression,
+            "compression_threshold": self.compression_threshold,
+            "compression_level": self.compression_level,
+            "hub_nodes": self.hub_nodes,
+            "stream_replay_size": self.stream_replay_size,
+            "udp_targets": self.udp_targets,
+            "udp_node_id": self.udp_node_id,
+            "udp_ttl": self.udp_ttl,
+            "udp_interface": self.udp_interface
         }
     
     def __repr__(self) -> str:
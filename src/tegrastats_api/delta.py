@@ -0,0 +1,183 @@
+"""
+Delta encoding module for WebSocket updates.
+
+Instead of the full status document, delta subscribers receive a keyframe
+followed by frames that only carry the leaves that changed since the
+previous frame. Leaves are addressed by dotted paths such as
+``cpu.cores.0.usage`` or ``temperature.tj``.
+
+Frame formats::
+
+    {"type": "key", "seq": 41, "data": {...full document...}}
+    {"type": "delta", "seq": 42, "base": 41, "set": {"temperature.tj": 46.1}, "del": []}
+"""
+
+import copy
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def diff_documents(old: Any, new: Any, prefix: str = "") -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Compute the changed leaves between two documents.
+
+    Dictionaries and equally long lists are compared element by element.
+    A list whose length changed is replaced as a whole.
+
+    Args:
+        old: Previous document
+        new: Current document
+        prefix: Path prefix of old/new (used for recursion)
+
+    Returns:
+        Tuple of (changed leaves by path, removed paths)
+    """
+    changed: Dict[str, Any] = {}
+    removed: List[str] = []
+    _diff(old, new, prefix, changed, removed)
+    return changed, removed
+
+
+def _diff(old: Any, new: Any, prefix: str, changed: Dict[str, Any], removed: List[str]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            path = f"{prefix}{key}"
+            if key not in old:
+                changed[path] = value
+            else:
+                _diff(old[key], value, path + ".", changed, removed)
+        for key in old:
+            if key not in new:
+                removed.append(f"{prefix}{key}")
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (before, after) in enumerate(zip(old, new)):
+            _diff(before, after, f"{prefix}{index}.", changed, removed)
+    elif old != new or type(old) is not type(new):
+        changed[prefix[:-1]] = new
+
+
+class DeltaEncoder:
+    """Turns successive samples into keyframes and delta frames."""
+
+    def __init__(self, keyframe_interval: int = 30):
+        """
+        Initialize encoder.
+
+        Args:
+            keyframe_interval: Send a keyframe after this many delta frames
+        """
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._document: Optional[Dict[str, Any]] = None
+        self._sequence = 0
+        self._since_keyframe = 0
+        self._lock = threading.Lock()
+
+    def encode(self, sequence: int, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Encode the next broadcast frame.
+
+        Args:
+            sequence: Sample sequence number
+            document: Status document (not modified)
+
+        Returns:
+            Keyframe or delta frame, or None if this sample was already sent
+        """
+        with self._lock:
+            if self._document is not None and sequence == self._sequence:
+                return None
+
+            if self._document is None or self._since_keyframe >= self.keyframe_interval:
+                frame = {"type": "key", "seq": sequence, "data": document}
+                self._since_keyframe = 0
+            else:
+                changed, removed = diff_documents(self._document, document)
+                frame = {"type": "delta", "seq": sequence, "base": self._sequence,
+                         "set": changed, "del": removed}
+                self._since_keyframe += 1
+
+            self._document = document
+            self._sequence = sequence
+            return frame
+
+    def keyframe(self, sequence: int, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get a keyframe for a client joining or resynchronizing.
+
+        The keyframe matches the last broadcast frame, so the next delta
+        applies to it. If nothing was broadcast yet, the given sample
+        becomes the base of the next delta.
+
+        Args:
+            sequence: Current sample sequence number
+            document: Current status document
+        """
+        with self._lock:
+            if self._document is None:
+                self._document = document
+                self._sequence = sequence
+                self._since_keyframe = 0
+            return {"type": "key", "seq": self._sequence, "data": self._document}
+
+
+class DeltaDecoder:
+    """
+    Reference client-side decoder for ``tegrastats_delta`` frames.
+
+    Example:
+        >>> decoder = DeltaDecoder()
+        >>> @sio.on('tegrastats_delta')
+        ... def on_delta(frame):
+        ...     data = decoder.apply(frame)
+        ...     if data is None:
+        ...         sio.emit('delta_resync')
+    """
+
+    def __init__(self):
+        self.document: Optional[Dict[str, Any]] = None
+        self.sequence: Optional[int] = None
+
+    def apply(self, frame: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply a frame to the local document.
+
+        Args:
+            frame: Keyframe or delta frame
+
+        Returns:
+            The updated document, or None if a delta does not follow the
+            last applied frame and a keyframe is needed
+        """
+        if frame.get("type") == "key":
+            self.document = copy.deepcopy(frame["data"])
+            self.sequence = frame["seq"]
+            return self.document
+
+        if self.document is None or frame.get("base") != self.sequence:
+            return None
+
+        for path, value in frame.get("set", {}).items():
+            container, key = self._locate(path, create=True)
+            if isinstance(container, list):
+                container[int(key)] = value
+            else:
+                container[key] = value
+        for path in frame.get("del", []):
+            container, key = self._locate(path, create=False)
+            if isinstance(container, dict):
+                container.pop(key, None)
+        self.sequence = frame["seq"]
+        return self.document
+
+    def _locate(self, path: str, create: bool) -> Tuple[Any, str]:
+        """Find the container holding the last path segment."""
+        *parents, key = path.split(".")
+        node: Any = self.document
+        for segment in parents:
+            if isinstance(node, list):
+                node = node[int(segment)]
+            elif segment in node or not create:
+                node = node.get(segment, {})
+            else:
+                node = node.setdefault(segment, {})
+        return node, key
@@ -0,0 +1,256 @@
+"""
+In-memory sample history module.
+
+Samples are stored in a fixed-capacity columnar ring buffer: one preallocated
+``array`` per metric, so memory use is known up front and does not grow with
+the number of samples.
+"""
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Storage type, "missing" sentinel and scale for each metric family.
+# Temperatures are stored in milli-degrees so they fit an int32 exactly.
+_TYPES = {
+    "usage": ("B", 0xFF, 1),
+    "freq": ("H", 0xFFFF, 1),
+    "memory": ("I", 0xFFFFFFFF, 1),
+    "temperature": ("i", -0x80000000, 1000),
+    "power": ("I", 0xFFFFFFFF, 1),
+    "gpu": ("B", 0xFF, 1),
+    "avg": ("f", math.nan, 1),
+}
+
+
+def flatten_sample(sample: Dict[str, Any]) -> List[Tuple[str, str, float]]:
+    """
+    Flatten the time-varying metrics of a parsed sample.
+
+    Constant values (RAM/SWAP totals, units) and rail averages are not
+    included; averages can be computed from the history itself.
+
+    Args:
+        sample: Document produced by TegrastatsParser.parse_line
+
+    Returns:
+        List of (field name, metric family, value)
+    """
+    metrics = []
+    for core in sample.get("cpu", {}).get("cores", []):
+        metrics.append((f"cpu.cores.{core['id']}.usage", "usage", core["usage"]))
+        metrics.append((f"cpu.cores.{core['id']}.freq", "freq", core["freq"]))
+    memory = sample.get("memory", {})
+    for kind in ("ram", "swap"):
+        if "used" in memory.get(kind, {}):
+            metrics.append((f"memory.{kind}.used", "memory", memory[kind]["used"]))
+    for sensor, value in sample.get("temperature", {}).items():
+        metrics.append((f"temperature.{sensor}", "temperature", value))
+    for rail, value in sample.get("power", {}).items():
+        metrics.append((f"power.{rail}.current", "power", value["current"]))
+    if "gr3d_freq" in sample.get("gpu", {}):
+        metrics.append(("gpu.gr3d_freq", "gpu", sample["gpu"]["gr3d_freq"]))
+    return metrics
+
+
+def match_fields(names: Iterable[str], requested: Optional[Iterable[str]]) -> List[str]:
+    """
+    Select field names by exact name or dotted prefix.
+
+    ``temperature`` selects every ``temperature.*`` field and ``cpu.cores.0``
+    selects both usage and frequency of core 0.
+
+    Args:
+        names: Available field names
+        requested: Requested names or prefixes; None selects everything
+    """
+    names = list(names)
+    if requested is None:
+        return names
+    requested = [r for r in requested if r]
+    return [name for name in names
+            if any(name == r or name.startswith(r + ".") for r in requested)]
+
+
+class _Column:
+    """Preallocated ring storage for one metric."""
+
+    __slots__ = ("values", "missing", "scale", "is_float")
+
+    def __init__(self, family: str, capacity: int):
+        typecode, missing, scale = _TYPES[family]
+        self.values = array(typecode, [missing]) * capacity
+        self.missing = missing
+        self.scale = scale
+        self.is_float = typecode == "f"
+
+    def decode(self, raw: Iterable[float]) -> List[Optional[float]]:
+        if self.is_float:
+            return [None if v != v else round(v, 3) for v in raw]
+        missing = self.missing
+        if self.scale == 1:
+            return [None if v == missing else v for v in raw]
+        scale = self.scale
+        return [None if v == missing else round(v / scale, 3) for v in raw]
+
+
+class HistoryBuffer:
+    """Fixed-capacity columnar ring buffer of parsed samples."""
+
+    def __init__(self, capacity: int = 86400):
+        """
+        Initialize history buffer.
+
+        Args:
+            capacity: Number of samples kept (86400 = 24 h at 1 Hz)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = array("d", [math.nan]) * capacity
+        self._columns: Dict[str, _Column] = {}
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        # Columns in the order of the last sample's flattened fields
+        self._layout: Tuple[str, ...] = ()
+        self._layout_columns: List[_Column] = []
+        self._absent_columns: List[_Column] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def fields(self) -> List[str]:
+        """Get the names of all recorded fields."""
+        with self._lock:
+            return list(self._columns)
+
+    def memory_bytes(self) -> int:
+        """Get the bytes held by the preallocated columns."""
+        with self._lock:
+            columns = [self._timestamps] + [c.values for c in self._columns.values()]
+            return sum(len(values) * values.itemsize for values in columns)
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        """
+        Record one parsed sample, overwriting the oldest once full.
+
+        Called from the parser thread for every new sample.
+
+        Args:
+            sample: Document produced by TegrastatsParser.parse_line
+        """
+        if not sample:
+            return
+        self.write(sample.get("timestamp", math.nan), flatten_sample(sample))
+
+    def write(self, timestamp: float, metrics: List[Tuple[str, str, float]]) -> None:
+        """
+        Record one row of already flattened metrics.
+
+        Args:
+            timestamp: Row timestamp (UNIX seconds, non-decreasing)
+            metrics: List of (field name, metric family, value)
+        """
+        names = tuple(name for name, _, _ in metrics)
+        with self._lock:
+            slot = self._head
+            self._timestamps[slot] = timestamp
+            if names != self._layout:
+                self._set_layout(names, metrics)
+            for column, (_, _, value) in zip(self._layout_columns, metrics):
+                scale = column.scale
+                try:
+                    column.values[slot] = round(value * scale) if scale != 1 else value
+                except (OverflowError, TypeError):
+                    column.values[slot] = column.missing
+            # Fields absent from this sample must not keep the overwritten value
+            for column in self._absent_columns:
+                column.values[slot] = column.missing
+            self._head = (slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _set_layout(self, names: Tuple[str, ...], metrics: List[Tuple[str, str, float]]) -> None:
+        """Map a new sample layout to columns, creating missing ones. Caller holds the lock."""
+        for name, family, _ in metrics:
+            if name not in self._columns:
+                self._columns[name] = _Column(family, self.capacity)
+        self._layout = names
+        self._layout_columns = [self._columns[name] for name in names]
+        present = set(names)
+        self._absent_columns = [column for name, column in self._columns.items()
+                                if name not in present]
+
+    def oldest(self) -> Optional[float]:
+        """Get the timestamp of the oldest recorded row."""
+        with self._lock:
+            return self._timestamp_at(0) if self._count else None
+
+    def count_between(self, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Get the number of rows a query over the same range would return."""
+        with self._lock:
+            lo, hi = self._range(since, until)
+            return hi - lo
+
+    def _range(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """Logical index range [lo, hi) for a time range. Caller holds the lock."""
+        lo = self._bisect(since, right=False) if since is not None else 0
+        hi = self._bisect(until, right=True) if until is not None else self._count
+        return lo, max(lo, hi)
+
+    def _timestamp_at(self, index: int) -> float:
+        """Timestamp at logical index (0 = oldest). Caller holds the lock."""
+        return self._timestamps[(self._head - self._count + index) % self.capacity]
+
+    def _bisect(self, timestamp: float, right: bool) -> int:
+        """Binary search a logical index by timestamp. Caller holds the lock."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._timestamp_at(mid)
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice(self, values: array, lo: int, hi: int) -> array:
+        """Copy logical range [lo, hi) of a ring column. Caller holds the lock."""
+        start = (self._head - self._count + lo) % self.capacity
+        stop = start + (hi - lo)
+        if stop <= self.capacity:
+            return values[start:stop]
+        return values[start:] + values[:stop - self.capacity]
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Get recorded samples in a time range.
+
+        The range is located by binary search on the timestamp column and
+        copied out by slicing; no per-sample scan is done under the lock.
+
+        Args:
+            since: Inclusive start as UNIX timestamp (None = oldest)
+            until: Inclusive end as UNIX timestamp (None = newest)
+            fields: Field names or dotted prefixes (None = all fields)
+
+        Returns:
+            Dictionary with ``count``, ``timestamps`` and ``fields`` mapping
+            each field name to its values (None where not recorded)
+        """
+        with self._lock:
+            lo, hi = self._range(since, until)
+            names = match_fields(self._columns, fields)
+            timestamps = self._slice(self._timestamps, lo, hi)
+            raw = {name: self._slice(self._columns[name].values, lo, hi) for name in names}
+            columns = {name: self._columns[name] for name in names}
+
+        return {
+            "count": hi - lo,
+            "timestamps": timestamps.tolist(),
+            "fields": {name: columns[name].decode(values) for name, values in raw.items()},
+        }
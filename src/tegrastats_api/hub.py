@@ -0,0 +1,424 @@
+"""
+Hub module.
+
+In hub mode the server does not sample a Jetson itself. It keeps one
+Socket.IO subscription per upstream tegrastats-api node and merges their
+updates into a single fleet document, which the usual pipeline (snapshots,
+REST routes, WebSocket rooms) then serves to any number of dashboards. Every
+node has exactly one consumer, the hub.
+
+Fleet document::
+
+    {
+      "timestamp": ...,
+      "nodes": {
+        "<name>": {"url": ..., "online": true, "last_seen": ..., "status": {...}}
+      },
+      "fleet": {
+        "size": 3,
+        "online": 2,
+        "metrics": {
+          "temperature": {"tj": {"min": ..., "max": ..., "avg": ..., "count": 2,
+                                 "min_node": ..., "max_node": ...}},
+          ...
+        }
+      }
+    }
+
+``status`` is the node's own /api/status document; ``metrics`` nests the
+history field names (``temperature.tj``, ``power.vdd_gpu_soc.current``, ...)
+plus ``cpu.usage``, the mean core usage of each node.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .history import flatten_sample
+from .snapshot import format_timestamp
+from .sources import Pacer, SampleSource
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 58090
+
+# Node names are used as document keys and topic path segments
+_NODE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def parse_nodes(spec: str) -> List[Tuple[str, str]]:
+    """
+    Parse a hub node list.
+
+    Args:
+        spec: Comma-separated nodes, each ``[name=]host[:port]`` or a URL,
+            e.g. ``orin1=10.10.99.98,orin2=10.10.99.99:58090``. Unnamed nodes
+            are named after host and port.
+
+    Returns:
+        List of (name, base URL)
+
+    Raises:
+        ValueError: If a node is malformed, a name is invalid or repeated,
+            or the list is empty
+    """
+    nodes: List[Tuple[str, str]] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, address = item.partition("=")
+        if not sep:
+            name, address = "", item
+        address = address.strip()
+        if "://" not in address:
+            address = f"http://{address}"
+        try:
+            parsed = urlsplit(address)
+            host = parsed.hostname
+            port = parsed.port or DEFAULT_PORT
+        except ValueError:
+            host = None
+        if not host:
+            raise ValueError(f"Invalid hub node '{item}'")
+        name = name.strip() or re.sub(r"[^A-Za-z0-9_-]", "-", f"{host}-{port}")
+        if not _NODE_NAME.match(name):
+            raise ValueError(f"Invalid hub node name '{name}'")
+        if any(name == existing for existing, _ in nodes):
+            raise ValueError(f"Duplicate hub node name '{name}'")
+        netloc = f"[{host}]" if ":" in host else host
+        nodes.append((name, f"{parsed.scheme}://{netloc}:{port}"))
+    if not nodes:
+        raise ValueError("No hub nodes given")
+    return nodes
+
+
+def node_metrics(status: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """
+    Get the aggregated metrics of one node's status document.
+
+    Returns:
+        List of (field name, value)
+    """
+    metrics = [(name, value) for name, _, value in flatten_sample(status)
+               if value is not None]
+    usage = [core["usage"] for core in status.get("cpu", {}).get("cores", [])
+             if core.get("usage") is not None]
+    if usage:
+        metrics.append(("cpu.usage", round(sum(usage) / len(usage), 3)))
+    return metrics
+
+
+def aggregate(statuses: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute fleet-wide min/max/avg per metric.
+
+    Args:
+        statuses: Status document per node name (online nodes only)
+
+    Returns:
+        Nested statistics keyed by the segments of each field name
+    """
+    values: Dict[str, List[Tuple[str, float]]] = {}
+    for node in sorted(statuses):
+        for name, value in node_metrics(statuses[node]):
+            values.setdefault(name, []).append((node, value))
+
+    metrics: Dict[str, Any] = {}
+    for name in sorted(values):
+        entries = values[name]
+        low = min(entries, key=lambda entry: entry[1])
+        high = max(entries, key=lambda entry: entry[1])
+        *parents, leaf = name.split(".")
+        target = metrics
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = {
+            "min": low[1],
+            "max": high[1],
+            "avg": round(sum(value for _, value in entries) / len(entries), 3),
+            "count": len(entries),
+            "min_node": low[0],
+            "max_node": high[0],
+        }
+    return metrics
+
+
+def fleet_section(document: Dict[str, Any], section: str) -> Optional[Dict[str, Any]]:
+    """
+    Build a section document (/api/cpu, /api/memory, ...) of a fleet document.
+
+    Args:
+        document: Fleet document, see FleetHub.document()
+        section: Section name, e.g. ``cpu``
+
+    Returns:
+        ``{"nodes": {name: section of each online node}, "fleet": fleet
+        metrics of the section}``, or None if document is not a fleet
+        document
+    """
+    nodes = document.get("nodes")
+    if not isinstance(nodes, dict):
+        return None
+    return {
+        "nodes": {name: node["status"][section] for name, node in nodes.items()
+                  if node.get("online") and isinstance(node.get("status"), dict)
+                  and section in node["status"]},
+        "fleet": document.get("fleet", {}).get("metrics", {}).get(section, {}),
+    }
+
+
+class NodeLink:
+    """Socket.IO subscription to one upstream node, reconnecting as needed."""
+
+    def __init__(self, name: str, url: str, interval: float = 1.0,
+                 retry_delay: float = 1.0, max_retry_delay: float = 30.0):
+        """
+        Initialize link.
+
+        Args:
+            name: Node name
+            url: Base URL of the node's tegrastats-api server
+            interval: Update interval requested from the node in seconds
+            retry_delay: Initial delay before reconnecting in seconds
+            max_retry_delay: Upper bound of the reconnect backoff
+        """
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.status: Optional[Dict[str, Any]] = None
+        self.received: Optional[float] = None
+        self.connected = False
+        self.updates = 0
+        self.connects = 0
+        self.error: Optional[str] = None
+        self._client: Any = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Connect in the background."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"hub-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Disconnect and stop reconnecting."""
+        self._stop.set()
+        client = self._client
+        if client is not None:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.connected = False
+
+    def set_interval(self, interval: float) -> None:
+        """Change the update interval requested from the node."""
+        self.interval = interval
+        client = self._client
+        if client is not None and self.connected:
+            try:
+                client.emit('set_interval', {'interval': interval})
+            except Exception as e:
+                logger.warning(f"无法更新节点 {self.name} 的更新间隔: {e}")
+
+    def is_online(self, now: Optional[float] = None) -> bool:
+        """Connected and updated within the last few intervals."""
+        if not self.connected or self.received is None:
+            return False
+        stale_after = max(3 * self.interval, 5.0)
+        return (now or time.time()) - self.received <= stale_after
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Get the link state for /api/nodes.
+
+        Returns:
+            Dictionary with name, url, online, connected, last_seen,
+            updates, connects and the last connection error
+        """
+        return {
+            "name": self.name,
+            "url": self.url,
+            "online": self.is_online(),
+            "connected": self.connected,
+            "last_seen": format_timestamp(self.received) if self.received else None,
+            "updates": self.updates,
+            "connects": self.connects,
+            "error": self.error,
+        }
+
+    def _run(self) -> None:
+        import socketio
+
+        delay = self.retry_delay
+        while not self._stop.is_set():
+            client = socketio.Client(reconnection=False)
+            client.on('connect', lambda: self._on_connect(client))
+            client.on('disconnect', self._on_disconnect)
+            client.on('tegrastats_update', self._on_update)
+            self._client = client
+            try:
+                client.connect(self.url, transports=['websocket'], wait_timeout=5)
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                logger.warning(f"无法连接节点 {self.name} ({self.url}): {self.error}")
+                if self._stop.wait(delay):
+                    break
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            delay = self.retry_delay
+            if self._stop.is_set():
+                client.disconnect()
+                break
+            client.wait()
+            if not self._stop.is_set():
+                logger.warning(f"节点 {self.name} 连接断开, 正在重连")
+                self._stop.wait(self.retry_delay)
+        self._client = None
+
+    def _on_connect(self, client: Any) -> None:
+        self.connected = True
+        self.connects += 1
+        self.error = None
+        # Ask for the hub's rate and for updates compressed once per sample
+        # on the node; nodes without compression keep sending JSON documents
+        client.emit('set_interval', {'interval': self.interval})
+        client.emit('compressed_subscribe')
+        logger.info(f"已连接节点 {self.name} ({self.url})")
+
+    def _on_disconnect(self, *args: Any) -> None:
+        self.connected = False
+
+    def _on_update(self, payload: Any) -> None:
+        if isinstance(payload, (bytes, bytearray)):
+            try:
+                payload = json.loads(zlib.decompress(payload))
+            except (zlib.error, ValueError) as e:
+                logger.warning(f"节点 {self.name} 的压缩数据无效: {e}")
+                return
+        if not isinstance(payload, dict):
+            return
+        self.status = payload
+        self.received = time.time()
+        self.updates += 1
+
+
+class FleetHub:
+    """Upstream links of a hub and the fleet document built from them."""
+
+    def __init__(self, nodes: List[Tuple[str, str]], interval: float = 1.0):
+        """
+        Initialize hub.
+
+        Args:
+            nodes: (name, base URL) per node, see parse_nodes()
+            interval: Update interval requested from every node in seconds
+        """
+        self.links = [NodeLink(name, url, interval) for name, url in nodes]
+
+    def start(self) -> None:
+        """Connect to all nodes."""
+        for link in self.links:
+            link.start()
+        logger.info(f"集线器模式: 订阅 {len(self.links)} 个节点")
+
+    def stop(self) -> None:
+        """Disconnect from all nodes."""
+        for link in self.links:
+            link.stop()
+
+    def set_interval(self, interval: float) -> None:
+        """Change the update interval of every node in seconds."""
+        for link in self.links:
+            link.set_interval(interval)
+
+    def document(self) -> Dict[str, Any]:
+        """
+        Build the fleet document from the latest update of every node.
+
+        Returns:
+            Fleet document (see module docstring) with a float timestamp
+        """
+        now = time.time()
+        nodes = {}
+        online = {}
+        for link in self.links:
+            is_online = link.is_online(now)
+            nodes[link.name] = {
+                "url": link.url,
+                "online": is_online,
+                "last_seen": format_timestamp(link.received) if link.received else None,
+                "status": link.status,
+            }
+            if is_online and link.status:
+                online[link.name] = link.status
+        return {
+            "timestamp": now,
+            "nodes": nodes,
+            "fleet": {
+                "size": len(self.links),
+                "online": len(online),
+                "metrics": aggregate(online),
+            },
+        }
+
+    def nodes(self) -> List[Dict[str, Any]]:
+        """Get the state of every upstream link."""
+        return [link.state() for link in self.links]
+
+
+class HubSource(SampleSource):
+    """Fleet documents of a FleetHub, one per interval."""
+
+    def __init__(self, nodes: List[Tuple[str, str]], interval: int = 1000):
+        """
+        Initialize hub source.
+
+        Args:
+            nodes: (name, base URL) per node, see parse_nodes()
+            interval: Interval of fleet documents (and of the updates
+                requested from every node) in milliseconds
+        """
+        self.hub = FleetHub(nodes, interval / 1000)
+        # Give the nodes one interval to deliver before the first document
+        self._pacer = Pacer(interval, delay_first=True)
+
+    @property
+    def interval(self) -> int:
+        return self._pacer.interval
+
+    def open(self) -> None:
+        """Connect to the nodes."""
+        self.hub.start()
+        self._pacer.reset()
+
+    def samples(self, parse: Callable[[str], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        while self._pacer.wait():
+            yield self.hub.document()
+
+    def set_interval(self, interval: int) -> None:
+        """Change the document interval and the nodes' update interval."""
+        self._pacer.set_interval(interval)
+        self.hub.set_interval(interval / 1000)
+
+    def close(self) -> None:
+        """Stop building documents and disconnect from the nodes."""
+        self._pacer.close()
+        self.hub.stop()
+
+    def describe(self) -> str:
+        return f"hub ({len(self.hub.links)} nodes, {self.interval}ms)"
@@ -0,0 +1,113 @@
+"""
+Demand-driven sampling module.
+
+Sampling only matters while somebody consumes the samples. IdleMonitor
+watches WebSocket connections and REST requests and, after a quiet period,
+slows the sample source down to a keep-warm rate or stops it. Any new
+activity resumes full-rate sampling from a background thread, so the
+request that ends the idle period is answered from the cached last sample
+instead of waiting for the source to restart.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from .parser import TegrastatsParser
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdleMonitor:
+    """Suspends and resumes a parser's sampling based on client activity."""
+
+    def __init__(self, parser: TegrastatsParser, timeout: float,
+                 idle_interval: int, active_interval: int,
+                 clients: Callable[[], int]):
+        """
+        Initialize monitor.
+
+        Args:
+            parser: Parser whose source is throttled
+            timeout: Seconds without clients or requests before suspending
+            idle_interval: Keep-warm sampling interval in milliseconds
+                (0 stops the source while idle)
+            active_interval: Normal sampling interval in milliseconds
+            clients: Returns the number of connected WebSocket clients
+        """
+        if timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.parser = parser
+        self.timeout = timeout
+        self.idle_interval = idle_interval
+        self.active_interval = active_interval
+        self.clients = clients
+        self.idle = False
+        self.suspensions = 0
+        self._last_activity = time.monotonic()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self) -> None:
+        """Record client activity; resumes sampling right away if idle."""
+        self._last_activity = time.monotonic()
+        if self.idle:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Start watching for idle periods."""
+        self._last_activity = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching (the parser is left as it is)."""
+        self._running = False
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        check = min(1.0, self.timeout / 2)
+        while self._running:
+            self._wake.wait(check)
+            self._wake.clear()
+            if not self._running:
+                break
+            try:
+                active = (self.clients() > 0 or
+                          time.monotonic() - self._last_activity < self.timeout)
+                if active and self.idle:
+                    self._resume()
+                elif not active and not self.idle:
+                    self._suspend()
+            except Exception as e:
+                logger.error(f"切换采样状态时出错: {e}")
+
+    def _suspend(self) -> None:
+        self.idle = True
+        self.suspensions += 1
+        if self.idle_interval > 0:
+            self.parser.set_interval(self.idle_interval)
+            logger.info(f"无客户端, 采样降至保温间隔: {self.idle_interval}ms")
+        else:
+            self.parser.stop()
+            logger.info("无客户端, 采样已暂停")
+
+    def _resume(self) -> None:
+        if self.idle_interval > 0:
+            self.parser.set_interval(self.active_interval)
+        else:
+            thread = self.parser._thread
+            if thread is not None and thread.is_alive():
+                # The stopped parse thread has not left the source yet; stay
+                # idle and retry on the next check
+                logger.debug("采样线程尚未退出, 稍后恢复")
+                return
+            self.parser.start()
+        self.idle = False
+        logger.info(f"客户端活动, 采样恢复: {self.active_interval}ms")
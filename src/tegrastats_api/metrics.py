@@ -0,0 +1,121 @@
+"""
+Prometheus exposition module.
+
+Renders a parsed sample in the Prometheus text format (version 0.0.4) as
+labeled gauges, so ``/metrics`` can be scraped directly without a sidecar
+re-exporting ``/api/status``. Values are converted to Prometheus base units
+(bytes, watts, seconds).
+"""
+
+from typing import Any, Dict, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+_MB = 1024 * 1024
+
+# name -> (type, help)
+_METRICS = {
+    "tegrastats_cpu_usage_percent": ("gauge", "CPU core usage"),
+    "tegrastats_cpu_frequency_hertz": ("gauge", "CPU core frequency"),
+    "tegrastats_memory_used_bytes": ("gauge", "Used RAM or swap"),
+    "tegrastats_memory_total_bytes": ("gauge", "Total RAM or swap"),
+    "tegrastats_swap_cached_bytes": ("gauge", "Swap cache size"),
+    "tegrastats_temperature_celsius": ("gauge", "Thermal sensor temperature"),
+    "tegrastats_power_watts": ("gauge", "Current power draw of a rail"),
+    "tegrastats_power_average_watts": ("gauge", "Average power draw of a rail"),
+    "tegrastats_gpu_usage_percent": ("gauge", "GPU (GR3D) usage"),
+    "tegrastats_node_up": ("gauge", "Whether a hub's upstream node is online"),
+    "tegrastats_sample_timestamp_seconds": ("gauge", "Capture time of the sample"),
+    "tegrastats_samples_total": ("counter", "Samples parsed since the server started"),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# ((label, value), ...)
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _collect(series: Dict[str, List[Tuple[Labels, Any]]], sample: Dict[str, Any],
+             labels: Labels = ()) -> None:
+    """Add the gauges of one status document, each with the given labels."""
+    for core in sample.get("cpu", {}).get("cores", []):
+        label = labels + (("core", str(core.get("id"))),)
+        if core.get("usage") is not None:
+            series["tegrastats_cpu_usage_percent"].append((label, core["usage"]))
+        if core.get("freq") is not None:
+            series["tegrastats_cpu_frequency_hertz"].append((label, core["freq"] * 1000000))
+
+    memory = sample.get("memory", {})
+    for kind in ("ram", "swap"):
+        values = memory.get(kind, {})
+        label = labels + (("type", kind),)
+        if values.get("used") is not None:
+            series["tegrastats_memory_used_bytes"].append((label, values["used"] * _MB))
+        if values.get("total") is not None:
+            series["tegrastats_memory_total_bytes"].append((label, values["total"] * _MB))
+    if memory.get("swap", {}).get("cached") is not None:
+        series["tegrastats_swap_cached_bytes"].append((labels, memory["swap"]["cached"] * _MB))
+
+    for sensor, value in sample.get("temperature", {}).items():
+        if value is not None:
+            series["tegrastats_temperature_celsius"].append((labels + (("sensor", sensor),), value))
+
+    for rail, values in sample.get("power", {}).items():
+        label = labels + (("rail", rail),)
+        if values.get("current") is not None:
+            series["tegrastats_power_watts"].append((label, values["current"] / 1000))
+        if values.get("average") is not None:
+            series["tegrastats_power_average_watts"].append((label, values["average"] / 1000))
+
+    if sample.get("gpu", {}).get("gr3d_freq") is not None:
+        series["tegrastats_gpu_usage_percent"].append((labels, sample["gpu"]["gr3d_freq"]))
+
+
+def render_metrics(sequence: int, timestamp: float, sample: Dict[str, Any]) -> bytes:
+    """
+    Render a sample as Prometheus exposition text.
+
+    A hub's fleet document is rendered as the status of every online node,
+    labeled with ``node``.
+
+    Args:
+        sequence: Sample sequence number
+        timestamp: Capture time (UNIX seconds)
+        sample: Document produced by TegrastatsParser.parse_line, or a
+            fleet document (see hub module)
+
+    Returns:
+        UTF-8 encoded exposition text
+    """
+    series: Dict[str, List[Tuple[Labels, Any]]] = {name: [] for name in _METRICS}
+
+    _collect(series, sample)
+    for node, state in sorted(sample.get("nodes", {}).items()):
+        series["tegrastats_node_up"].append(((("node", node),), 1 if state.get("online") else 0))
+        if state.get("online") and state.get("status"):
+            _collect(series, state["status"], (("node", node),))
+
+    series["tegrastats_sample_timestamp_seconds"].append(((), timestamp))
+    series["tegrastats_samples_total"].append(((), sequence))
+
+    lines = []
+    for name, values in series.items():
+        if not values:
+            continue
+        kind, text = _METRICS[name]
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in values:
+            rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f"{name}{{{rendered}}} {_format_value(value)}" if rendered
+                         else f"{name} {_format_value(value)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
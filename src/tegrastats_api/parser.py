@@ -2,122 +2,207 @@
 Tegrastats parser module.
 """
 
-import subprocess
 import threading
 import time
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 import json
 import re
 
+from .perf import PerfMonitor
+from .sources import SampleSource, TegrastatsSource
+
 
 logger = logging.getLogger(__name__)
 
+# Keywords whose value is the following token(s) in a tegrastats line.
+_SECTION_TOKENS = frozenset(("RAM", "SWAP", "CPU", "GR3D_FREQ"))
+_DECIMAL_CHARS = "0123456789."
+_CORE_RE = re.compile(r'(\d+)%@(\d+)')
+
+
+def _is_word(token: str) -> bool:
+    """Return True if token consists only of word characters (regex ``\\w+``)."""
+    return ("_" + token).isidentifier()
+
 
 class TegrastatsParser:
     """Parser for tegrastats output."""
     
-    def __init__(self, interval: int = 1000):
+    def __init__(self, interval: int = 1000, source: Optional[SampleSource] = None):
         """
         Initialize parser.
         
         Args:
             interval: Sampling interval in milliseconds
+            source: Sample source (defaults to the tegrastats binary)
         """
         self.interval = interval
-        self._process: Optional[subprocess.Popen] = None
+        self.source = source
         self._thread: Optional[threading.Thread] = None
         self._running = False
         self._current_data: Dict[str, Any] = {}
+        self._sequence = 0
         self._lock = threading.Lock()
+        self._new_sample = threading.Condition(self._lock)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Self-instrumentation (disabled unless a server enables it)
+        self.perf = PerfMonitor()
         
     def start(self) -> None:
-        """Start tegrastats process and parsing thread."""
+        """Open the sample source and start the parsing thread."""
         if self._running:
             logger.warning("Parser already running")
             return
             
         try:
-            # Start tegrastats process
-            cmd = ["tegrastats", "--interval", str(self.interval)]
-            self._process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            if self.source is None:
+                self.source = TegrastatsSource(interval=self.interval)
+            self.source.open()
             
             self._running = True
             self._thread = threading.Thread(target=self._parse_output, daemon=True)
             self._thread.start()
             
-            logger.info(f"tegrastats进程已启动，间隔: {self.interval}ms")
-            
         except Exception as e:
             logger.error(f"启动tegrastats失败: {e}")
             raise
     
     def stop(self) -> None:
-        """Stop tegrastats process and parsing thread."""
-        if not self._running:
+        """Close the sample source and stop the parsing thread."""
+        if self.source is None:
             return
             
         self._running = False
-        
-        if self._process:
-            try:
-                self._process.terminate()
-                self._process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
-                self._process.wait()
-            except Exception as e:
-                logger.error(f"停止tegrastats进程时出错: {e}")
-            finally:
-                self._process = None
+        self.source.close()
         
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
             
-        logger.info("tegrastats进程已停止")
+        logger.info(f"数据源已停止: {self.source.describe()}")
+    
+    def set_interval(self, interval: int) -> None:
+        """
+        Change the sampling interval, also of a running source.
+        
+        Args:
+            interval: Sampling interval in milliseconds
+        """
+        self.interval = interval
+        if self.source is not None:
+            self.source.set_interval(interval)
     
     def get_current_status(self) -> Dict[str, Any]:
         """Get current parsed data."""
         with self._lock:
             return self._current_data.copy() if self._current_data else {}
     
+    def get_current_sample(self) -> Tuple[int, Dict[str, Any]]:
+        """
+        Get the current parsed data together with its sequence number.
+        
+        The sequence number increases by one for every new sample, so callers
+        can tell whether the data changed since they last looked. The returned
+        dictionary is shared and must not be modified.
+        
+        Returns:
+            Tuple of (sequence, data); data is empty if no sample arrived yet
+        """
+        start = self.perf.start()
+        with self._lock:
+            self.perf.record("lock_wait", start)
+            return self._sequence, self._current_data
+    
+    def wait_for_sample(self, after: int, timeout: Optional[float] = None) -> int:
+        """
+        Wait until a sample newer than a known sequence number is stored.
+        
+        Args:
+            after: Last sequence number the caller has seen
+            timeout: Maximum wait in seconds (None waits forever)
+        
+        Returns:
+            The current sequence number (equal to after on timeout)
+        """
+        with self._new_sample:
+            self._new_sample.wait_for(lambda: self._sequence > after, timeout)
+            return self._sequence
+    
+    def add_sample_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Register a callback for every new sample.
+        
+        Listeners run on the parsing thread right after the sample becomes
+        current, so they must be quick. The sample must not be modified.
+        
+        Args:
+            listener: Callable receiving the parsed sample
+        """
+        self._listeners.append(listener)
+    
+    def _store_sample(self, data: Dict[str, Any]) -> None:
+        """Store a newly parsed sample as the current data."""
+        start = self.perf.start()
+        with self._lock:
+            self.perf.record("lock_wait", start)
+            self._current_data = data
+            self._sequence += 1
+            self._new_sample.notify_all()
+        self.perf.count("samples")
+        
+        start = self.perf.start()
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                logger.error(f"样本监听器出错: {e}")
+        self.perf.record("listeners", start)
+    
+    def _parse(self, line: str) -> Dict[str, Any]:
+        """Parse a line, recording parse time and failures."""
+        start = self.perf.start()
+        data = self.parse_line(line)
+        self.perf.record("parse", start)
+        if not (data.get("cpu", {}).get("cores") or data.get("memory", {}).get("ram")
+                or data.get("temperature") or data.get("power") or data.get("gpu")):
+            # Failed, or no field recognized
+            self.perf.count("parse_errors")
+        return data
+    
     def _parse_output(self) -> None:
-        """Parse tegrastats output in background thread."""
-        if not self._process or not self._process.stdout:
-            return
-            
+        """
+        Store source samples in background thread.
+        
+        A thread that outlived stop() (blocked in the source) must neither
+        store samples nor clear _running once start() replaced it.
+        """
+        current = threading.current_thread()
         try:
-            for line in iter(self._process.stdout.readline, ''):
-                if not self._running:
+            for parsed_data in self.source.samples(self._parse):
+                if not self._running or self._thread is not current:
                     break
                     
-                line = line.strip()
-                if line:
-                    try:
-                        parsed_data = self.parse_line(line)
-                        if parsed_data:
-                            with self._lock:
-                                self._current_data = parsed_data
-                    except Exception as e:
-                        logger.error(f"解析tegrastats行时出错: {e}")
+                try:
+                    self._store_sample(parsed_data)
+                except Exception as e:
+                    logger.error(f"保存采样时出错: {e}")
                         
         except Exception as e:
             logger.error(f"读取tegrastats输出时出错: {e}")
         finally:
-            self._running = False
+            if self._thread is current:
+                self._running = False
     
     @staticmethod
     def parse_line(line: str) -> Dict[str, Any]:
         """
         Parse a single line of tegrastats output.
         
+        The line is split into whitespace-separated tokens once and every
+        field (RAM, SWAP, CPU cores, GR3D_FREQ, ``name@tempC`` sensors and
+        ``RAIL cur/avg`` pairs) is picked up in the same pass, instead of
+        running one regular expression per field over the whole line.
+        
         Args:
             line: Raw tegrastats output line
             
@@ -125,75 +210,99 @@ class TegrastatsParser:
             Parsed data dictionary
         """
         try:
-            result = {
-                "timestamp": time.time(),
-                "cpu": {"cores": []},
-                "memory": {"ram": {}, "swap": {}},
-                "temperature": {},
-                "power": {},
-                "gpu": {}
-            }
+            cores: List[Dict[str, int]] = []
+            ram: Dict[str, Any] = {}
+            swap: Dict[str, Any] = {}
+            temperature: Dict[str, float] = {}
+            power: Dict[str, Dict[str, Any]] = {}
+            gpu: Dict[str, int] = {}
             
-            # Parse CPU information
-            cpu_match = re.search(r'CPU \[(.*?)\]', line)
-            if cpu_match:
-                cpu_data = cpu_match.group(1)
-                cores = []
+            tokens = line.split()
+            count = len(tokens)
+            i = 0
+            while i < count:
+                token = tokens[i]
                 
-                # Parse individual CPU cores
-                core_pattern = r'(\d+)%@(\d+)'
-                core_matches = re.findall(core_pattern, cpu_data)
+                if token in _SECTION_TOKENS and i + 1 < count:
+                    value = tokens[i + 1]
+                    
+                    if token == "RAM" and not ram:
+                        # RAM 1997/62841MB
+                        used, _, total = value[:-2].partition("/")
+                        if value.endswith("MB") and used.isdigit() and total.isdigit():
+                            ram = {
+                                "used": int(used),
+                                "total": int(total),
+                                "unit": "MB"
+                            }
+                            i += 2
+                            continue
+                    
+                    elif token == "SWAP" and not swap and i + 3 < count:
+                        # SWAP 0/31421MB (cached 0MB)
+                        used, _, total = value[:-2].partition("/")
+                        cached = tokens[i + 3][:-3]
+                        if (value.endswith("MB") and used.isdigit() and total.isdigit()
+                                and tokens[i + 2] == "(cached"
+                                and tokens[i + 3].endswith("MB)") and cached.isdigit()):
+                            swap = {
+                                "used": int(used),
+                                "total": int(total),
+                                "cached": int(cached),
+                                "unit": "MB"
+                            }
+                            i += 4
+                            continue
+                    
+                    elif token == "CPU" and not cores and value.startswith("["):
+                        # CPU [3%@1574,0%@1574,off,...]
+                        cores = [
+                            {"id": core_id, "usage": int(usage), "freq": int(freq)}
+                            for core_id, (usage, freq) in enumerate(_CORE_RE.findall(value))
+                        ]
+                        i += 2
+                        continue
+                    
+                    elif token == "GR3D_FREQ" and not gpu:
+                        # GR3D_FREQ 0% / 0%@76 / 0%@[305,305]
+                        usage, percent, _ = value.partition("%")
+                        if percent and usage.isdigit():
+                            gpu["gr3d_freq"] = int(usage)
+                            i += 2
+                            continue
                 
-                for i, (usage, freq) in enumerate(core_matches):
-                    cores.append({
-                        "id": i,
-                        "usage": int(usage),
-                        "freq": int(freq)
-                    })
+                if token[-1] == "C" and "@" in token:
+                    # cpu@45.75C
+                    sensor, _, degrees = token[:-1].partition("@")
+                    if degrees and not degrees.strip(_DECIMAL_CHARS) and _is_word(sensor):
+                        temperature[sensor.lower()] = float(degrees)
                 
-                result["cpu"]["cores"] = cores
-            
-            # Parse memory information
-            ram_match = re.search(r'RAM (\d+)/(\d+)MB', line)
-            if ram_match:
-                used, total = ram_match.groups()
-                result["memory"]["ram"] = {
-                    "used": int(used),
-                    "total": int(total),
-                    "unit": "MB"
-                }
-            
-            # Parse swap information
-            swap_match = re.search(r'SWAP (\d+)/(\d+)MB \(cached (\d+)MB\)', line)
-            if swap_match:
-                used, total, cached = swap_match.groups()
-                result["memory"]["swap"] = {
-                    "used": int(used),
-                    "total": int(total),
-                    "cached": int(cached),
-                    "unit": "MB"
-                }
-            
-            # Parse temperature information
-            temp_matches = re.findall(r'(\w+)@([\d.]+)C', line)
-            for sensor, temp in temp_matches:
-                result["temperature"][sensor.lower()] = float(temp)
-            
-            # Parse power information
-            power_matches = re.findall(r'(\w+) (\d+)/(\d+)', line)
-            for component, current, average in power_matches:
-                result["power"][component.lower()] = {
-                    "current": int(current),
-                    "average": int(average),
-                    "unit": "mW"
-                }
-            
-            # Parse GPU information
-            gpu_match = re.search(r'GR3D_FREQ (\d+)%', line)
-            if gpu_match:
-                result["gpu"]["gr3d_freq"] = int(gpu_match.group(1))
+                elif i + 1 < count and "/" in tokens[i + 1]:
+                    # VDD_GPU_SOC 2468mW/2468mW or VDD_IN 3000/3000
+                    current, _, average = tokens[i + 1].partition("/")
+                    if current.endswith("mW"):
+                        current = current[:-2]
+                    if average.endswith("mW"):
+                        average = average[:-2]
+                    if current.isdigit() and average.isdigit() and _is_word(token):
+                        power[token.lower()] = {
+                            "current": int(current),
+                            "average": int(average),
+                            "unit": "mW"
+                        }
+                        i += 2
+                        continue
+                
+                i += 1
             
-            return result
+            return {
+                "timestamp": time.time(),
+                "cpu": {"cores": cores},
+                "memory": {"ram": ram, "swap": swap},
+                "temperature": temperature,
+                "power": power,
+                "gpu": gpu
+            }
             
         except Exception as e:
             logger.error(f"解析tegrastats行失败: {e}")
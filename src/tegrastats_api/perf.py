@@ -0,0 +1,131 @@
+"""
+Self-instrumentation module.
+
+PerfMonitor measures what the monitor itself costs: parse, serialize, emit,
+lock wait and per-route request latency, sample/drop/error counters and the
+process' own CPU time and resident memory. It is off by default and can be
+switched on and off at runtime; while off, every hot-path hook returns after
+a single attribute check.
+"""
+
+import os
+import resource
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .scheduler import LatencyStats
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class PerfMonitor:
+    """Runtime-toggleable timers and counters for the sampling pipeline."""
+
+    def __init__(self, enabled: bool = False, window: int = 1000):
+        """
+        Initialize monitor.
+
+        Args:
+            enabled: Start measuring right away
+            window: Number of recent measurements kept per timer
+        """
+        self.window = window
+        self.enabled = False
+        self._timers: Dict[str, LatencyStats] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._since = time.time()
+        self._cpu_start = _cpu_seconds()
+        self._wall_start = time.monotonic()
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Switch measuring on or off; switching on starts a fresh window."""
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        """Clear all timers and counters."""
+        with self._lock:
+            self._timers = {}
+            self._counters = {}
+            self._since = time.time()
+            self._cpu_start = _cpu_seconds()
+            self._wall_start = time.monotonic()
+
+    def start(self) -> Optional[float]:
+        """
+        Start a measurement.
+
+        Returns:
+            Start time to pass to record(), or None while disabled
+        """
+        return time.perf_counter() if self.enabled else None
+
+    def record(self, name: str, start: Optional[float]) -> None:
+        """
+        Finish a measurement started with start().
+
+        Args:
+            name: Timer name (e.g. ``parse``, ``request./api/status``)
+            start: Value returned by start(); None is ignored
+        """
+        if start is None or not self.enabled:
+            return
+        elapsed = time.perf_counter() - start
+        timer = self._timers.get(name)
+        if timer is None:
+            with self._lock:
+                timer = self._timers.setdefault(name, LatencyStats(self.window))
+        timer.record(elapsed)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increase a counter while enabled."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get all measurements.
+
+        Returns:
+            Dictionary with ``enabled``, ``since``, ``timers`` (latency
+            statistics in milliseconds), ``counters`` and ``process`` (CPU
+            time, CPU usage since the window started, RSS and threads)
+        """
+        with self._lock:
+            timers = dict(self._timers)
+            counters = dict(self._counters)
+            since = self._since
+            cpu_start = self._cpu_start
+            wall_start = self._wall_start
+        cpu = _cpu_seconds()
+        wall = time.monotonic() - wall_start
+        return {
+            "enabled": self.enabled,
+            "since": since,
+            "timers": {name: timers[name].summary() for name in sorted(timers)},
+            "counters": counters,
+            "process": {
+                "cpu_seconds": round(cpu, 3),
+                "cpu_percent": round((cpu - cpu_start) / wall * 100, 2) if wall > 0 else 0.0,
+                "rss_bytes": _rss_bytes(),
+                "threads": threading.active_count(),
+            },
+        }
@@ -0,0 +1,157 @@
+"""
+Field projection module.
+
+A projection (``fields=temperature.tj,cpu.cores.usage``) keeps only the
+listed dotted paths of a status document. A path that reaches a list applies
+its remaining segments to every element (``cpu.cores.usage`` keeps the usage
+of each core) unless the next segment is an index (``cpu.cores.0``). Paths
+missing from a sample are left out; ``timestamp`` is always kept.
+
+Every distinct projection is compiled once into a tree. Its snapshot key
+(``status?fields=...``, fields sorted) lets Snapshot cache the projected and
+encoded document once per sample, shared by all requests and clients asking
+for the same fields.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Tuple, Union
+
+# Snapshot key prefix of projected status documents
+PROJECTION_PREFIX = "status?fields="
+
+# Upper bound on the number of paths in one projection
+MAX_FIELDS = 64
+
+# Compiled projections kept (one per distinct field set)
+CACHE_SIZE = 256
+
+
+def parse_fields(value: Union[str, Iterable[str], None]) -> Tuple[str, ...]:
+    """
+    Parse a field list into its canonical form.
+
+    Args:
+        value: Comma-separated string or list of dotted paths
+
+    Returns:
+        Sorted unique paths (empty for None or an empty list)
+
+    Raises:
+        ValueError: If a path is empty, has an empty segment or there are
+            more than MAX_FIELDS paths
+    """
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = set()
+    for field in value:
+        if not isinstance(field, str):
+            raise ValueError(f"Invalid field: {field!r}")
+        field = field.strip()
+        if not field:
+            continue
+        if not all(field.split(".")):
+            raise ValueError(f"Invalid field: {field}")
+        fields.add(field)
+    if len(fields) > MAX_FIELDS:
+        raise ValueError(f"At most {MAX_FIELDS} fields are allowed")
+    return tuple(sorted(fields))
+
+
+def projection_key(fields: Iterable[str]) -> str:
+    """Get the snapshot key of a canonical field list (see parse_fields)."""
+    return PROJECTION_PREFIX + ",".join(fields)
+
+
+def is_projection_key(key: str) -> bool:
+    """Check whether a snapshot key names a projection."""
+    return key.startswith(PROJECTION_PREFIX)
+
+
+# Path tree: segment -> subtree, or None for "keep everything below"
+_Tree = Dict[str, Any]
+
+# Marks a path that does not exist in the projected document
+_MISSING = object()
+
+
+class Projection:
+    """A compiled field projection."""
+
+    def __init__(self, fields: Tuple[str, ...]):
+        """
+        Compile a projection.
+
+        Args:
+            fields: Canonical field list (see parse_fields)
+        """
+        self.fields = fields
+        self.key = projection_key(fields)
+        self._tree: _Tree = {}
+        for field in fields:
+            node = self._tree
+            *parents, leaf = field.split(".")
+            for segment in parents:
+                child = node.get(segment, {})
+                if child is None:
+                    # A shorter path already keeps the whole subtree
+                    break
+                node = node.setdefault(segment, child)
+            else:
+                node[leaf] = None
+
+    def apply(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Project a status document.
+
+        Args:
+            document: Status document (not modified)
+
+        Returns:
+            New document with the selected paths and ``timestamp``
+        """
+        result = self._select(document, self._tree)
+        if not isinstance(result, dict):
+            result = {}
+        if "timestamp" in document:
+            result["timestamp"] = document["timestamp"]
+        return result
+
+    @classmethod
+    def _select(cls, node: Any, tree: _Tree) -> Any:
+        if isinstance(node, dict):
+            selected = {}
+            for segment, subtree in tree.items():
+                if segment in node:
+                    value = node[segment] if subtree is None else cls._select(node[segment], subtree)
+                    if value is not _MISSING:
+                        selected[segment] = value
+            return selected if selected else _MISSING
+        if isinstance(node, list):
+            if all(segment.isdigit() for segment in tree):
+                items = []
+                for segment in sorted(tree, key=int):
+                    index = int(segment)
+                    if index < len(node):
+                        subtree = tree[segment]
+                        value = node[index] if subtree is None else cls._select(node[index], subtree)
+                        if value is not _MISSING:
+                            items.append(value)
+                return items if items else _MISSING
+            items = [cls._select(item, tree) for item in node]
+            items = [item for item in items if item is not _MISSING]
+            return items if items else _MISSING
+        return _MISSING
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_projection(key: str) -> Projection:
+    """
+    Get the compiled projection of a snapshot key, compiling it once.
+
+    Args:
+        key: Key made by projection_key()
+    """
+    fields = key[len(PROJECTION_PREFIX):]
+    return Projection(tuple(fields.split(",")) if fields else ())
@@ -0,0 +1,358 @@
+"""
+On-disk sample recording module.
+
+Samples are appended to segment files as binary frames (see binary.py), so
+history survives restarts without running a second ``tegrastats --logfile``.
+A segment file is::
+
+    header   "TGRS" magic, u16 version, u16 record size, u32 layout length
+    layout   JSON: layout id, core count, temperature and rail names
+    records  fixed-width binary frames in timestamp order
+
+Records of one segment share a layout, so record i lives at a computable
+offset. A new segment starts when the rotation period has passed or the
+set of sensors changes; segments older than the retention period are
+deleted. RecordingReader memory-maps segments and locates a time range by
+binary search on the record timestamps, touching only the pages it reads.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .binary import HEADER, decode_frame, encode_sample, layout_id
+from .history import flatten_sample, match_fields
+
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"TGRS"
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sHHI")
+SEGMENT_SUFFIX = ".tgseg"
+
+# Offset of the u64 millisecond timestamp within a binary frame
+_TIMESTAMP = struct.Struct("<Q")
+_TIMESTAMP_OFFSET = HEADER.size - _TIMESTAMP.size
+
+
+def _segment_start(name: str) -> Optional[int]:
+    """Start time (ms) encoded in a segment file name, or None."""
+    if not name.endswith(SEGMENT_SUFFIX):
+        return None
+    try:
+        return int(name[:-len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+def list_segments(directory: str) -> List[Tuple[int, str]]:
+    """
+    List segment files in chronological order.
+
+    Returns:
+        List of (start time in ms, path)
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        start = _segment_start(name)
+        if start is not None:
+            segments.append((start, os.path.join(directory, name)))
+    return sorted(segments)
+
+
+class SegmentRecorder:
+    """Appends samples to rotating binary segment files."""
+
+    def __init__(self, directory: str, segment_duration: float = 3600,
+                 retention: float = 7 * 86400):
+        """
+        Initialize recorder.
+
+        Args:
+            directory: Directory for segment files (created if missing)
+            segment_duration: Seconds after which a new segment is started
+            retention: Seconds to keep segments (0 keeps them forever)
+        """
+        if segment_duration <= 0:
+            raise ValueError("segment_duration must be positive")
+        self.directory = directory
+        self.segment_duration = segment_duration
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._layout_id: Optional[int] = None
+        self._segment_end = 0.0
+        self._last_ms = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        """
+        Record a parsed sample (a parser sample listener).
+
+        Args:
+            sample: Document produced by TegrastatsParser.parse_line
+        """
+        timestamp = sample.get("timestamp", time.time())
+        with self._lock:
+            # Keep record timestamps ordered even if the wall clock steps back
+            timestamp = max(timestamp, self._last_ms / 1000)
+            layout = layout_id(sample)
+            if self._file is None or layout != self._layout_id or timestamp >= self._segment_end:
+                self._rotate(sample, timestamp)
+            self._count += 1
+            frame = encode_sample(self._count, timestamp, sample)
+            self._last_ms = int(timestamp * 1000)
+            # One unbuffered write per record; a crash loses at most the
+            # partial record, which readers ignore
+            self._file.write(frame)
+
+    def _rotate(self, sample: Dict[str, Any], timestamp: float) -> None:
+        """Start a new segment. Caller holds the lock."""
+        self._close_file()
+        start_ms = int(timestamp * 1000)
+        path = os.path.join(self.directory, f"{start_ms:013d}{SEGMENT_SUFFIX}")
+        layout = {
+            "layout_id": layout_id(sample),
+            "cores": len(sample.get("cpu", {}).get("cores", [])),
+            "temperatures": list(sample.get("temperature", {})),
+            "rails": list(sample.get("power", {})),
+        }
+        record_size = len(encode_sample(0, timestamp, sample))
+        encoded = json.dumps(layout).encode("utf-8")
+        self._file = open(path, "ab", buffering=0)
+        if self._file.tell() == 0:
+            self._file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION,
+                                                 record_size, len(encoded)) + encoded)
+        self._layout_id = layout["layout_id"]
+        self._segment_end = timestamp + self.segment_duration
+        logger.debug(f"新录制分段: {path}")
+        self._apply_retention(timestamp)
+
+    def _apply_retention(self, now: float) -> None:
+        """Delete segments that ended before the retention period. Caller holds the lock."""
+        if self.retention <= 0:
+            return
+        cutoff_ms = (now - self.retention) * 1000
+        segments = list_segments(self.directory)
+        # A segment ends where the next one starts
+        for (_, path), (next_start, _) in zip(segments, segments[1:]):
+            if next_start >= cutoff_ms:
+                break
+            try:
+                os.remove(path)
+                logger.info(f"删除过期录制分段: {path}")
+            except OSError as e:
+                logger.error(f"删除录制分段失败 {path}: {e}")
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Close the current segment."""
+        with self._lock:
+            self._close_file()
+
+
+class _Segment:
+    """A memory-mapped segment file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.map: Optional[mmap.mmap] = None
+        self.count = 0
+        with open(path, "rb") as f:
+            header = f.read(SEGMENT_HEADER.size)
+            if len(header) < SEGMENT_HEADER.size:
+                return
+            magic, version, self.record_size, layout_length = SEGMENT_HEADER.unpack(header)
+            if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+                raise ValueError(f"Not a recording segment: {path}")
+            self.layout = json.loads(f.read(layout_length).decode("utf-8"))
+            self.offset = SEGMENT_HEADER.size + layout_length
+            size = os.fstat(f.fileno()).st_size
+            # A trailing partial record (interrupted write) is ignored
+            self.count = max(0, size - self.offset) // self.record_size
+            if self.count:
+                self.map = mmap.mmap(f.fileno(), self.offset + self.count * self.record_size,
+                                     access=mmap.ACCESS_READ)
+
+    def timestamp_ms(self, index: int) -> int:
+        return _TIMESTAMP.unpack_from(
+            self.map, self.offset + index * self.record_size + _TIMESTAMP_OFFSET)[0]
+
+    def bisect(self, timestamp_ms: float, right: bool) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.timestamp_ms(mid)
+            if value < timestamp_ms or (right and value == timestamp_ms):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, indices: range) -> Iterator[Dict[str, Any]]:
+        view = memoryview(self.map)
+        try:
+            for index in indices:
+                start = self.offset + index * self.record_size
+                yield decode_frame(view[start:start + self.record_size], self.layout)
+        finally:
+            view.release()
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class RecordingReader:
+    """Time-range queries over recorded segments."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize reader.
+
+        Args:
+            directory: Directory written by a SegmentRecorder
+        """
+        self.directory = directory
+
+    def _ranges(self, since: Optional[float],
+                until: Optional[float]) -> Iterator[Tuple["_Segment", int, int]]:
+        """
+        Locate a time range in every overlapping segment.
+
+        Segments outside the range are skipped by their file names; within a
+        segment the range is found by binary search on the memory-mapped
+        records. Each segment is closed when the caller moves on.
+
+        Yields:
+            (segment, first record, end record) per non-empty range
+        """
+        since_ms = since * 1000 if since is not None else None
+        until_ms = until * 1000 if until is not None else None
+        segments = list_segments(self.directory)
+        for i, (start, path) in enumerate(segments):
+            next_start = segments[i + 1][0] if i + 1 < len(segments) else None
+            if until_ms is not None and start > until_ms:
+                break
+            if since_ms is not None and next_start is not None and next_start < since_ms:
+                continue
+            try:
+                segment = _Segment(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"跳过无法读取的录制分段 {path}: {e}")
+                continue
+            try:
+                if not segment.count:
+                    continue
+                lo = segment.bisect(since_ms, right=False) if since_ms is not None else 0
+                hi = segment.bisect(until_ms, right=True) if until_ms is not None else segment.count
+                if hi > lo:
+                    yield segment, lo, hi
+            finally:
+                segment.close()
+
+    def count(self, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Count the recorded samples in a time range without decoding them."""
+        return sum(hi - lo for _, lo, hi in self._ranges(since, until))
+
+    def samples(self, since: Optional[float] = None, until: Optional[float] = None,
+                limit: Optional[int] = None, step: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over recorded samples in a time range, oldest first.
+
+        Only the selected records are decoded.
+
+        Args:
+            since: Inclusive start as UNIX timestamp (None = oldest)
+            until: Inclusive end as UNIX timestamp (None = newest)
+            limit: Maximum number of samples
+            step: Yield every step-th sample of the range
+
+        Yields:
+            Decoded frames shaped like the status document, plus ``seq``
+        """
+        remaining = limit
+        position = 0
+        for segment, lo, hi in self._ranges(since, until):
+            # Keep the stride continuous across segment boundaries
+            first = lo + (-position) % step
+            position += hi - lo
+            indices = range(first, hi, step)
+            if remaining is not None:
+                indices = indices[:remaining]
+                remaining -= len(indices)
+            yield from segment.records(indices)
+            if remaining is not None and remaining <= 0:
+                return
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              fields: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None,
+              max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get recorded samples in a time range in the /api/history format.
+
+        Args:
+            since: Inclusive start as UNIX timestamp (None = oldest)
+            until: Inclusive end as UNIX timestamp (None = newest)
+            fields: Field names or dotted prefixes (None = all fields)
+            limit: Maximum number of samples; later samples are left out
+            max_points: Thin the range to at most this many evenly spaced
+                samples (must be positive)
+
+        Returns:
+            Dictionary with ``count``, ``timestamps``, ``fields`` mapping
+            each field name to its values (None where not recorded),
+            ``step`` (every step-th sample was taken) and ``truncated``
+            (limit left samples out)
+        """
+        step = 1
+        if max_points is not None:
+            if max_points <= 0:
+                raise ValueError("max_points must be positive")
+            step = max(1, -(-self.count(since, until) // max_points))
+        timestamps: List[float] = []
+        columns: Dict[str, List[Any]] = {}
+        truncated = False
+        records = self.samples(since, until, limit + 1 if limit is not None else None, step)
+        try:
+            for index, record in enumerate(records):
+                if index == limit:
+                    truncated = True
+                    break
+                timestamps.append(record["timestamp"])
+                for name, _, value in flatten_sample(record):
+                    column = columns.get(name)
+                    if column is None:
+                        column = columns[name] = [None] * index
+                    column.append(value)
+                for column in columns.values():
+                    if len(column) <= index:
+                        column.append(None)
+        finally:
+            # Release the record view before its segment is unmapped
+            records.close()
+        names = match_fields(columns, fields)
+        return {
+            "count": len(timestamps),
+            "timestamps": timestamps,
+            "fields": {name: columns[name] for name in names},
+            "step": step,
+            "truncated": truncated,
+        }
@@ -0,0 +1,218 @@
+"""
+History rollup module.
+
+Keeps min/max/avg/last of every history field at coarser resolutions (for
+example 10 s, 1 min and 15 min), so long time ranges can be served with a
+few hundred points instead of every raw sample.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .history import HistoryBuffer, flatten_sample
+
+
+# Partial aggregate of one field: (name, family, min, max, sum, count, last)
+Row = Tuple[str, str, float, float, float, int, float]
+
+
+def parse_tiers(spec: str) -> List[Tuple[int, int]]:
+    """
+    Parse a rollup tier specification.
+
+    Args:
+        spec: Comma-separated ``resolution:retention`` pairs in seconds,
+            e.g. ``"10:86400,60:604800"``; empty disables rollups
+
+    Returns:
+        List of (resolution, retention) tuples
+    """
+    tiers = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        resolution, _, retention = item.partition(":")
+        try:
+            tiers.append((int(resolution), int(retention)))
+        except ValueError:
+            raise ValueError(f"Invalid rollup tier '{item}', expected resolution:retention")
+    return tiers
+
+
+class RollupTier:
+    """Fixed-resolution aggregation of history fields."""
+
+    def __init__(self, resolution: int, retention: int):
+        """
+        Initialize rollup tier.
+
+        Args:
+            resolution: Bucket width in seconds
+            retention: Seconds of buckets kept
+        """
+        if resolution <= 0 or retention < resolution:
+            raise ValueError(f"Invalid rollup tier {resolution}:{retention}")
+        self.resolution = resolution
+        self.retention = retention
+        self.buffer = HistoryBuffer(capacity=retention // resolution)
+        self._bucket: Optional[float] = None
+        self._aggregates: Dict[str, List[Any]] = {}
+
+    def add(self, timestamp: float, rows: Iterable[Row]) -> Optional[Tuple[float, List[Row]]]:
+        """
+        Merge partial aggregates into the open bucket.
+
+        Each row is merged in constant time. When timestamp falls into a new
+        bucket, the open one is written to the buffer first.
+
+        Args:
+            timestamp: Timestamp of the rows (UNIX seconds)
+            rows: Partial aggregates, one per field
+
+        Returns:
+            (bucket start, rows) of the closed bucket, or None
+        """
+        bucket = timestamp - timestamp % self.resolution
+        closed = None
+        if bucket != self._bucket:
+            closed = self._close()
+            self._bucket = bucket
+
+        aggregates = self._aggregates
+        for name, family, low, high, total, count, last in rows:
+            aggregate = aggregates.get(name)
+            if aggregate is None:
+                aggregates[name] = [family, low, high, total, count, last]
+                continue
+            if low < aggregate[1]:
+                aggregate[1] = low
+            if high > aggregate[2]:
+                aggregate[2] = high
+            aggregate[3] += total
+            aggregate[4] += count
+            aggregate[5] = last
+        return closed
+
+    def _close(self) -> Optional[Tuple[float, List[Row]]]:
+        """Write the open bucket to the buffer and return it."""
+        if self._bucket is None or not self._aggregates:
+            return None
+
+        rows: List[Row] = []
+        metrics = []
+        for name, (family, low, high, total, count, last) in self._aggregates.items():
+            rows.append((name, family, low, high, total, count, last))
+            metrics.append((name + ".min", family, low))
+            metrics.append((name + ".max", family, high))
+            metrics.append((name + ".avg", "avg", total / count))
+            metrics.append((name + ".last", family, last))
+        self.buffer.write(self._bucket, metrics)
+        self._aggregates = {}
+        return self._bucket, rows
+
+    def oldest(self) -> Optional[float]:
+        """Get the start of the oldest closed bucket."""
+        return self.buffer.oldest()
+
+    def count_between(self, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Get the number of closed buckets in a time range."""
+        return self.buffer.count_between(since, until)
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Get closed buckets in a time range.
+
+        Returns:
+            Dictionary with ``count``, ``timestamps`` (bucket starts) and
+            ``fields`` mapping each field to its min/max/avg/last lists
+        """
+        result = self.buffer.query(since=since, until=until, fields=fields)
+        grouped: Dict[str, Dict[str, List[Optional[float]]]] = {}
+        for name, values in result["fields"].items():
+            field, _, stat = name.rpartition(".")
+            grouped.setdefault(field, {})[stat] = values
+        result["fields"] = grouped
+        return result
+
+
+class RollupEngine:
+    """Feeds samples through a cascade of rollup tiers."""
+
+    def __init__(self, tiers: Iterable[Tuple[int, int]]):
+        """
+        Initialize rollup engine.
+
+        Each resolution must be a multiple of the next finer one, since a
+        tier is built from the closed buckets of the tier below it.
+
+        Args:
+            tiers: (resolution, retention) pairs in seconds
+        """
+        self.tiers = [RollupTier(resolution, retention)
+                      for resolution, retention in sorted(tiers)]
+        for finer, coarser in zip(self.tiers, self.tiers[1:]):
+            if coarser.resolution % finer.resolution:
+                raise ValueError(f"Rollup resolution {coarser.resolution}s is not a "
+                                 f"multiple of {finer.resolution}s")
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        """
+        Add one parsed sample to every tier.
+
+        Only the finest tier sees every sample; coarser tiers are updated
+        once per closed bucket of the tier below.
+
+        Args:
+            sample: Document produced by TegrastatsParser.parse_line
+        """
+        if not sample or not self.tiers:
+            return
+        timestamp = sample.get("timestamp", math.nan)
+        rows = [(name, family, value, value, value, 1, value)
+                for name, family, value in flatten_sample(sample)]
+        closed: Optional[Tuple[float, List[Row]]] = (timestamp, rows)
+        for tier in self.tiers:
+            closed = tier.add(*closed)
+            if closed is None:
+                break
+
+    def select(self, history: Optional[HistoryBuffer], since: Optional[float],
+               until: Optional[float], max_points: int) -> Union[HistoryBuffer, RollupTier, None]:
+        """
+        Pick the finest source that answers a query within a point budget.
+
+        A source qualifies if its point count in the range is within
+        max_points and it reaches back as far as any source does. If none
+        qualifies, the coarsest source is used.
+
+        Args:
+            history: Raw sample history, if enabled
+            since: Range start (UNIX seconds) or None
+            until: Range end (UNIX seconds) or None
+            max_points: Maximum number of points wanted
+
+        Returns:
+            The raw history, a rollup tier, or None if neither exists
+        """
+        sources: List[Union[HistoryBuffer, RollupTier]] = []
+        if history is not None:
+            sources.append(history)
+        sources.extend(self.tiers)
+        if not sources:
+            return None
+
+        oldest = [t for t in (source.oldest() for source in sources) if t is not None]
+        start = since
+        if oldest:
+            start = min(oldest) if since is None else max(since, min(oldest))
+        for source in sources:
+            if source.count_between(since, until) > max_points:
+                continue
+            source_oldest = source.oldest()
+            resolution = getattr(source, "resolution", 0)
+            if start is not None and (source_oldest is None or source_oldest > start + resolution):
+                continue
+            return source
+        return sources[-1]
@@ -0,0 +1,253 @@
+"""
+Fleet scanner for Tegrastats API servers.
+
+Queries ``/api/health`` and ``/api/status`` of many hosts concurrently over
+one pooled HTTP session (the two requests to a host share a keep-alive
+connection where the server allows it), with a timeout per request, so
+offline boards cost one timeout in parallel instead of one each in series.
+"""
+
+import ipaddress
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_PORT = 58090
+
+# Largest CIDR block expanded by expand_targets()
+MAX_NETWORK_HOSTS = 4096
+
+# Sort keys of sort_results(); metric columns sort worst (highest) first
+SORT_KEYS = ("host", "temperature", "ram", "power", "latency")
+
+_SORT_FIELDS = {
+    "temperature": "temperature",
+    "ram": "ram_percent",
+    "power": "power_w",
+    "latency": "latency_ms",
+}
+
+
+def expand_targets(targets: Iterable[str], port: int = DEFAULT_PORT) -> List[Tuple[str, int]]:
+    """
+    Expand hosts and CIDR blocks into (host, port) pairs.
+
+    Args:
+        targets: Entries such as ``10.10.99.98``, ``orin1:6000`` or
+            ``10.10.99.0/24`` (network and broadcast addresses are skipped)
+        port: Port of entries without one
+
+    Returns:
+        Unique (host, port) pairs in the given order
+
+    Raises:
+        ValueError: If an entry is malformed or a block is too large
+    """
+    expanded: List[Tuple[str, int]] = []
+    seen = set()
+    for target in targets:
+        target = target.strip()
+        if not target:
+            continue
+        if "/" in target:
+            try:
+                network = ipaddress.ip_network(target, strict=False)
+            except ValueError:
+                raise ValueError(f"Invalid network '{target}'")
+            if network.num_addresses > MAX_NETWORK_HOSTS:
+                raise ValueError(f"Network '{target}' has more than {MAX_NETWORK_HOSTS} hosts")
+            hosts = [(str(address), port) for address in network.hosts()] or \
+                [(str(network.network_address), port)]
+        else:
+            if target.startswith("["):
+                # [IPv6]:port
+                host, _, host_port = target[1:].partition("]")
+                host_port = host_port[1:]
+            elif target.count(":") == 1:
+                host, _, host_port = target.partition(":")
+            else:
+                host, host_port = target, ""
+            try:
+                hosts = [(host, int(host_port) if host_port else port)]
+            except ValueError:
+                raise ValueError(f"Invalid port in '{target}'")
+            if not host:
+                raise ValueError(f"Invalid host '{target}'")
+        for entry in hosts:
+            if entry not in seen:
+                seen.add(entry)
+                expanded.append(entry)
+    return expanded
+
+
+def summarize_status(status: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a status document to the scan table columns.
+
+    Returns:
+        Dictionary with ``temperature`` (tj, or the hottest sensor),
+        ``ram_used`` / ``ram_total`` (MB), ``ram_percent``, ``power_w``
+        (sum of the current rail readings), ``cpu_percent`` (mean core
+        usage) and ``gpu_percent``; missing values are None
+    """
+    temperatures = {k: v for k, v in status.get("temperature", {}).items() if v is not None}
+    temperature = temperatures.get("tj", max(temperatures.values(), default=None))
+    ram = status.get("memory", {}).get("ram", {})
+    rails = [rail.get("current") for rail in status.get("power", {}).values()]
+    rails = [value for value in rails if value is not None]
+    cores = [core.get("usage") for core in status.get("cpu", {}).get("cores", [])]
+    cores = [value for value in cores if value is not None]
+    used, total = ram.get("used"), ram.get("total")
+    return {
+        "temperature": temperature,
+        "ram_used": used,
+        "ram_total": total,
+        "ram_percent": round(used / total * 100, 1) if used is not None and total else None,
+        "power_w": round(sum(rails) / 1000, 3) if rails else None,
+        "cpu_percent": round(sum(cores) / len(cores), 1) if cores else None,
+        "gpu_percent": status.get("gpu", {}).get("gr3d_freq"),
+    }
+
+
+def scan_host(session: requests.Session, host: str, port: int,
+              timeout: float = 2.0) -> Dict[str, Any]:
+    """
+    Query one host.
+
+    Args:
+        session: Shared HTTP session
+        host: Host name or address
+        port: Server port
+        timeout: Connect and read timeout of each request in seconds
+
+    Returns:
+        Dictionary with ``host``, ``port``, ``online``, ``latency_ms``
+        (health check round trip), ``clients`` (connected WebSocket
+        clients), ``error`` and the summarize_status() columns
+    """
+    base = f"http://[{host}]:{port}" if ":" in host else f"http://{host}:{port}"
+    result: Dict[str, Any] = {
+        "host": host,
+        "port": port,
+        "online": False,
+        "latency_ms": None,
+        "clients": None,
+        "error": None,
+        **summarize_status({}),
+    }
+    try:
+        start = time.perf_counter()
+        response = session.get(f"{base}/api/health", timeout=timeout)
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        response.raise_for_status()
+        result["online"] = True
+        result["clients"] = response.json().get("connected_clients")
+
+        response = session.get(f"{base}/api/status", timeout=timeout)
+        if response.status_code == 503:
+            result["error"] = "no data"
+        else:
+            response.raise_for_status()
+            result.update(summarize_status(response.json()))
+    except requests.exceptions.Timeout:
+        result["error"] = "timeout"
+    except requests.exceptions.ConnectionError:
+        result["error"] = "unreachable"
+    except (requests.exceptions.RequestException, ValueError) as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+def run_scan(targets: List[Tuple[str, int]], timeout: float = 2.0,
+             workers: int = 32) -> Dict[str, Any]:
+    """
+    Query many hosts concurrently.
+
+    Args:
+        targets: (host, port) pairs, see expand_targets()
+        timeout: Timeout of each request in seconds
+        workers: Hosts queried at the same time (and pooled connections)
+
+    Returns:
+        Dictionary with ``scanned``, ``online``, ``elapsed_ms`` and
+        ``hosts`` (scan_host() results in target order)
+    """
+    workers = max(1, min(workers, len(targets) or 1))
+    start = time.perf_counter()
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=0)
+        session.mount("http://", adapter)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+            hosts = list(pool.map(lambda target: scan_host(session, target[0], target[1], timeout),
+                                  targets))
+    return {
+        "scanned": len(hosts),
+        "online": sum(1 for host in hosts if host["online"]),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "hosts": hosts,
+    }
+
+
+def _host_key(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    try:
+        address = ipaddress.ip_address(result["host"])
+        return (0, address.version, int(address), result["port"])
+    except ValueError:
+        return (1, 0, result["host"], result["port"])
+
+
+def sort_results(hosts: List[Dict[str, Any]], key: str = "host") -> List[Dict[str, Any]]:
+    """
+    Sort scan results for display.
+
+    Args:
+        hosts: scan_host() results
+        key: One of SORT_KEYS; metric keys put the highest values first and
+            hosts without a value last
+
+    Returns:
+        Sorted copy of hosts
+    """
+    if key not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort key '{key}', expected one of {SORT_KEYS}")
+    if key == "host":
+        return sorted(hosts, key=_host_key)
+    field = _SORT_FIELDS[key]
+    ordered = sorted(hosts, key=_host_key)
+    return sorted(ordered, key=lambda result: (result[field] is None, -(result[field] or 0)))
+
+
+def format_table(hosts: List[Dict[str, Any]]) -> List[str]:
+    """
+    Render scan results as aligned text rows.
+
+    Returns:
+        Header row followed by one row per host
+    """
+    def cell(value: Optional[Any], digits: int = 1) -> str:
+        if value is None:
+            return "-"
+        return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+    rows = [("HOST", "TEMP(C)", "RAM(MB)", "RAM%", "POWER(W)", "CPU%", "GPU%", "LATENCY(ms)", "STATUS")]
+    for result in hosts:
+        host = result["host"] if result["port"] == DEFAULT_PORT else f"{result['host']}:{result['port']}"
+        ram = (f"{result['ram_used']}/{result['ram_total']}"
+               if result["ram_used"] is not None else "-")
+        rows.append((
+            host,
+            cell(result["temperature"], 2),
+            ram,
+            cell(result["ram_percent"]),
+            cell(result["power_w"], 2),
+            cell(result["cpu_percent"]),
+            cell(result["gpu_percent"]),
+            cell(result["latency_ms"]),
+            result["error"] or "ok",
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+            for row in rows]
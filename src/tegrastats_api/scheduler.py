@@ -0,0 +1,210 @@
+"""
+Broadcast scheduler module.
+
+WebSocket clients may ask for their own update interval. Clients with the
+same interval form a cohort; each cohort is due once per interval and gets
+one serialized frame per channel, shared by all its members.
+
+Updates are driven by new samples: when the parser stores a sample, every
+due cohort that has not seen it yet is sent it right away.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from .delta import DeltaEncoder
+
+
+# A cohort is due this fraction of its interval early, so sampling jitter
+# does not push a 1 s cohort on 1 s samples to every other sample.
+JITTER_TOLERANCE = 0.1
+
+
+def cohort_room(base: str, interval: float) -> str:
+    """Get the Socket.IO room of a channel (``full``, ``delta``, ``topic:x``) in a cohort."""
+    return f"{base}@{interval:g}"
+
+
+class Cohort:
+    """Clients sharing one update interval."""
+
+    def __init__(self, interval: float, keyframe_interval: int):
+        self.interval = interval
+        self.members: Set[str] = set()
+        self.next_due = 0.0
+        self.sequence: Optional[int] = None
+        self.delta = DeltaEncoder(keyframe_interval=keyframe_interval)
+
+    def room(self, base: str) -> str:
+        """Get the room of a channel in this cohort."""
+        return cohort_room(base, self.interval)
+
+
+class BroadcastScheduler:
+    """Groups clients by update interval and tells when each group is due."""
+
+    def __init__(self, default_interval: float = 1.0, min_interval: float = 0.1,
+                 max_interval: float = 3600.0, keyframe_interval: int = 30):
+        """
+        Initialize scheduler.
+
+        Args:
+            default_interval: Interval of clients that do not ask for one
+            min_interval: Smallest interval a client may request (seconds)
+            max_interval: Largest interval a client may request (seconds)
+            keyframe_interval: Delta frames between keyframes per cohort
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.keyframe_interval = keyframe_interval
+        self.default_interval = self.normalize(default_interval)
+        self._cohorts: Dict[float, Cohort] = {}
+        self._client_interval: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, interval: Optional[float]) -> float:
+        """
+        Clamp and round a requested interval.
+
+        Rounding to 10 ms keeps near-identical requests in one cohort.
+        """
+        if interval is None:
+            return self.default_interval
+        interval = min(max(float(interval), self.min_interval), self.max_interval)
+        return round(interval, 2)
+
+    def set_interval(self, sid: str, interval: Optional[float]) -> float:
+        """
+        Put a client into the cohort for an interval.
+
+        Args:
+            sid: Socket.IO session id
+            interval: Requested interval in seconds (None for the default)
+
+        Returns:
+            The interval actually granted
+        """
+        interval = self.normalize(interval)
+        with self._lock:
+            old = self._client_interval.get(sid)
+            if old == interval:
+                return interval
+            if old is not None:
+                self._leave(sid, old)
+
+            cohort = self._cohorts.get(interval)
+            if cohort is None:
+                cohort = self._cohorts[interval] = Cohort(interval, self.keyframe_interval)
+                cohort.next_due = time.monotonic()
+            cohort.members.add(sid)
+            self._client_interval[sid] = interval
+        return interval
+
+    def get_interval(self, sid: str) -> Optional[float]:
+        """Get a client's interval, or None for unknown clients."""
+        with self._lock:
+            return self._client_interval.get(sid)
+
+    def get_cohort(self, sid: str) -> Optional[Cohort]:
+        """Get the cohort a client belongs to."""
+        with self._lock:
+            interval = self._client_interval.get(sid)
+            return self._cohorts.get(interval) if interval is not None else None
+
+    def remove(self, sid: str) -> None:
+        """Forget a disconnected client."""
+        with self._lock:
+            interval = self._client_interval.pop(sid, None)
+            if interval is not None:
+                self._leave(sid, interval)
+
+    def cohorts(self) -> List[Cohort]:
+        """Get all cohorts with members."""
+        with self._lock:
+            return list(self._cohorts.values())
+
+    def members(self, cohort: Cohort) -> Set[str]:
+        """Get a copy of a cohort's members."""
+        with self._lock:
+            return set(cohort.members)
+
+    def due(self, now: Optional[float] = None, sequence: Optional[int] = None) -> List[Cohort]:
+        """
+        Get the cohorts due for an update and schedule their next one.
+
+        Args:
+            now: Monotonic time (None for now)
+            sequence: Sequence number of the sample to send; cohorts that
+                already got this sample are not due
+
+        Returns:
+            Due cohorts; each is due again one interval later
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for cohort in self._cohorts.values():
+                if sequence is not None and cohort.sequence == sequence:
+                    continue
+                if now >= cohort.next_due - cohort.interval * JITTER_TOLERANCE:
+                    due.append(cohort)
+                    cohort.next_due = now + cohort.interval
+                    cohort.sequence = sequence
+        return due
+
+    def _leave(self, sid: str, interval: float) -> None:
+        """Remove a client from a cohort. Caller holds the lock."""
+        cohort = self._cohorts.get(interval)
+        if cohort is not None:
+            cohort.members.discard(sid)
+            if not cohort.members:
+                del self._cohorts[interval]
+
+
+class LatencyStats:
+    """Capture-to-emit latency of recent broadcasts."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize statistics.
+
+        Args:
+            window: Number of recent measurements kept for percentiles
+        """
+        self.count = 0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record one latency measurement."""
+        with self._lock:
+            self.count += 1
+            self._samples.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get latency statistics in milliseconds.
+
+        Returns:
+            Dictionary with ``count`` and last/avg/p50/p95/max of the window
+        """
+        with self._lock:
+            samples = list(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+        ordered = sorted(samples)
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "last_ms": round(samples[-1] * 1000, 3),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
@@ -3,21 +3,63 @@ Main server module for Tegrastats API.
 """
 
 import logging
+import math
 import threading
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
 
-from flask import Flask, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, g, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
+from werkzeug.wsgi import ClosingIterator
 
+from .backpressure import BackpressureController
 from .config import Config
+from .history import HistoryBuffer
+from .hub import FleetHub, HubSource, fleet_section
+from .idle import IdleMonitor
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
 from .parser import TegrastatsParser
+from .perf import PerfMonitor
+from .projection import is_projection_key, parse_fields, projection_key
+from .recorder import RecordingReader, SegmentRecorder
+from .rollup import RollupEngine, parse_tiers
+from .scheduler import BroadcastScheduler, Cohort, LatencyStats, cohort_room
+from .snapshot import (BINARY_KEY, ENCODINGS, METRICS_KEY, SCHEMA_KEY, SECTIONS,
+                       STREAM_FORMATS, Snapshot, SnapshotCache, compress)
+from .sources import source_from_config
+from .subscriptions import TopicRegistry, is_valid_topic, resolve_path, topic_room
+from .udp import UdpPublisher, parse_targets
 
 
 logger = logging.getLogger(__name__)
 
+# Supported Config.async_mode values. Flask-SocketIO has no asyncio mode:
+# serving the routes and events from one asyncio loop would mean porting
+# them to python-socketio's AsyncServer and an ASGI framework. eventlet is
+# the single-loop mode Flask-SocketIO supports, but it is deprecated
+# upstream (bugfix-only), so a migration will be needed eventually.
+ASYNC_MODES = ('threading', 'eventlet')
+
+# Socket.IO channels for full-document, delta-encoded, binary and compressed
+# full-document update clients. Clients with a field projection get their own
+# channel named by the projection key. Each channel has one room per
+# update-rate cohort, see cohort_room().
+FULL_ROOM = 'full'
+DELTA_ROOM = 'delta'
+BINARY_ROOM = 'binary'
+COMPRESSED_ROOM = 'deflate'
+
+# Content types of the /api/stream framings
+STREAM_MIMETYPES = {'sse': 'text/event-stream', 'ndjson': 'application/x-ndjson'}
+
+# Seconds between /api/stream heartbeats while no sample arrives
+STREAM_KEEPALIVE = 15.0
+
+# Heartbeat of each /api/stream framing
+STREAM_HEARTBEATS = {'sse': b": keepalive\n\n", 'ndjson': b"\n"}
+
 
 class ConnectionLimiter:
     """Connection limiter for WebSocket connections."""
@@ -55,14 +97,22 @@ class ConnectionLimiter:
 class TegrastatsServer:
     """Main Tegrastats API server."""
     
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None,
+                 parser: Optional[TegrastatsParser] = None):
         """
         Initialize server.
         
         Args:
             config: Server configuration
+            parser: Sample source (defaults to a TegrastatsParser running
+                the tegrastats binary)
         """
         self.config = config or Config()
+        if self.config.async_mode not in ASYNC_MODES:
+            raise ValueError(f"Unsupported async_mode '{self.config.async_mode}', "
+                             f"expected one of {ASYNC_MODES}")
+        if self.config.async_mode == 'eventlet':
+            logger.warning("eventlet 已被上游弃用 (仅修复缺陷), 该服务模式今后可能需要迁移")
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'tegrastats-api-secret'
         
@@ -73,15 +123,94 @@ class TegrastatsServer:
         self.socketio = SocketIO(
             self.app,
             cors_allowed_origins=self.config.cors_origins,
-            async_mode='threading',
+            async_mode=self.config.async_mode,
             allow_unsafe_werkzeug=self.config.allow_unsafe_werkzeug,
+            http_compression=self.config.compression,
+            compression_threshold=self.config.compression_threshold,
             logger=False,
             engineio_logger=False
         )
         
         # Initialize components
-        self.parser = TegrastatsParser(interval=self.config.tegrastats_interval)
+        self.parser = parser or TegrastatsParser(
+            interval=self.config.tegrastats_interval,
+            source=source_from_config(self.config)
+        )
+        # Upstream nodes in hub mode
+        source = getattr(self.parser, 'source', None)
+        self.hub: Optional[FleetHub] = source.hub if isinstance(source, HubSource) else None
         self.limiter = ConnectionLimiter(max_connections=self.config.max_connections)
+        self.perf = PerfMonitor(enabled=self.config.perf_enabled)
+        self.parser.perf = self.perf
+        self.snapshots = SnapshotCache(
+            self.parser,
+            perf=self.perf,
+            compression_threshold=self.config.compression_threshold,
+            compression_level=self.config.compression_level,
+            retain=self.config.stream_replay_size,
+            sections=fleet_section if self.hub else None
+        )
+        self.scheduler = BroadcastScheduler(
+            default_interval=self.config.update_interval,
+            min_interval=self.config.min_update_interval,
+            keyframe_interval=self.config.delta_keyframe_interval
+        )
+        self.latency = LatencyStats()
+        self.backpressure = BackpressureController(
+            self._client_backlog,
+            queue_size=self.config.client_queue_size,
+            policy=self.config.overflow_policy,
+            max_missed=self.config.max_missed_frames
+        )
+        self._delta_clients: Set[str] = set()
+        self._binary_clients: Set[str] = set()
+        self._compressed_clients: Set[str] = set()
+        self._client_fields: Dict[str, str] = {}
+        self.topics = TopicRegistry()
+        self._clients_lock = threading.Lock()
+        
+        # Sample history for /api/history
+        self.history: Optional[HistoryBuffer] = None
+        if self.config.history_size > 0:
+            self.history = HistoryBuffer(self.config.history_size)
+            self.parser.add_sample_listener(self.history.append)
+        self.rollups = RollupEngine(parse_tiers(self.config.rollup_tiers))
+        if self.rollups.tiers:
+            self.parser.add_sample_listener(self.rollups.append)
+        
+        # On-disk recording for /api/recordings
+        self.recorder: Optional[SegmentRecorder] = None
+        self.recordings: Optional[RecordingReader] = None
+        if self.config.record_dir:
+            self.recorder = SegmentRecorder(
+                self.config.record_dir,
+                segment_duration=self.config.record_segment_duration,
+                retention=self.config.record_retention
+            )
+            self.recordings = RecordingReader(self.config.record_dir)
+            self.parser.add_sample_listener(self.recorder.append)
+        
+        # UDP datagrams for display devices, one per sample
+        self.udp: Optional[UdpPublisher] = None
+        if self.config.udp_targets:
+            self.udp = UdpPublisher(
+                parse_targets(self.config.udp_targets),
+                node_id=self.config.udp_node_id,
+                ttl=self.config.udp_ttl,
+                interface=self.config.udp_interface
+            )
+            self.parser.add_sample_listener(lambda sample: self.udp.publish(self.snapshots.get()))
+        
+        # Demand-driven sampling
+        self.idle: Optional[IdleMonitor] = None
+        if self.config.idle_timeout > 0:
+            self.idle = IdleMonitor(
+                self.parser,
+                timeout=self.config.idle_timeout,
+                idle_interval=self.config.idle_interval,
+                active_interval=self.config.tegrastats_interval,
+                clients=self.limiter.get_count
+            )
         
         # Setup routes and events
         self._setup_routes()
@@ -96,6 +225,43 @@ class TegrastatsServer:
     def _setup_routes(self) -> None:
         """Setup Flask routes."""
         
+        @self.app.before_request
+        def record_activity():
+            """Count REST requests (except health checks) as demand for samples."""
+            g.perf_start = self.perf.start()
+            if self.idle and request.path != '/api/health':
+                self.idle.touch()
+        
+        @self.app.after_request
+        def record_request_time(response):
+            """Record per-route request latency while instrumentation is on."""
+            rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+            self.perf.record(f"request.{rule}", g.get('perf_start'))
+            return response
+        
+        @self.app.after_request
+        def compress_response(response):
+            """
+            Compress other large responses (history, recordings, ...).
+            
+            These bodies are built per request, so they are compressed per
+            request too. Snapshot documents negotiate their own cached
+            encoding in _snapshot_response and are left alone here.
+            """
+            if (not self.config.compression or response.status_code != 200
+                    or response.direct_passthrough or response.is_streamed
+                    or 'Content-Encoding' in response.headers
+                    or 'accept-encoding' in response.vary):
+                return response
+            response.vary.add('Accept-Encoding')
+            body = response.get_data()
+            encoding = self._accepted_encoding()
+            if encoding is None or len(body) < self.config.compression_threshold:
+                return response
+            response.set_data(compress(body, encoding, self.config.compression_level))
+            response.headers['Content-Encoding'] = encoding
+            return response
+        
         @self.app.route('/api/health', methods=['GET'])
         def health():
             """Health check endpoint."""
@@ -103,74 +269,387 @@ class TegrastatsServer:
                 'status': 'healthy',
                 'service': 'tegrastats-api',
                 'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'connected_clients': self.limiter.get_count()
+                'connected_clients': self.limiter.get_count(),
+                'slow_clients': len(self.backpressure.slow_clients()),
+                'sampling': 'idle' if self.idle and self.idle.idle else 'active',
+                'broadcast_latency': self.latency.summary(),
+                **({'hub': self._hub_summary()} if self.hub else {}),
+                **({'udp': self.udp.state()} if self.udp else {})
             })
         
         @self.app.route('/api/status', methods=['GET'])
         def status():
             """Get complete system status."""
-            data = self.parser.get_current_status()
-            if not data:
-                return jsonify({'error': 'No data available'}), 503
-            
-            # Add timestamp in ISO format
-            data['timestamp'] = datetime.utcnow().isoformat() + 'Z'
-            return jsonify(data)
+            return self._snapshot_response('status', 'No data available')
         
         @self.app.route('/api/cpu', methods=['GET'])
         def cpu():
             """Get CPU information."""
-            data = self.parser.get_current_status()
-            if not data or 'cpu' not in data:
-                return jsonify({'error': 'CPU data not available'}), 503
-            
-            return jsonify({
-                'cpu': data['cpu'],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            })
+            return self._snapshot_response('cpu', 'CPU data not available')
         
         @self.app.route('/api/memory', methods=['GET'])
         def memory():
             """Get memory information."""
-            data = self.parser.get_current_status()
-            if not data or 'memory' not in data:
-                return jsonify({'error': 'Memory data not available'}), 503
-            
-            return jsonify({
-                'memory': data['memory'],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            })
+            return self._snapshot_response('memory', 'Memory data not available')
         
         @self.app.route('/api/temperature', methods=['GET'])
         def temperature():
             """Get temperature information."""
-            data = self.parser.get_current_status()
-            if not data or 'temperature' not in data:
-                return jsonify({'error': 'Temperature data not available'}), 503
-            
-            return jsonify({
-                'temperature': data['temperature'],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            })
+            return self._snapshot_response('temperature', 'Temperature data not available')
         
         @self.app.route('/api/power', methods=['GET'])
         def power():
             """Get power information."""
-            data = self.parser.get_current_status()
-            if not data or 'power' not in data:
-                return jsonify({'error': 'Power data not available'}), 503
+            return self._snapshot_response('power', 'Power data not available')
+        
+        @self.app.route('/api/stream', methods=['GET'])
+        def stream():
+            """
+            Stream every new sample as Server-Sent Events or NDJSON.
+            
+            The framing is chosen with ``format=sse|ndjson`` or the Accept
+            header. ``fields`` projects the documents, ``interval`` (seconds)
+            thins the stream and Last-Event-ID (or ``last_event_id``) resumes
+            after a known event.
+            
+            After STREAM_KEEPALIVE seconds without a sample, a heartbeat is
+            written (an SSE comment, or an empty line that NDJSON readers
+            skip). The write is what detects a gone client and releases its
+            connection slot while the source is stalled.
+            """
+            framing = request.args.get('format')
+            if framing is None:
+                best = request.accept_mimetypes.best_match(
+                    [STREAM_MIMETYPES['sse'], STREAM_MIMETYPES['ndjson']])
+                framing = 'ndjson' if best == STREAM_MIMETYPES['ndjson'] else 'sse'
+            if framing not in STREAM_FORMATS:
+                return jsonify({'error': f"Unsupported format '{framing}', "
+                                         f"expected one of {STREAM_FORMATS}"}), 400
+            try:
+                key = self._projection_key(request.args.get('fields')) or 'status'
+                interval = self._interval_arg(request.args.get('interval'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if interval is not None:
+                interval = max(interval, self.config.min_update_interval)
+            last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+            
+            if not self.limiter.add_connection():
+                return jsonify({'error': 'Too many connections'}), 503
+            if self.idle:
+                self.idle.touch()
+            client_ip = request.environ.get('REMOTE_ADDR', 'unknown')
+            logger.info(f"流式客户端连接: {client_ip}, 格式: {framing}, "
+                        f"当前连接数: {self.limiter.get_count()}")
+            
+            def closed():
+                self.limiter.remove_connection()
+                logger.info(f"流式客户端断开: {client_ip}, 当前连接数: {self.limiter.get_count()}")
+            
+            events = self._stream_events(key, framing, interval, last_event_id)
+            response = Response(ClosingIterator(events, [closed]),
+                                mimetype=STREAM_MIMETYPES[framing])
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+        
+        @self.app.route('/api/status.bin', methods=['GET'])
+        def status_binary():
+            """Get complete system status as a compact binary frame."""
+            return self._snapshot_response(BINARY_KEY, 'No data available',
+                                           mimetype='application/octet-stream')
+        
+        @self.app.route('/api/status.schema', methods=['GET'])
+        def status_schema():
+            """Get the layout descriptor of the current binary frame."""
+            return self._snapshot_response(SCHEMA_KEY, 'No data available')
+        
+        @self.app.route('/metrics', methods=['GET'])
+        def metrics():
+            """Get the current sample in the Prometheus text format."""
+            return self._snapshot_response(METRICS_KEY, 'No data available',
+                                           mimetype=METRICS_CONTENT_TYPE)
+        
+        @self.app.route('/api/history', methods=['GET'])
+        def history():
+            """Get recorded samples between since and until (UNIX seconds)."""
+            if self.history is None and not self.rollups.tiers:
+                return jsonify({'error': 'History disabled'}), 404
+            
+            try:
+                since = self._float_arg('since')
+                until = self._float_arg('until')
+                max_points = self._int_arg('max_points')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if max_points == 0:
+                return jsonify({'error': "Invalid 'max_points' parameter: 0"}), 400
+            
+            # Raw samples unless a point budget asks for a rollup tier
+            if max_points is not None:
+                source = self.rollups.select(self.history, since, until, max_points)
+            else:
+                # An empty buffer is falsy (it has a length); test for None
+                source = self.history if self.history is not None else self.rollups.tiers[0]
+            
+            fields = request.args.get('fields')
+            result = source.query(
+                since=since,
+                until=until,
+                fields=fields.split(',') if fields else None
+            )
+            result['resolution'] = getattr(source, 'resolution', 0)
+            return jsonify(result)
+    
+        @self.app.route('/api/recordings', methods=['GET'])
+        def recordings():
+            """
+            Get samples recorded on disk between since and until (UNIX seconds).
+            
+            Responses hold at most record_query_limit samples: a larger or
+            missing ``limit`` is clamped and ``truncated`` tells whether
+            samples were left out. ``max_points`` thins the whole range to
+            evenly spaced samples instead.
+            """
+            if self.recordings is None:
+                return jsonify({'error': 'Recording disabled'}), 404
+            
+            try:
+                since = self._float_arg('since')
+                until = self._float_arg('until')
+                limit = self._int_arg('limit')
+                max_points = self._int_arg('max_points')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if max_points == 0:
+                return jsonify({'error': "Invalid 'max_points' parameter: 0"}), 400
             
+            cap = self.config.record_query_limit
+            limit = cap if limit is None else min(limit, cap)
+            if max_points is not None:
+                max_points = min(max_points, cap)
+            fields = request.args.get('fields')
+            return jsonify(self.recordings.query(
+                since=since,
+                until=until,
+                fields=fields.split(',') if fields else None,
+                limit=limit,
+                max_points=max_points
+            ))
+    
+        @self.app.route('/api/clients', methods=['GET'])
+        def clients():
+            """Get connected WebSocket clients with their delivery lag."""
+            result = []
+            for cohort in self.scheduler.cohorts():
+                for sid in sorted(self.scheduler.members(cohort)):
+                    result.append({
+                        'sid': sid,
+                        'interval': cohort.interval,
+                        'channels': self._client_channels(sid),
+                        **self.backpressure.lag(sid)
+                    })
             return jsonify({
-                'power': data['power'],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
+                'count': len(result),
+                'overflow_policy': self.backpressure.policy,
+                'queue_size': self.backpressure.queue_size,
+                'clients': result
             })
+        
+        @self.app.route('/api/nodes', methods=['GET'])
+        def nodes():
+            """Get the upstream nodes of a hub with their link state."""
+            if self.hub is None:
+                return jsonify({'error': 'Hub mode disabled'}), 404
+            return jsonify({**self._hub_summary(), 'nodes': self.hub.nodes()})
+        
+        @self.app.route('/api/debug/perf', methods=['GET', 'POST'])
+        def debug_perf():
+            """
+            Get self-instrumentation data.
+            
+            POST a JSON body with ``enabled`` (bool) to switch measuring on
+            or off and/or ``reset: true`` to clear the measurements.
+            """
+            if request.method == 'POST':
+                body = request.get_json(silent=True)
+                if not isinstance(body, dict):
+                    return jsonify({'error': 'Expected a JSON object'}), 400
+                enabled = body.get('enabled')
+                if enabled is not None and not isinstance(enabled, bool):
+                    return jsonify({'error': "'enabled' must be a boolean"}), 400
+                if body.get('reset'):
+                    self.perf.reset()
+                if enabled is not None:
+                    self.perf.set_enabled(enabled)
+                    logger.info(f"性能统计已{'开启' if enabled else '关闭'}")
+            return jsonify(self.perf.summary())
+    
+    def _hub_summary(self) -> Dict[str, int]:
+        """Count the hub's upstream nodes and those online."""
+        states = self.hub.nodes() if self.hub else []
+        return {'size': len(states), 'online': sum(1 for s in states if s['online'])}
+    
+    @staticmethod
+    def _float_arg(name: str) -> Optional[float]:
+        """Read an optional finite float query argument."""
+        value = request.args.get(name)
+        if value is None or value == '':
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' parameter: {value}")
+        if not math.isfinite(number):
+            raise ValueError(f"Invalid '{name}' parameter: {value}")
+        return number
+    
+    @staticmethod
+    def _int_arg(name: str) -> Optional[int]:
+        """Read an optional non-negative integer query argument."""
+        value = request.args.get(name)
+        if value is None or value == '':
+            return None
+        if not (value.isascii() and value.isdigit()):
+            raise ValueError(f"Invalid '{name}' parameter: {value}, "
+                             f"expected a non-negative integer")
+        return int(value)
+    
+    def _snapshot_response(self, key: str, error: str,
+                           mimetype: str = 'application/json') -> Any:
+        """
+        Serve a cached document of the current sample.
+        
+        A ``fields`` query argument projects ``status`` or a section to
+        dotted paths (relative to the section). The body is encoded once per
+        sample and projection, and compressed at most once per sample and
+        content coding when the client accepts gzip or deflate.
+        The response carries a sequence-based ETag (suffixed with the
+        content coding) and a matching If-None-Match gets 304.
+        
+        Args:
+            key: Snapshot document key (``status``, a section name,
+                BINARY_KEY, SCHEMA_KEY or METRICS_KEY)
+            error: Error message returned when no data is available
+            mimetype: Response content type
+        """
+        fields = request.args.get('fields')
+        if fields and self.hub and key in SECTIONS:
+            # Hub section documents are built from the nodes, not projected
+            return jsonify({'error': "'fields' is not supported on section routes in hub "
+                                     "mode, use /api/status?fields=nodes.<name>.status..."}), 400
+        if fields is not None and (key == 'status' or key in SECTIONS):
+            try:
+                key = self._projection_key(fields, None if key == 'status' else key) or key
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        snapshot = self.snapshots.get()
+        body = snapshot.encoded(key) if snapshot else None
+        if body is None:
+            return jsonify({'error': error}), 503
+        
+        encoding = self._accepted_encoding()
+        compressed = snapshot.compressed(key, encoding) if encoding else None
+        etag = snapshot.etag if compressed is None else f"{snapshot.etag}-{encoding}"
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(compressed or body, mimetype=mimetype)
+            if compressed is not None:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        if self.config.compression:
+            response.vary.add('Accept-Encoding')
+        return response
+    
+    def _stream_events(self, key: str, framing: str, interval: Optional[float],
+                       last_event_id: Optional[str]) -> Iterator[bytes]:
+        """
+        Generate /api/stream frames.
+        
+        Frames come from Snapshot.stream_frame(), so each sample is framed
+        once per document and framing for all stream clients. A
+        Last-Event-ID of this process first replays the retained samples
+        after it; any other id starts with the current sample.
+        """
+        sequence = 0
+        if last_event_id:
+            epoch, _, last = last_event_id.strip().rpartition('-')
+            if epoch == self.snapshots.epoch and last.isdigit():
+                sequence = int(last)
+        
+        if framing == 'sse':
+            yield b"retry: 2000\n\n"
+        for snapshot in self.snapshots.since(sequence) if sequence else []:
+            frame = snapshot.stream_frame(key, framing)
+            if frame is not None:
+                yield frame
+            sequence = snapshot.sequence
+        
+        last_write = time.monotonic()
+        while True:
+            latest = self._wait_for_sample(sequence)
+            if latest == sequence:
+                if time.monotonic() - last_write >= STREAM_KEEPALIVE:
+                    last_write = time.monotonic()
+                    yield STREAM_HEARTBEATS[framing]
+                continue
+            snapshot = self.snapshots.get()
+            if snapshot is None:
+                continue
+            sequence = snapshot.sequence
+            frame = snapshot.stream_frame(key, framing)
+            if frame is None:
+                continue
+            if self.idle:
+                self.idle.touch()
+            last_write = time.monotonic()
+            yield frame
+            if interval:
+                # Later samples wait; the newest one is sent when it is due
+                self.socketio.sleep(max(0.0, interval - (time.monotonic() - last_write)))
+    
+    @staticmethod
+    def _projection_key(fields: Any, section: Optional[str] = None) -> Optional[str]:
+        """
+        Get the snapshot key of a field projection.
+        
+        Args:
+            fields: Comma-separated string or list of dotted paths
+            section: Section the paths are relative to
+        
+        Returns:
+            Projection key, or None if no fields were given
+        
+        Raises:
+            ValueError: If the field list is invalid
+        """
+        parsed = parse_fields(fields)
+        if not parsed:
+            return None
+        if section:
+            parsed = parse_fields([f"{section}.{field}" for field in parsed])
+        return projection_key(parsed)
+    
+    def _accepted_encoding(self) -> Optional[str]:
+        """Pick the preferred content coding the client accepts, if any."""
+        if not self.config.compression:
+            return None
+        return request.accept_encodings.best_match(ENCODINGS)
     
     def _setup_socketio_events(self) -> None:
         """Setup SocketIO event handlers."""
         
         @self.socketio.on('connect')
         def handle_connect():
-            """Handle client connection."""
+            """
+            Handle client connection.
+            
+            The client may ask for its update interval in seconds with the
+            ``interval`` query parameter, e.g. ``/socket.io/?interval=5``.
+            """
             client_ip = request.environ.get('REMOTE_ADDR', 'unknown')
             
             if not self.limiter.can_accept():
@@ -178,8 +657,26 @@ class TegrastatsServer:
                 return False
             
             if self.limiter.add_connection():
+                if self.idle:
+                    self.idle.touch()
+                try:
+                    interval = self._interval_arg(request.args.get('interval'))
+                except ValueError as e:
+                    logger.warning(f"忽略无效的更新间隔 {client_ip}: {e}")
+                    interval = None
+                try:
+                    fields = self._projection_key(request.args.get('fields'))
+                except ValueError as e:
+                    logger.warning(f"忽略无效的字段投影 {client_ip}: {e}")
+                    fields = None
+                if fields:
+                    with self._clients_lock:
+                        self._client_fields[request.sid] = fields
+                interval = self.scheduler.set_interval(request.sid, interval)
+                for channel in self._client_channels(request.sid):
+                    join_room(cohort_room(channel, interval))
                 logger.info(f"WebSocket客户端连接: {client_ip}, SID: {request.sid}, "
-                           f"当前连接数: {self.limiter.get_count()}")
+                           f"更新间隔: {interval}秒, 当前连接数: {self.limiter.get_count()}")
                 return True
             else:
                 logger.warning(f"无法添加连接: {client_ip}")
@@ -190,43 +687,489 @@ class TegrastatsServer:
             """Handle client disconnection."""
             client_ip = request.environ.get('REMOTE_ADDR', 'unknown')
             self.limiter.remove_connection()
+            with self._clients_lock:
+                self._delta_clients.discard(request.sid)
+                self._binary_clients.discard(request.sid)
+                self._compressed_clients.discard(request.sid)
+                self._client_fields.pop(request.sid, None)
+            self.topics.remove_client(request.sid)
+            self.scheduler.remove(request.sid)
+            self.backpressure.remove(request.sid)
             logger.info(f"WebSocket客户端断开: {client_ip}, SID: {request.sid}, "
                        f"当前连接数: {self.limiter.get_count()}")
+        
+        @self.socketio.on('set_interval')
+        def handle_set_interval(message=None):
+            """
+            Change the client's update interval: {"interval": 5}.
+            
+            The granted interval (clamped to the allowed range) is returned.
+            """
+            try:
+                interval = self._interval_arg(message)
+            except ValueError as e:
+                return {'error': str(e)}
+            return {'interval': self._set_client_interval(request.sid, interval)}
+        
+        @self.socketio.on('delta_subscribe')
+        def handle_delta_subscribe(message=None):
+            """Switch the client to delta-encoded updates, optionally with an interval."""
+            try:
+                interval = self._interval_arg(message)
+            except ValueError as e:
+                return {'error': str(e)}
+            if interval is not None:
+                self._set_client_interval(request.sid, interval)
+            
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._delta_clients.add(request.sid)
+            self._sync_rooms(request.sid, before)
+            self._send_keyframe(request.sid)
+            return {'interval': self.scheduler.get_interval(request.sid)}
+        
+        @self.socketio.on('delta_unsubscribe')
+        def handle_delta_unsubscribe():
+            """Switch the client back to full updates."""
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._delta_clients.discard(request.sid)
+            self._sync_rooms(request.sid, before)
+        
+        @self.socketio.on('binary_subscribe')
+        def handle_binary_subscribe(message=None):
+            """
+            Switch the client to binary frames, optionally with an interval.
+            
+            The client gets 'tegrastats_binary' messages carrying the frame
+            served at /api/status.bin instead of full JSON documents.
+            """
+            try:
+                interval = self._interval_arg(message)
+            except ValueError as e:
+                return {'error': str(e)}
+            if interval is not None:
+                self._set_client_interval(request.sid, interval)
+            
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._binary_clients.add(request.sid)
+            self._sync_rooms(request.sid, before)
+            return {'interval': self.scheduler.get_interval(request.sid)}
+        
+        @self.socketio.on('binary_unsubscribe')
+        def handle_binary_unsubscribe():
+            """Stop sending binary frames to the client."""
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._binary_clients.discard(request.sid)
+            self._sync_rooms(request.sid, before)
+        
+        @self.socketio.on('compressed_subscribe')
+        def handle_compressed_subscribe(message=None):
+            """
+            Switch the client to compressed full updates, optionally with an interval.
+            
+            'tegrastats_update' then carries the zlib-compressed (deflate)
+            JSON document as bytes, compressed once per sample for all such
+            clients. Documents below the compression threshold are still
+            sent as plain JSON.
+            """
+            if not self.config.compression:
+                return {'error': 'Compression is disabled'}
+            try:
+                interval = self._interval_arg(message)
+            except ValueError as e:
+                return {'error': str(e)}
+            if interval is not None:
+                self._set_client_interval(request.sid, interval)
+            
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._compressed_clients.add(request.sid)
+            self._sync_rooms(request.sid, before)
+            return {'interval': self.scheduler.get_interval(request.sid), 'encoding': 'deflate'}
+        
+        @self.socketio.on('compressed_unsubscribe')
+        def handle_compressed_unsubscribe():
+            """Switch the client back to uncompressed full updates."""
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                self._compressed_clients.discard(request.sid)
+            self._sync_rooms(request.sid, before)
+        
+        @self.socketio.on('set_fields')
+        def handle_set_fields(message=None):
+            """
+            Project full updates: {"fields": ["temperature.tj", "cpu.cores.usage"]}.
+            
+            'tegrastats_update' then carries only the given dotted paths (and
+            the timestamp), projected once per sample for all clients with the
+            same fields. Empty fields restore full documents. An optional
+            "interval" key changes the client's update interval.
+            """
+            raw = message.get('fields') if isinstance(message, dict) else message
+            try:
+                key = self._projection_key(raw)
+                interval = self._interval_arg(message) if isinstance(message, dict) else None
+            except ValueError as e:
+                return {'error': str(e)}
+            if interval is not None:
+                self._set_client_interval(request.sid, interval)
+            
+            before = self._client_channels(request.sid)
+            with self._clients_lock:
+                if key:
+                    self._client_fields[request.sid] = key
+                else:
+                    self._client_fields.pop(request.sid, None)
+            self._sync_rooms(request.sid, before)
+            return {'fields': list(parse_fields(raw)),
+                    'interval': self.scheduler.get_interval(request.sid)}
+        
+        @self.socketio.on('subscribe')
+        def handle_subscribe(message=None):
+            """
+            Subscribe to topics: {"topics": ["temperature.tj", "power"]}.
+            
+            The client stops receiving full 'tegrastats_update' documents and
+            gets one 'tegrastats_topic' message per topic and update instead.
+            An optional "interval" key changes the client's update interval.
+            """
+            topics = self._topics_arg(message)
+            invalid = [t for t in topics if not is_valid_topic(t)]
+            if invalid:
+                return {'error': f"Invalid topics: {invalid}"}
+            try:
+                interval = self._interval_arg(message)
+            except ValueError as e:
+                return {'error': str(e)}
+            if interval is not None:
+                self._set_client_interval(request.sid, interval)
+            
+            before = self._client_channels(request.sid)
+            self.topics.subscribe(request.sid, topics)
+            self._sync_rooms(request.sid, before)
+            ack = {'topics': sorted(self.topics.client_topics(request.sid))}
+            if interval is not None:
+                ack['interval'] = self.scheduler.get_interval(request.sid)
+            return ack
+        
+        @self.socketio.on('unsubscribe')
+        def handle_unsubscribe(message=None):
+            """
+            Unsubscribe from topics (all topics if none are given).
+            
+            A client left without topics receives full updates again.
+            """
+            topics = self._topics_arg(message) or list(self.topics.client_topics(request.sid))
+            before = self._client_channels(request.sid)
+            self.topics.unsubscribe(request.sid, topics)
+            self._sync_rooms(request.sid, before)
+            return {'topics': sorted(self.topics.client_topics(request.sid))}
+        
+        @self.socketio.on('delta_resync')
+        def handle_delta_resync():
+            """Send a keyframe to a client whose delta chain broke."""
+            self._send_keyframe(request.sid)
+    
+    @staticmethod
+    def _topics_arg(message: Any) -> List[str]:
+        """Extract the topic list from a subscribe/unsubscribe message."""
+        if isinstance(message, dict):
+            message = message.get('topics')
+        if isinstance(message, str):
+            return [message]
+        if isinstance(message, list):
+            return message
+        return []
+    
+    @staticmethod
+    def _interval_arg(message: Any) -> Optional[float]:
+        """
+        Extract a requested update interval in seconds.
+        
+        Accepts a number, a numeric string or a dict with an "interval" key.
+        
+        Raises:
+            ValueError: If the interval is not a positive number
+        """
+        if isinstance(message, dict):
+            message = message.get('interval')
+        if message is None or message == '':
+            return None
+        try:
+            interval = float(message)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid interval: {message}")
+        if not interval > 0:
+            raise ValueError(f"Invalid interval: {message}")
+        return interval
+    
+    def _client_channels(self, sid: str) -> List[str]:
+        """
+        Get the channels a client receives updates on.
+        
+        Delta, binary and topic clients do not get full documents;
+        projection clients get their projection and compressed clients get
+        full documents on the compressed channel.
+        """
+        channels = [topic_room(topic) for topic in sorted(self.topics.client_topics(sid))]
+        with self._clients_lock:
+            if sid in self._delta_clients:
+                channels.append(DELTA_ROOM)
+            if sid in self._binary_clients:
+                channels.append(BINARY_ROOM)
+            compressed = sid in self._compressed_clients
+            fields = self._client_fields.get(sid)
+        if channels:
+            return channels
+        if fields:
+            return [fields]
+        return [COMPRESSED_ROOM if compressed else FULL_ROOM]
+    
+    def _sync_rooms(self, sid: str, before: List[str]) -> None:
+        """Move a client between rooms after its channels changed."""
+        interval = self.scheduler.get_interval(sid)
+        after = self._client_channels(sid)
+        for channel in before:
+            if channel not in after:
+                leave_room(cohort_room(channel, interval), sid=sid)
+        for channel in after:
+            if channel not in before:
+                join_room(cohort_room(channel, interval), sid=sid)
+    
+    def _set_client_interval(self, sid: str, interval: Optional[float]) -> float:
+        """
+        Move a client to the cohort of a new update interval.
+        
+        Delta clients get a keyframe from their new cohort's encoder.
+        
+        Returns:
+            The granted interval
+        """
+        old = self.scheduler.get_interval(sid)
+        new = self.scheduler.set_interval(sid, interval)
+        if new != old:
+            channels = self._client_channels(sid)
+            for channel in channels:
+                if old is not None:
+                    leave_room(cohort_room(channel, old), sid=sid)
+                join_room(cohort_room(channel, new), sid=sid)
+            if DELTA_ROOM in channels:
+                self._send_keyframe(sid)
+        return new
+    
+    def _send_keyframe(self, sid: str) -> None:
+        """Send a delta keyframe of the current state to one client."""
+        snapshot = self.snapshots.get()
+        cohort = self.scheduler.get_cohort(sid)
+        if snapshot and cohort:
+            frame = cohort.delta.keyframe(snapshot.sequence, snapshot.data)
+            self.socketio.emit('tegrastats_delta', frame, to=sid)
     
     def _update_data_thread(self) -> None:
-        """Background thread for updating data."""
+        """
+        Background thread for updating data.
+        
+        Wakes up as soon as the parser stores a new sample and sends it
+        once to every due rate cohort, so samples are neither delayed by
+        an independent sleep nor sent twice.
+        """
         logger.info("数据更新线程启动")
         
+        sequence = 0
         while self._running:
             try:
-                if self.limiter.get_count() > 0:
-                    data = self.parser.get_current_status()
-                    if data:
-                        # Add timestamp
-                        data['timestamp'] = datetime.utcnow().isoformat() + 'Z'
-                        
-                        # Emit to all connected clients
-                        self.socketio.emit('tegrastats_update', data)
-                        logger.debug(f"向 {self.limiter.get_count()} 个客户端发送数据更新")
-                
-                time.sleep(self.config.update_interval)
+                latest = self._wait_for_sample(sequence)
+                if latest == sequence:
+                    self._flush_recovered()
+                else:
+                    if sequence and latest - sequence > 1:
+                        # Samples replaced before this thread saw them
+                        self.perf.count("dropped", latest - sequence - 1)
+                    sequence = latest
+                    self._broadcast_update()
                 
             except Exception as e:
                 logger.error(f"数据更新线程错误: {e}")
-                time.sleep(1)
+                self.socketio.sleep(1)
         
         logger.info("数据更新线程停止")
     
+    def _wait_for_sample(self, sequence: int) -> int:
+        """
+        Wait up to one second for a sample newer than sequence.
+        
+        In eventlet mode the parser still runs on an OS thread, so the wait
+        is handed to eventlet's thread pool and only this green thread
+        blocks, not the event loop. (eventlet queues cannot be fed from an
+        OS thread, so there is no per-client async queue; the update thread
+        is the only waiter and broadcasts to the rooms.)
+        """
+        if self.config.async_mode == 'eventlet':
+            from eventlet import tpool
+            return tpool.execute(self.parser.wait_for_sample, sequence, 1.0)
+        return self.parser.wait_for_sample(sequence, timeout=1.0)
+    
+    def _broadcast_update(self, cohorts: Optional[List[Cohort]] = None) -> None:
+        """
+        Send the current sample to WebSocket clients.
+        
+        Args:
+            cohorts: Rate cohorts to update (None for the due cohorts that
+                have not been sent this sample yet)
+        """
+        snapshot = self.snapshots.get()
+        if not snapshot:
+            return
+        
+        if cohorts is None:
+            cohorts = self.scheduler.due(sequence=snapshot.sequence)
+        if not cohorts:
+            return
+        start = self.perf.start()
+        for cohort in cohorts:
+            self._broadcast_cohort(snapshot, cohort)
+        self.perf.record("emit", start)
+        self.latency.record(time.time() - snapshot.captured_at)
+        logger.debug(f"向 {len(cohorts)} 个更新组发送数据更新")
+    
+    def _broadcast_cohort(self, snapshot: Snapshot, cohort: Cohort) -> None:
+        """
+        Send one frame per channel to the clients of a rate cohort.
+        
+        Slow clients (see BackpressureController) are left out of the room
+        emits and get the frames queued under the overflow policy instead.
+        """
+        members = self.scheduler.members(cohort)
+        slow, recovered = self.backpressure.check(members, superseded=True)
+        for sid, frames, keyframe in recovered:
+            self._flush_client(sid, frames, keyframe)
+        skip = list(slow) or None
+        
+        # Full documents to regular clients
+        self.socketio.emit('tegrastats_update', snapshot.data, to=cohort.room(FULL_ROOM),
+                           skip_sid=skip)
+        
+        # One delta frame shared by the cohort's delta clients
+        with self._clients_lock:
+            has_delta_clients = not self._delta_clients.isdisjoint(members)
+            has_binary_clients = not self._binary_clients.isdisjoint(members)
+            has_compressed_clients = not self._compressed_clients.isdisjoint(members)
+            projections = {self._client_fields[sid] for sid in members
+                           if sid in self._client_fields}
+        # One projected document per distinct projection in this cohort
+        for key in sorted(projections):
+            self.socketio.emit('tegrastats_update', snapshot.document(key),
+                               to=cohort.room(key), skip_sid=skip)
+        if has_compressed_clients:
+            self.socketio.emit('tegrastats_update', self._compressed_update(snapshot),
+                               to=cohort.room(COMPRESSED_ROOM), skip_sid=skip)
+        if has_delta_clients:
+            frame = cohort.delta.encode(snapshot.sequence, snapshot.data)
+            if frame:
+                self.socketio.emit('tegrastats_delta', frame, to=cohort.room(DELTA_ROOM),
+                                   skip_sid=skip)
+        
+        # Binary frames, encoded once per sample and shared with /api/status.bin
+        if has_binary_clients:
+            self.socketio.emit('tegrastats_binary', snapshot.encoded(BINARY_KEY),
+                               to=cohort.room(BINARY_ROOM), skip_sid=skip)
+        
+        # One message per topic subscribed in this cohort, sent only to its room
+        topics: Set[str] = set()
+        for sid in members:
+            topics.update(self.topics.client_topics(sid))
+        messages: Dict[str, Dict[str, Any]] = {}
+        for topic in sorted(topics):
+            try:
+                value = resolve_path(snapshot.data, topic)
+            except KeyError:
+                continue
+            messages[topic] = {
+                'topic': topic,
+                'seq': snapshot.sequence,
+                'timestamp': snapshot.data['timestamp'],
+                'data': value
+            }
+            self.socketio.emit('tegrastats_topic', messages[topic],
+                               to=cohort.room(topic_room(topic)), skip_sid=skip)
+        
+        for sid in slow:
+            self._defer_client(sid, snapshot, messages)
+    
+    def _defer_client(self, sid: str, snapshot: Snapshot,
+                      messages: Dict[str, Dict[str, Any]]) -> None:
+        """Queue the frames a slow client missed in this broadcast."""
+        channels = self._client_channels(sid)
+        frames = []
+        if FULL_ROOM in channels:
+            frames.append(('tegrastats_update', snapshot.data))
+        if COMPRESSED_ROOM in channels:
+            frames.append(('tegrastats_update', self._compressed_update(snapshot)))
+        for channel in channels:
+            if is_projection_key(channel):
+                frames.append(('tegrastats_update', snapshot.document(channel)))
+        if BINARY_ROOM in channels:
+            frames.append(('tegrastats_binary', snapshot.encoded(BINARY_KEY)))
+        for topic in sorted(self.topics.client_topics(sid)):
+            if topic in messages:
+                frames.append(('tegrastats_topic', messages[topic]))
+        if not self.backpressure.defer(sid, frames, delta=DELTA_ROOM in channels):
+            logger.warning(f"断开慢速客户端 {sid}: 连续 {self.config.max_missed_frames} 帧未能送达")
+            self.socketio.server.disconnect(sid, namespace='/')
+    
+    @staticmethod
+    def _compressed_update(snapshot: Snapshot) -> Any:
+        """Payload for compressed clients: deflated JSON, or the document if too small."""
+        compressed = snapshot.compressed('status', 'deflate')
+        return snapshot.data if compressed is None else compressed
+    
+    def _flush_client(self, sid: str, frames: List[Tuple[str, Any]], keyframe: bool) -> None:
+        """Send a recovered client its queued frames (and a delta keyframe)."""
+        if keyframe:
+            self._send_keyframe(sid)
+        for event, payload in frames:
+            self.socketio.emit(event, payload, to=sid)
+    
+    def _flush_recovered(self) -> None:
+        """Flush slow clients whose backlog drained while no sample arrived."""
+        slow = self.backpressure.slow_clients()
+        if slow:
+            _, recovered = self.backpressure.check(slow)
+            for sid, frames, keyframe in recovered:
+                self._flush_client(sid, frames, keyframe)
+    
+    def _client_backlog(self, sid: str) -> int:
+        """Number of packets waiting in a client's transport queue."""
+        server = self.socketio.server
+        try:
+            eio_sid = server.manager.eio_sid_from_sid(sid, '/')
+            socket = server.eio.sockets.get(eio_sid) if eio_sid else None
+            return socket.queue.qsize() if socket else 0
+        except Exception:
+            return 0
+    
     def start(self) -> None:
         """Start the server components."""
         try:
+            if self.udp:
+                self.udp.start()
+            
             # Start tegrastats parser
             self.parser.start()
             
+            if self.idle:
+                self.idle.start()
+            
             # Start data update thread
             self._running = True
-            self._update_thread = threading.Thread(target=self._update_data_thread, daemon=True)
-            self._update_thread.start()
+            if self.config.async_mode == 'threading':
+                self._update_thread = threading.Thread(target=self._update_data_thread, daemon=True)
+                self._update_thread.start()
+            else:
+                self.socketio.start_background_task(self._update_data_thread)
             
             logger.info("服务器组件已启动")
             
@@ -245,7 +1188,13 @@ class TegrastatsServer:
             self._update_thread.join(timeout=2)
         
         # Stop parser
+        if self.idle:
+            self.idle.stop()
         self.parser.stop()
+        if self.recorder:
+            self.recorder.close()
+        if self.udp:
+            self.udp.stop()
         
         logger.info("服务器已关闭")
     
@@ -269,6 +1218,7 @@ class TegrastatsServer:
             logger.info(f"启动Tegrastats API服务器")
             logger.info(f"监听地址: {self.config.host}:{self.config.port}")
             logger.info(f"最大连接数: {self.config.max_connections}")
+            logger.info(f"服务模式: {self.config.async_mode}")
             logger.info(f"数据更新频率: {self.config.update_interval}秒")
             
             # Run server
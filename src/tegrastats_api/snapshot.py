@@ -0,0 +1,312 @@
+"""
+Snapshot cache module.
+
+Each new tegrastats sample is serialized once per REST document (JSON,
+binary or Prometheus text) and the encoded bytes are shared by every
+request and WebSocket broadcast until the next sample arrives. Compressed
+variants (gzip, deflate) are likewise built once per sample and document.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import binary
+from .metrics import render_metrics
+from .parser import TegrastatsParser
+from .perf import PerfMonitor
+from .projection import compile_projection, is_projection_key
+
+
+# Sections served by their own routes (/api/cpu, /api/memory, ...)
+SECTIONS = ("cpu", "memory", "temperature", "power")
+
+# Keys of the binary frame (/api/status.bin) and its schema descriptor
+BINARY_KEY = "status.bin"
+SCHEMA_KEY = "status.schema"
+
+# Key of the Prometheus exposition (/metrics)
+METRICS_KEY = "metrics"
+
+# Content codings offered for REST responses, in order of preference
+ENCODINGS = ("gzip", "deflate")
+
+# Builds a section of a sample that does not carry it directly
+SectionBuilder = Callable[[Dict[str, Any], str], Optional[Dict[str, Any]]]
+
+# Framings of /api/stream: Server-Sent Events and newline-delimited JSON
+STREAM_FORMATS = ("sse", "ndjson")
+
+
+def encode_json(obj: Any) -> bytes:
+    """Encode obj exactly like Flask's jsonify does outside debug mode."""
+    return (json.dumps(obj, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    Compress a body with an HTTP content coding.
+
+    Args:
+        body: Encoded document
+        encoding: One of ENCODINGS (``deflate`` is the zlib format, as
+            RFC 9110 defines it)
+        level: zlib compression level
+    """
+    if encoding == "gzip":
+        # Fixed mtime keeps the output identical for identical input
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise ValueError(f"Unsupported content coding '{encoding}'")
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Format a UNIX timestamp as the ISO 8601 UTC string used by the API."""
+    return datetime.utcfromtimestamp(timestamp).isoformat() + 'Z'
+
+
+class Snapshot:
+    """One parsed sample together with its encoded REST documents."""
+
+    def __init__(self, sequence: int, data: Dict[str, Any], epoch: str,
+                 perf: Optional[PerfMonitor] = None, compression_threshold: int = 512,
+                 compression_level: int = 6, sections: Optional[SectionBuilder] = None):
+        """
+        Initialize snapshot.
+
+        Args:
+            sequence: Sample sequence number from the parser
+            data: Parsed sample (not modified)
+            epoch: Per-process prefix that keeps ETags unique across restarts
+            perf: Monitor recording encoding time (``serialize.<key>`` and
+                ``compress.<key>.<encoding>``)
+            compression_threshold: Smallest encoded document that is compressed
+            compression_level: zlib compression level
+            sections: Builds the SECTIONS documents from the sample (e.g.
+                hub.fleet_section); by default they are copied from it
+        """
+        self.sequence = sequence
+        self.captured_at: float = data.get("timestamp", 0.0)
+        self.data = dict(data)
+        self.data["timestamp"] = format_timestamp(self.captured_at)
+        self.etag = f"{epoch}-{sequence}"
+        self._encoded: Dict[str, bytes] = {}
+        self._projected: Dict[str, Dict[str, Any]] = {}
+        self._frames: Dict[Tuple[str, str], bytes] = {}
+        self._compressed: Dict[Tuple[str, str], Optional[bytes]] = {}
+        self._lock = threading.Lock()
+        self._perf = perf
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self._sections = sections
+
+    def document(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the document served for a route key.
+
+        Args:
+            key: ``status`` for the full document, one of SECTIONS or a
+                projection key (see projection.projection_key)
+
+        Returns:
+            Document dictionary, or None if the sample lacks that section
+        """
+        if key == "status":
+            return self.data
+        if is_projection_key(key):
+            document = self._projected.get(key)
+            if document is None:
+                # Racing threads may both project; the results are equal
+                document = compile_projection(key).apply(self.data)
+                self._projected[key] = document
+            return document
+        if self._sections is not None and key in SECTIONS:
+            document = self._projected.get(key)
+            if document is None:
+                section = self._sections(self.data, key)
+                if section is None:
+                    return None
+                document = {key: section, "timestamp": self.data["timestamp"]}
+                self._projected[key] = document
+            return document
+        if key in self.data:
+            return {key: self.data[key], "timestamp": self.data["timestamp"]}
+        return None
+
+    def encoded(self, key: str) -> Optional[bytes]:
+        """
+        Get the encoded document for a route key, encoding it at most once.
+
+        Args:
+            key: ``status``, one of SECTIONS or a projection key (JSON),
+                BINARY_KEY (binary frame), SCHEMA_KEY (JSON schema of the
+                binary frame) or METRICS_KEY (Prometheus text)
+        """
+        body = self._encoded.get(key)
+        if body is None:
+            with self._lock:
+                body = self._encoded.get(key)
+                if body is None:
+                    start = self._perf.start() if self._perf else None
+                    if key == BINARY_KEY:
+                        body = binary.encode_sample(self.sequence, self.captured_at, self.data)
+                    elif key == SCHEMA_KEY:
+                        body = encode_json(binary.schema(self.data))
+                    elif key == METRICS_KEY:
+                        body = render_metrics(self.sequence, self.captured_at, self.data)
+                    else:
+                        document = self.document(key)
+                        if document is None:
+                            return None
+                        body = encode_json(document)
+                    self._encoded[key] = body
+                    if start is not None:
+                        self._perf.record(f"serialize.{self._timer_name(key)}", start)
+        return body
+
+    def stream_frame(self, key: str, framing: str) -> Optional[bytes]:
+        """
+        Get a JSON document framed for /api/stream, framing it at most once.
+
+        The frame wraps the bytes of encoded() without re-serializing; its
+        id is the snapshot's ETag::
+
+            sse     id: <etag>\ndata: <document>\n\n
+            ndjson  {"id":"<etag>","data":<document>}\n
+
+        Args:
+            key: JSON document key (``status``, a section or a projection)
+            framing: One of STREAM_FORMATS
+
+        Returns:
+            Frame, or None if the document is missing
+        """
+        cache_key = (key, framing)
+        frame = self._frames.get(cache_key)
+        if frame is None:
+            body = self.encoded(key)
+            if body is None:
+                return None
+            document = body.rstrip(b"\n")
+            etag = self.etag.encode("ascii")
+            if framing == "sse":
+                frame = b"id: " + etag + b"\ndata: " + document + b"\n\n"
+            elif framing == "ndjson":
+                frame = b'{"id":"' + etag + b'","data":' + document + b"}\n"
+            else:
+                raise ValueError(f"Unsupported stream format '{framing}'")
+            # Racing threads may both frame; the results are equal
+            self._frames[cache_key] = frame
+        return frame
+
+    @staticmethod
+    def _timer_name(key: str) -> str:
+        """Perf timer suffix of a key; all projections share one timer."""
+        return "projection" if is_projection_key(key) else key
+
+    def compressed(self, key: str, encoding: str) -> Optional[bytes]:
+        """
+        Get the compressed document for a route key, compressing it at most once.
+
+        Args:
+            key: Document key, see encoded()
+            encoding: One of ENCODINGS
+
+        Returns:
+            Compressed bytes, or None if the document is missing, smaller
+            than the compression threshold or does not get any smaller
+        """
+        cache_key = (key, encoding)
+        if cache_key in self._compressed:
+            return self._compressed[cache_key]
+        body = self.encoded(key)
+        if body is None or len(body) < self.compression_threshold:
+            return None
+        with self._lock:
+            if cache_key not in self._compressed:
+                start = self._perf.start() if self._perf else None
+                compressed: Optional[bytes] = compress(body, encoding, self.compression_level)
+                if len(compressed) >= len(body):
+                    compressed = None
+                self._compressed[cache_key] = compressed
+                if start is not None:
+                    self._perf.record(f"compress.{self._timer_name(key)}.{encoding}", start)
+            return self._compressed[cache_key]
+
+
+class SnapshotCache:
+    """Keeps a Snapshot of the parser's current sample and a few recent ones."""
+
+    def __init__(self, parser: TegrastatsParser, perf: Optional[PerfMonitor] = None,
+                 compression_threshold: int = 512, compression_level: int = 6,
+                 retain: int = 0, sections: Optional[SectionBuilder] = None):
+        """
+        Initialize cache.
+
+        Args:
+            parser: Parser providing samples
+            perf: Monitor recording encoding time
+            compression_threshold: Smallest encoded document that is compressed
+            compression_level: zlib compression level
+            retain: Number of recent snapshots kept for since(); with
+                retain > 0 every sample gets a snapshot, not just the
+                requested ones
+            sections: Section document builder passed to every Snapshot
+        """
+        self.parser = parser
+        self.perf = perf
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.sections = sections
+        self._epoch = os.urandom(4).hex()
+        self._snapshot: Optional[Snapshot] = None
+        self._recent: Deque[Snapshot] = deque(maxlen=retain or 1)
+        self._lock = threading.Lock()
+        if retain > 0:
+            # Listeners run right after the sample became current
+            parser.add_sample_listener(lambda sample: self.get())
+
+    @property
+    def epoch(self) -> str:
+        """Per-process ETag prefix."""
+        return self._epoch
+
+    def get(self) -> Optional[Snapshot]:
+        """
+        Get the snapshot for the current sample.
+
+        Returns:
+            Snapshot, or None if the parser has no data yet
+        """
+        sequence, data = self.parser.get_current_sample()
+        if not data:
+            return None
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.sequence == sequence:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.sequence < sequence:
+                self._snapshot = Snapshot(sequence, data, self._epoch, self.perf,
+                                          self.compression_threshold,
+                                          self.compression_level, self.sections)
+                self._recent.append(self._snapshot)
+            return self._snapshot
+
+    def since(self, sequence: int) -> List[Snapshot]:
+        """
+        Get the retained snapshots newer than a sequence number.
+
+        Returns:
+            Snapshots in sequence order (the oldest ones may have been
+            discarded already)
+        """
+        with self._lock:
+            return [snapshot for snapshot in self._recent if snapshot.sequence > sequence]
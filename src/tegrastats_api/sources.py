@@ -0,0 +1,356 @@
+"""
+Sample source module.
+
+A sample source produces samples for TegrastatsParser: tegrastats output
+lines from the ``tegrastats`` binary or from a recorded log, documents read
+directly from procfs/sysfs, or fleet documents merged from other servers
+(hub mode), so the same storage and broadcast pipeline runs with or without
+the tegrastats binary or Jetson hardware.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .collector import NativeCollector
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Values of Config.source
+SOURCES = ("tegrastats", "native", "hub")
+
+
+class SampleSource:
+    """Base class of sample sources."""
+
+    def open(self) -> None:
+        """Acquire resources (start processes, open files)."""
+
+    def lines(self) -> Iterator[str]:
+        """
+        Yield tegrastats output lines.
+
+        Runs on the parser thread; the iterator ends when the source is
+        exhausted or closed.
+        """
+        raise NotImplementedError
+
+    def samples(self, parse: Callable[[str], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield parsed samples.
+
+        Line sources parse every non-empty line with ``parse``; sources that
+        read metrics themselves override this and yield documents directly.
+
+        Args:
+            parse: Line parser (TegrastatsParser.parse_line)
+        """
+        for line in self.lines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = parse(line)
+            except Exception as e:
+                logger.error(f"解析tegrastats行时出错: {e}")
+                continue
+            if data:
+                yield data
+
+    def set_interval(self, interval: int) -> None:
+        """
+        Change the sampling interval of an open source.
+
+        Sources with a fixed rate (recorded logs) ignore this.
+
+        Args:
+            interval: Sampling interval in milliseconds
+        """
+
+    def close(self) -> None:
+        """Release resources and end a running lines() iterator."""
+
+    def describe(self) -> str:
+        """Get a short description for log messages."""
+        return type(self).__name__
+
+
+class Pacer:
+    """
+    Fixed-rate schedule for sources that sample on their own.
+
+    Ticks follow a fixed schedule so sampling time does not add drift. The
+    interval can change while a source waits; a shorter interval ticks
+    right away, so resuming from a slow rate is immediate.
+    """
+
+    def __init__(self, interval: int, delay_first: bool = False):
+        """
+        Initialize pacer.
+
+        Args:
+            interval: Interval in milliseconds
+            delay_first: Wait one interval before the first tick
+        """
+        self.interval = interval
+        self.delay_first = delay_first
+        self._condition = threading.Condition()
+        self._closed = False
+        self._next = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """Restart the schedule (on open)."""
+        with self._condition:
+            self._closed = False
+            self._next = time.monotonic() + (self.interval / 1000 if self.delay_first else 0.0)
+
+    def wait(self) -> bool:
+        """
+        Wait for the next tick.
+
+        Returns:
+            True on a tick, False once closed
+        """
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                if now >= self._next:
+                    self._next = max(self._next + self.interval / 1000, now)
+                    return True
+                self._condition.wait(self._next - now)
+            return False
+
+    def set_interval(self, interval: int) -> None:
+        """Change the interval; a shorter one ticks immediately."""
+        with self._condition:
+            if interval < self.interval:
+                self._next = time.monotonic()
+            self.interval = interval
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """End waiting."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class TegrastatsSource(SampleSource):
+    """Lines from a running ``tegrastats`` process."""
+
+    def __init__(self, interval: int = 1000):
+        """
+        Initialize source.
+
+        Args:
+            interval: Sampling interval in milliseconds
+        """
+        self.interval = interval
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> subprocess.Popen:
+        cmd = ["tegrastats", "--interval", str(self.interval)]
+        return subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            universal_newlines=True
+        )
+
+    def open(self) -> None:
+        """Start the tegrastats process."""
+        with self._lock:
+            self._process = self._spawn()
+        logger.info(f"tegrastats进程已启动，间隔: {self.interval}ms")
+
+    def lines(self) -> Iterator[str]:
+        while True:
+            process = self._process
+            if not process or not process.stdout:
+                return
+            yield from iter(process.stdout.readline, '')
+            # A restarted process (new interval) continues the stream
+            if self._process is process:
+                return
+
+    def set_interval(self, interval: int) -> None:
+        """Restart tegrastats with a new interval."""
+        with self._lock:
+            process = self._process
+            if interval == self.interval or process is None:
+                self.interval = interval
+                return
+            self.interval = interval
+            self._process = self._spawn()
+        self._terminate(process)
+        logger.info(f"tegrastats已按新间隔重启: {interval}ms")
+
+    def close(self) -> None:
+        """Stop the tegrastats process."""
+        with self._lock:
+            process = self._process
+            self._process = None
+        if process:
+            self._terminate(process)
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen) -> None:
+        try:
+            process.terminate()
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        except Exception as e:
+            logger.error(f"停止tegrastats进程时出错: {e}")
+
+    def describe(self) -> str:
+        return f"tegrastats --interval {self.interval}"
+
+
+class ReplaySource(SampleSource):
+    """Lines from a recorded tegrastats log, replayed at a chosen speed."""
+
+    def __init__(self, path: str, interval: int = 1000, speed: float = 1.0, loop: bool = False):
+        """
+        Initialize replay source.
+
+        Args:
+            path: Log file written by ``tegrastats`` (one sample per line)
+            interval: Sampling interval of the recording in milliseconds
+            speed: Replay speed factor (1 = real time, 10 = ten times
+                faster, 0 = as fast as possible)
+            loop: Start over at the end of the file instead of stopping
+        """
+        if speed < 0:
+            raise ValueError("speed must not be negative")
+        self.path = path
+        self.interval = interval
+        self.speed = speed
+        self.loop = loop
+        self._closed = threading.Event()
+
+    def open(self) -> None:
+        """Check that the log can be read."""
+        with open(self.path, "r"):
+            pass
+        self._closed.clear()
+        logger.info(f"回放tegrastats日志: {self.describe()}")
+
+    def lines(self) -> Iterator[str]:
+        delay = self.interval / 1000 / self.speed if self.speed else 0.0
+        next_time = time.monotonic()
+        while not self._closed.is_set():
+            replayed = 0
+            with open(self.path, "r") as log:
+                for line in log:
+                    if not line.strip():
+                        continue
+                    if delay:
+                        # Pace against a fixed schedule so parsing time does not add drift
+                        if self._closed.wait(max(0.0, next_time - time.monotonic())):
+                            return
+                        next_time += delay
+                    elif self._closed.is_set():
+                        return
+                    replayed += 1
+                    yield line
+            if not self.loop or not replayed:
+                logger.info(f"回放结束: {self.path}")
+                return
+
+    def close(self) -> None:
+        """Stop replaying."""
+        self._closed.set()
+
+    def describe(self) -> str:
+        speed = f"{self.speed:g}x" if self.speed else "max"
+        return f"{self.path} ({speed}{', loop' if self.loop else ''})"
+
+
+class NativeSource(SampleSource):
+    """Samples read directly from procfs and sysfs, one per interval."""
+
+    def __init__(self, interval: int = 1000, root: str = "/"):
+        """
+        Initialize native source.
+
+        Args:
+            interval: Sampling interval in milliseconds
+            root: Directory containing ``proc`` and ``sys``
+        """
+        self.root = root
+        self._collector: Optional[NativeCollector] = None
+        # The first sample comes one interval after open() so CPU usage
+        # covers a full interval
+        self._pacer = Pacer(interval, delay_first=True)
+
+    @property
+    def interval(self) -> int:
+        return self._pacer.interval
+
+    def open(self) -> None:
+        """Open the metric files."""
+        self._collector = NativeCollector(self.root)
+        self._pacer.reset()
+        logger.info(f"原生采集已启动，间隔: {self.interval}ms")
+
+    def samples(self, parse: Callable[[str], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        collector = self._collector
+        if collector is None:
+            return
+        while self._pacer.wait():
+            try:
+                data = collector.collect()
+            except Exception as e:
+                logger.error(f"读取系统指标时出错: {e}")
+                continue
+            yield data
+
+    def set_interval(self, interval: int) -> None:
+        self._pacer.set_interval(interval)
+
+    def close(self) -> None:
+        """Stop sampling and close the metric files."""
+        self._pacer.close()
+        if self._collector:
+            self._collector.close()
+            self._collector = None
+
+    def describe(self) -> str:
+        root = "" if self.root in ("/", "") else f", root {self.root}"
+        return f"native ({self.interval}ms{root})"
+
+
+def source_from_config(config: Config) -> Optional[SampleSource]:
+    """
+    Create the sample source selected by a configuration.
+
+    Returns:
+        A ReplaySource if ``replay_file`` is set, a NativeSource if
+        ``source`` is "native", a HubSource if ``source`` is "hub",
+        otherwise None (the parser then runs the tegrastats binary)
+
+    Raises:
+        ValueError: If ``source`` is not one of SOURCES, or "hub" without
+            valid ``hub_nodes``
+    """
+    if config.source not in SOURCES:
+        raise ValueError(f"Unsupported source '{config.source}', expected one of {SOURCES}")
+    if config.replay_file:
+        return ReplaySource(config.replay_file, interval=config.tegrastats_interval,
+                            speed=config.replay_speed, loop=config.replay_loop)
+    if config.source == "native":
+        return NativeSource(interval=config.tegrastats_interval, root=config.sysfs_root)
+    if config.source == "hub":
+        from .hub import HubSource, parse_nodes
+        return HubSource(parse_nodes(config.hub_nodes or ""), interval=config.tegrastats_interval)
+    return None
@@ -0,0 +1,124 @@
+"""
+WebSocket topic subscription module.
+
+A topic is a section of the status document (``temperature``) or a dotted
+field path inside it (``temperature.tj``, ``cpu.cores.0.usage``). Each
+topic maps to one Socket.IO room so its payload is built once per update
+and sent only to the clients that asked for it.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Set
+
+
+# Top-level sections a topic may start with ("nodes" and "fleet" in hub mode)
+TOPIC_SECTIONS = ("cpu", "memory", "temperature", "power", "gpu", "nodes", "fleet")
+
+
+def topic_room(topic: str) -> str:
+    """Get the Socket.IO room name of a topic."""
+    return f"topic:{topic}"
+
+
+def is_valid_topic(topic: Any) -> bool:
+    """Check that a topic is a dotted path starting with a known section."""
+    if not isinstance(topic, str) or not topic:
+        return False
+    segments = topic.split(".")
+    return segments[0] in TOPIC_SECTIONS and all(segments)
+
+
+def resolve_path(document: Any, path: str) -> Any:
+    """
+    Look up a dotted path in a document.
+
+    Numeric segments index into lists, e.g. ``cpu.cores.0.usage``.
+
+    Raises:
+        KeyError: If the path does not exist in the document
+    """
+    node = document
+    for segment in path.split("."):
+        if isinstance(node, list):
+            try:
+                node = node[int(segment)]
+            except (ValueError, IndexError):
+                raise KeyError(path)
+        elif isinstance(node, dict) and segment in node:
+            node = node[segment]
+        else:
+            raise KeyError(path)
+    return node
+
+
+class TopicRegistry:
+    """Tracks which clients subscribed to which topics."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[str]] = {}
+        self._client_topics: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, sid: str, topics: Iterable[str]) -> List[str]:
+        """
+        Subscribe a client to topics.
+
+        Args:
+            sid: Socket.IO session id
+            topics: Topics to add
+
+        Returns:
+            Topics the client was not subscribed to before
+        """
+        added = []
+        with self._lock:
+            client_topics = self._client_topics.setdefault(sid, set())
+            for topic in topics:
+                if topic not in client_topics:
+                    client_topics.add(topic)
+                    self._subscribers.setdefault(topic, set()).add(sid)
+                    added.append(topic)
+        return added
+
+    def unsubscribe(self, sid: str, topics: Iterable[str]) -> List[str]:
+        """
+        Unsubscribe a client from topics.
+
+        Returns:
+            Topics the client was actually subscribed to
+        """
+        removed = []
+        with self._lock:
+            client_topics = self._client_topics.get(sid, set())
+            for topic in topics:
+                if topic in client_topics:
+                    client_topics.discard(topic)
+                    self._drop(topic, sid)
+                    removed.append(topic)
+            if not client_topics:
+                self._client_topics.pop(sid, None)
+        return removed
+
+    def remove_client(self, sid: str) -> None:
+        """Forget all subscriptions of a disconnected client."""
+        with self._lock:
+            for topic in self._client_topics.pop(sid, set()):
+                self._drop(topic, sid)
+
+    def client_topics(self, sid: str) -> Set[str]:
+        """Get the topics a client is subscribed to."""
+        with self._lock:
+            return set(self._client_topics.get(sid, set()))
+
+    def active_topics(self) -> List[str]:
+        """Get all topics with at least one subscriber."""
+        with self._lock:
+            return list(self._subscribers)
+
+    def _drop(self, topic: str, sid: str) -> None:
+        """Remove one subscriber of a topic. Caller holds the lock."""
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(sid)
+            if not subscribers:
+                del self._subscribers[topic]
@@ -0,0 +1,303 @@
+"""
+UDP publisher module.
+
+Display devices that only need the latest sample can listen for UDP
+datagrams instead of holding a WebSocket or HTTP connection. The publisher
+sends one datagram per sample to each configured unicast address or
+multicast group, however many devices listen. Datagrams take no connection
+slot and are never retried or acknowledged. A lost datagram is replaced by
+the next sample.
+
+Datagram::
+
+    header   "TU" magic, u8 version, u8 node id length
+    node id  ASCII, 1-32 bytes
+    frame    binary frame of the sample (see binary.py), carrying the
+             sequence number, layout id and timestamp
+
+The frame is the /api/status.bin body, encoded once per sample by
+Snapshot and shared with the REST route. Gaps in the frame's sequence
+numbers tell a listener how many datagrams it missed.
+"""
+
+import logging
+import re
+import select
+import socket
+import struct
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .binary import decode_frame
+from .snapshot import BINARY_KEY, Snapshot
+
+
+logger = logging.getLogger(__name__)
+
+UDP_MAGIC = b"TU"
+UDP_VERSION = 1
+UDP_HEADER = struct.Struct("<2sBB")
+
+DEFAULT_UDP_PORT = 58091
+
+_NODE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,32}$")
+
+
+def parse_targets(spec: str, port: int = DEFAULT_UDP_PORT) -> List[Tuple[str, int]]:
+    """
+    Parse a UDP target list.
+
+    Args:
+        spec: Comma-separated ``host[:port]`` entries; hosts may be unicast
+            addresses, names or IPv4 multicast groups (e.g. ``239.255.0.1``)
+        port: Port of entries without one
+
+    Returns:
+        List of (host, port)
+
+    Raises:
+        ValueError: If an entry is malformed or the list is empty
+    """
+    targets: List[Tuple[str, int]] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, target_port = item.rpartition(":")
+        if not sep:
+            host, target_port = item, ""
+        try:
+            value = int(target_port) if target_port else port
+        except ValueError:
+            raise ValueError(f"Invalid port in UDP target '{item}'")
+        if not host or not 0 < value < 65536:
+            raise ValueError(f"Invalid UDP target '{item}'")
+        targets.append((host, value))
+    if not targets:
+        raise ValueError("No UDP targets given")
+    return targets
+
+
+def default_node_id() -> str:
+    """Get a node id derived from the host name."""
+    node_id = re.sub(r"[^A-Za-z0-9_.-]", "-", socket.gethostname())[:32]
+    return node_id or "tegrastats"
+
+
+def encode_datagram(node_id: str, frame: bytes) -> bytes:
+    """
+    Build a datagram from a node id and a binary frame.
+
+    Raises:
+        ValueError: If the node id is not 1-32 characters of
+            ``[A-Za-z0-9_.-]``
+    """
+    if not _NODE_ID.match(node_id):
+        raise ValueError(f"Invalid UDP node id '{node_id}'")
+    node = node_id.encode("ascii")
+    return UDP_HEADER.pack(UDP_MAGIC, UDP_VERSION, len(node)) + node + frame
+
+
+def decode_datagram(datagram: bytes,
+                    names: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    Decode a datagram (reference decoder for listeners and tests).
+
+    Args:
+        datagram: Received datagram
+        names: Optional ``temperatures``/``rails`` name lists from
+            /api/status.schema, see binary.decode_frame()
+
+    Returns:
+        decode_frame() result plus ``node``
+
+    Raises:
+        ValueError: If the datagram is truncated or not a version 1 datagram
+    """
+    if len(datagram) < UDP_HEADER.size:
+        raise ValueError("Datagram too short")
+    magic, version, length = UDP_HEADER.unpack_from(datagram, 0)
+    if magic != UDP_MAGIC or version != UDP_VERSION:
+        raise ValueError(f"Unsupported datagram: magic={magic!r} version={version}")
+    start = UDP_HEADER.size + length
+    node = datagram[UDP_HEADER.size:start].decode("ascii", errors="replace")
+    decoded = decode_frame(datagram[start:], names)
+    decoded["node"] = node
+    return decoded
+
+
+def _is_multicast(host: str) -> bool:
+    try:
+        return socket.inet_aton(host)[0] >> 4 == 0xE
+    except OSError:
+        return False
+
+
+class UdpPublisher:
+    """Sends every sample to a list of UDP targets."""
+
+    def __init__(self, targets: List[Tuple[str, int]], node_id: Optional[str] = None,
+                 ttl: int = 1, interface: Optional[str] = None):
+        """
+        Initialize publisher.
+
+        Args:
+            targets: (host, port) pairs, see parse_targets()
+            node_id: Node id carried in every datagram (default: host name)
+            ttl: Multicast TTL (1 keeps datagrams on the local network)
+            interface: Local IPv4 address multicast datagrams leave from
+                (default: chosen by the routing table)
+        """
+        self.targets = targets
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self.interface = interface
+        self._header = encode_datagram(self.node_id, b"")
+        self._addresses: List[Tuple[str, int]] = []
+        self._socket: Optional[socket.socket] = None
+        self._failing = False
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        """
+        Open the socket and resolve the targets.
+
+        Raises:
+            OSError: If a target cannot be resolved
+        """
+        if self._socket is not None:
+            return
+        addresses = []
+        for host, port in self.targets:
+            info = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)
+            addresses.append(info[0][4][:2])
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if any(_is_multicast(host) for host, _ in addresses):
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+            if self.interface:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                socket.inet_aton(self.interface))
+        # A full send buffer drops the datagram instead of stalling the parser
+        sock.setblocking(False)
+        self._addresses = addresses
+        self._socket = sock
+        logger.info(f"UDP发布: 节点 {self.node_id} -> "
+                    f"{', '.join(f'{host}:{port}' for host, port in addresses)}")
+
+    def stop(self) -> None:
+        """Close the socket."""
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    def publish(self, snapshot: Optional[Snapshot]) -> None:
+        """
+        Send a snapshot's binary frame to every target.
+
+        Called on the parser thread once per sample. Send errors are counted
+        and logged once until a send succeeds again.
+        """
+        if snapshot is None or self._socket is None:
+            return
+        datagram = self._header + snapshot.encoded(BINARY_KEY)
+        with self._lock:
+            if self._socket is None:
+                return
+            for address in self._addresses:
+                try:
+                    self._socket.sendto(datagram, address)
+                    self.sent += 1
+                    self._failing = False
+                except OSError as e:
+                    self.errors += 1
+                    if not self._failing:
+                        self._failing = True
+                        logger.warning(f"UDP发送到 {address[0]}:{address[1]} 失败: {e}")
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Get the publisher state for /api/health.
+
+        Returns:
+            Dictionary with node_id, targets, sent and errors
+        """
+        return {
+            "node_id": self.node_id,
+            "targets": [f"{host}:{port}" for host, port in self.targets],
+            "sent": self.sent,
+            "errors": self.errors,
+        }
+
+
+class UdpListener:
+    """Reference listener receiving publisher datagrams."""
+
+    def __init__(self, port: int = DEFAULT_UDP_PORT, group: Optional[str] = None,
+                 interface: str = "0.0.0.0",
+                 names: Optional[Dict[str, List[str]]] = None):
+        """
+        Bind the listening socket.
+
+        Args:
+            port: UDP port (0 picks a free port, see ``port``)
+            group: IPv4 multicast group to join
+            interface: Local address to bind and to join the group on
+            names: Optional ``temperatures``/``rails`` name lists from
+                /api/status.schema
+        """
+        self.names = names
+        self.received = 0
+        self.missed = 0
+        self._last: Dict[str, int] = {}
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Group datagrams are addressed to the group, not to the interface
+        self._socket.bind(("" if group else interface, port))
+        if group:
+            membership = socket.inet_aton(group) + socket.inet_aton(interface)
+            self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        self.port = self._socket.getsockname()[1]
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next valid datagram.
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            decode_datagram() result plus ``missed`` (sequence numbers
+            skipped since the node's previous datagram), or None on timeout
+        """
+        while True:
+            ready, _, _ = select.select([self._socket], [], [], timeout)
+            if not ready:
+                return None
+            datagram, _ = self._socket.recvfrom(65535)
+            try:
+                sample = decode_datagram(datagram, self.names)
+            except (ValueError, struct.error) as e:
+                logger.debug(f"忽略无效的UDP数据报: {e}")
+                continue
+            last = self._last.get(sample["node"])
+            gap = sample["seq"] - last - 1 if last is not None else 0
+            # A restarted publisher starts counting again
+            sample["missed"] = gap if gap > 0 else 0
+            self._last[sample["node"]] = sample["seq"]
+            self.received += 1
+            self.missed += sample["missed"]
+            return sample
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            sample = self.receive()
+            if sample is not None:
+                yield sample
+
+    def close(self) -> None:
+        """Close the socket."""
+        self._socket.close()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for TegrastatsParser.parse_line.
+
+Runs the parser over the per-device corpus in tests/data/corpus/ (Orin AGX,
+Orin NX, Xavier, Nano) and reports, per device:
+
+    lines/s      throughput over the whole corpus file
+    p50/p99 us   per-call parse time percentiles
+    retained blocks/line  memory blocks still held by one parsed result
+    peak B/line           bytes allocated at once while parsing one line
+
+tracemalloc only sees live blocks, so short-lived allocations (tokens,
+intermediate strings) show up in peak B/line, not in the retained count.
+A parser that builds a larger result can retain more blocks while
+allocating far less along the way.
+
+Usage:
+    python tests/bench_parser.py [--iterations N] [--compare] [--json]
+
+``--compare`` also runs the original regex parser (tests/legacy_parser.py)
+so the speedup of the tokenizer is visible.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from tegrastats_api.parser import TegrastatsParser  # noqa: E402
+from legacy_parser import parse_line_regex  # noqa: E402
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "data", "corpus")
+
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> Dict[str, List[str]]:
+    """Load ``<device>.log`` files as ``{device: [line, ...]}``."""
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.log"))):
+        device = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            corpus[device] = [line.strip() for line in f if line.strip()]
+    return corpus
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(parse: Callable[[str], Dict[str, Any]], lines: List[str],
+            iterations: int = 2000) -> Dict[str, float]:
+    """
+    Measure one parse function over a list of lines.
+
+    Args:
+        parse: Function taking a raw line and returning the parsed document
+        lines: Corpus lines, parsed round-robin
+        iterations: Number of timed parse calls
+
+    Returns:
+        Dictionary with lines_per_sec, p50_us, p99_us,
+        retained_blocks_per_line and peak_bytes_per_line
+    """
+    # Warm up caches and interned strings
+    for line in lines:
+        parse(line)
+
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    count = len(lines)
+    started = perf_counter_ns()
+    for i in range(iterations):
+        line = lines[i % count]
+        t0 = perf_counter_ns()
+        parse(line)
+        timings.append(perf_counter_ns() - t0)
+    elapsed = (perf_counter_ns() - started) / 1e9
+    timings.sort()
+
+    # Allocation cost: blocks retained by the results and transient peak
+    tracemalloc.start()
+    try:
+        results = []
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        for line in lines:
+            results.append(parse(line))
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "lineno")
+                   if stat.count_diff > 0)
+
+    return {
+        "lines_per_sec": iterations / elapsed,
+        "p50_us": _percentile(timings, 0.50) / 1000,
+        "p99_us": _percentile(timings, 0.99) / 1000,
+        "retained_blocks_per_line": retained / count,
+        "peak_bytes_per_line": (peak - base) / count,
+    }
+
+
+def run_suite(iterations: int = 2000, compare: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Run the benchmark for every corpus device."""
+    parsers = {"tokenizer": TegrastatsParser.parse_line}
+    if compare:
+        parsers["regex"] = parse_line_regex
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for device, lines in load_corpus().items():
+        report[device] = {name: measure(parse, lines, iterations)
+                          for name, parse in parsers.items()}
+    return report
+
+
+def _print_table(report: Dict[str, Dict[str, Any]]) -> None:
+    header = (f"{'device':<10}{'parser':<11}{'lines/s':>10}{'p50 us':>9}{'p99 us':>9}"
+              f"{'retained blocks/line':>22}{'peak B/line':>13}")
+    print(header)
+    print("-" * len(header))
+    for device, results in report.items():
+        for name, r in results.items():
+            print(f"{device:<10}{name:<11}{r['lines_per_sec']:>10.0f}{r['p50_us']:>9.2f}"
+                  f"{r['p99_us']:>9.2f}{r['retained_blocks_per_line']:>22.1f}"
+                  f"{r['peak_bytes_per_line']:>13.0f}")
+        if "regex" in results:
+            speedup = results["tokenizer"]["lines_per_sec"] / results["regex"]["lines_per_sec"]
+            print(f"{device:<10}{'speedup':<11}{speedup:>9.2f}x")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark TegrastatsParser.parse_line")
+    arg_parser.add_argument("--iterations", type=int, default=20000,
+                            help="timed parse calls per device and parser")
+    arg_parser.add_argument("--compare", action="store_true",
+                            help="also benchmark the original regex parser")
+    arg_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = arg_parser.parse_args()
+
+    report = run_suite(args.iterations, args.compare)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_table(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Reference copy of the original regex-based tegrastats line parser.
+
+Kept only so the tests and benchmarks can compare ``TegrastatsParser.parse_line``
+against the implementation it replaced. Do not use it in the package.
+"""
+
+import re
+import time
+from typing import Dict, Any
+
+
+def parse_line_regex(line: str) -> Dict[str, Any]:
+    """Parse a tegrastats line with one regex scan per field (original code)."""
+    try:
+        result = {
+            "timestamp": time.time(),
+            "cpu": {"cores": []},
+            "memory": {"ram": {}, "swap": {}},
+            "temperature": {},
+            "power": {},
+            "gpu": {}
+        }
+        
+        cpu_match = re.search(r'CPU \[(.*?)\]', line)
+        if cpu_match:
+            cpu_data = cpu_match.group(1)
+            cores = []
+            core_matches = re.findall(r'(\d+)%@(\d+)', cpu_data)
+            for i, (usage, freq) in enumerate(core_matches):
+                cores.append({
+                    "id": i,
+                    "usage": int(usage),
+                    "freq": int(freq)
+                })
+            result["cpu"]["cores"] = cores
+        
+        ram_match = re.search(r'RAM (\d+)/(\d+)MB', line)
+        if ram_match:
+            used, total = ram_match.groups()
+            result["memory"]["ram"] = {
+                "used": int(used),
+                "total": int(total),
+                "unit": "MB"
+            }
+        
+        swap_match = re.search(r'SWAP (\d+)/(\d+)MB \(cached (\d+)MB\)', line)
+        if swap_match:
+            used, total, cached = swap_match.groups()
+            result["memory"]["swap"] = {
+                "used": int(used),
+                "total": int(total),
+                "cached": int(cached),
+                "unit": "MB"
+            }
+        
+        temp_matches = re.findall(r'(\w+)@([\d.]+)C', line)
+        for sensor, temp in temp_matches:
+            result["temperature"][sensor.lower()] = float(temp)
+        
+        power_matches = re.findall(r'(\w+) (\d+)/(\d+)', line)
+        for component, current, average in power_matches:
+            result["power"][component.lower()] = {
+                "current": int(current),
+                "average": int(average),
+                "unit": "mW"
+            }
+        
+        gpu_match = re.search(r'GR3D_FREQ (\d+)%', line)
+        if gpu_match:
+            result["gpu"]["gr3d_freq"] = int(gpu_match.group(1))
+        
+        return result
+        
+    except Exception:
+        return {}
@@ -0,0 +1,128 @@
+"""
+Tests for per-client backpressure on WebSocket delivery.
+"""
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.backpressure import BackpressureController
+
+from test_server import SAMPLE_LINE, feed
+
+
+def test_latest_policy_conflates():
+    backlog = {"a": 10}
+    controller = BackpressureController(lambda sid: backlog.get(sid, 0), queue_size=8)
+    slow, recovered = controller.check(["a", "b"])
+    assert slow == {"a"} and recovered == []
+
+    controller.defer("a", [("tegrastats_topic", 1), ("tegrastats_binary", b"1")])
+    controller.defer("a", [("tegrastats_topic", 2), ("tegrastats_binary", b"2")])
+    assert controller.lag("a")["queued"] == 2
+    assert controller.lag("a")["dropped"] == 2
+    assert controller.lag("a")["missed"] == 2
+
+    backlog["a"] = 0
+    slow, [(sid, frames, keyframe)] = controller.check(["a"])
+    assert frames == [("tegrastats_topic", 2), ("tegrastats_binary", b"2")]
+    assert not keyframe and not controller.lag("a")["slow"]
+
+
+def test_drop_oldest_policy():
+    backlog = {"a": 8}
+    controller = BackpressureController(lambda sid: backlog.get(sid, 0), queue_size=2,
+                                        policy="drop-oldest")
+    controller.check(["a"])
+    for i in range(3):
+        assert controller.defer("a", [("tegrastats_update", i)], delta=True)
+    backlog["a"] = 0
+    _, [(_, frames, keyframe)] = controller.check(["a"], superseded=True)
+    assert frames == [("tegrastats_update", 1), ("tegrastats_update", 2)]
+    assert keyframe
+    assert controller.lag("a")["dropped"] == 1
+
+    with pytest.raises(ValueError):
+        BackpressureController(lambda sid: 0, policy="bogus")
+
+
+def make_server(**options):
+    server = TegrastatsServer(Config(log_file=None, **options))
+    backlog = {}
+    server.backpressure.backlog = lambda sid: backlog.get(sid, 0)
+    feed(server, SAMPLE_LINE)
+    return server, backlog
+
+
+def sids(server):
+    return sorted(c["sid"] for c in server.app.test_client().get('/api/clients').get_json()["clients"])
+
+
+def broadcast(server):
+    feed(server, SAMPLE_LINE)
+    server._broadcast_update(server.scheduler.cohorts())
+
+
+def test_slow_client_skipped_and_catches_up():
+    server, backlog = make_server()
+    healthy = server.socketio.test_client(server.app)
+    stalled = server.socketio.test_client(server.app)
+    # Find the stalled client's sid through a targeted emit
+    for sid in sids(server):
+        server.socketio.emit('probe', sid, to=sid)
+    stalled_sid = stalled.get_received()[0]["args"][0]
+    healthy.get_received()
+
+    backlog[stalled_sid] = 100
+    for _ in range(3):
+        broadcast(server)
+    assert len(healthy.get_received()) == 3
+    assert stalled.get_received() == []
+
+    body = server.app.test_client().get('/api/clients').get_json()
+    lag = {c["sid"]: c for c in body["clients"]}[stalled_sid]
+    assert lag["slow"] and lag["missed"] == 3 and lag["queued"] == 1 and lag["dropped"] == 2
+    assert body["overflow_policy"] == "latest"
+    assert server.app.test_client().get('/api/health').get_json()["slow_clients"] == 1
+
+    # Recovered: only the newest sample is delivered
+    backlog[stalled_sid] = 0
+    broadcast(server)
+    [message] = stalled.get_received()
+    assert message["name"] == "tegrastats_update"
+
+    # Recovery without a new sample flushes the queue from the update loop
+    backlog[stalled_sid] = 100
+    broadcast(server)
+    backlog[stalled_sid] = 0
+    server._flush_recovered()
+    assert len(stalled.get_received()) == 1
+
+
+def test_slow_delta_client_gets_keyframe():
+    server, backlog = make_server()
+    client = server.socketio.test_client(server.app)
+    client.emit('delta_subscribe', callback=True)
+    [sid] = sids(server)
+    broadcast(server)
+    client.get_received()
+
+    backlog[sid] = 100
+    broadcast(server)
+    backlog[sid] = 0
+    broadcast(server)
+    frames = [m["args"][0] for m in client.get_received()]
+    assert [f["type"] for f in frames] == ["key", "delta"]
+    assert frames[1]["base"] == frames[0]["seq"]
+
+
+def test_disconnect_policy():
+    server, backlog = make_server(overflow_policy="disconnect", max_missed_frames=2)
+    client = server.socketio.test_client(server.app)
+    [sid] = sids(server)
+    backlog[sid] = 100
+    for _ in range(2):
+        broadcast(server)
+    assert client.is_connected()
+    broadcast(server)
+    assert not client.is_connected()
+    assert server.limiter.get_count() == 0
@@ -0,0 +1,38 @@
+"""
+Tests for the built-in load generator.
+"""
+
+import random
+
+from tegrastats_api.bench import percentiles, run_bench, synthetic_line
+from tegrastats_api.parser import TegrastatsParser
+
+
+def test_synthetic_line_parses():
+    data = TegrastatsParser.parse_line(synthetic_line(random.Random(1)))
+    assert len(data["cpu"]["cores"]) == 12
+    assert set(data["temperature"]) == {"cpu", "soc2", "soc0", "tj", "soc1"}
+    assert set(data["power"]) == {"vdd_gpu_soc", "vdd_cpu_cv", "vin_sys_5v0"}
+    assert "used" in data["memory"]["ram"]
+    assert "gr3d_freq" in data["gpu"]
+
+
+def test_percentiles():
+    assert percentiles([]) == {}
+    summary = percentiles([i / 1000 for i in range(1, 101)])
+    assert summary["p50"] == 51.0
+    assert summary["p99"] == 100.0
+    assert summary["max"] == 100.0
+
+
+def test_bench_against_local_server():
+    report = run_bench(subscribers=3, pollers=1, duration=1.0, rate=20,
+                       poll_interval=0.1, max_connections=2)
+    assert report["subscribers"] == {"requested": 3, "connected": 2, "connect_errors": 1}
+    assert report["messages"] >= 20
+    assert report["duplicates"] == 0
+    assert report["dropped"] is not None and report["dropped"] <= report["messages"] // 10
+    assert report["latency_ms"]["p50"] < 1000
+    assert report["http"]["requests"] > 0
+    assert report["http"]["errors"] == 0
+    assert report["server_errors"] == 0
@@ -0,0 +1,86 @@
+"""
+Tests for the compact binary frame format.
+"""
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.binary import decode_frame, encode_sample, layout_id, schema
+from tegrastats_api.parser import TegrastatsParser
+
+from bench_parser import load_corpus
+from test_server import SAMPLE_LINE, feed
+
+
+def test_round_trip():
+    sample = TegrastatsParser.parse_line(SAMPLE_LINE)
+    frame = encode_sample(7, 1700000000.123, sample)
+    descriptor = schema(sample)
+    assert len(frame) == descriptor["size"] == 24 + 16 + 4 + 12 * 4 + 5 * 2 + 3 * 8
+
+    decoded = decode_frame(frame, descriptor)
+    assert decoded["seq"] == 7
+    assert decoded["layout_id"] == descriptor["layout_id"]
+    assert decoded["timestamp"] == 1700000000.123
+    assert decoded["cpu"] == sample["cpu"]
+    assert decoded["memory"]["ram"] == {"used": 1997, "total": 62841}
+    assert decoded["gpu"] == sample["gpu"]
+    assert decoded["power"] == sample["power"]
+    # Centi-degree precision
+    for sensor, value in sample["temperature"].items():
+        assert decoded["temperature"][sensor] == pytest.approx(value, abs=0.0051)
+
+
+def test_corpus_layouts():
+    for name, lines in load_corpus().items():
+        sample = TegrastatsParser.parse_line(lines[0])
+        descriptor = schema(sample)
+        decoded = decode_frame(encode_sample(1, sample["timestamp"], sample), descriptor)
+        assert list(decoded["temperature"]) == list(sample["temperature"]), name
+        assert list(decoded["power"]) == list(sample["power"]), name
+
+
+def test_layout_id_tracks_sensors():
+    sample = TegrastatsParser.parse_line(SAMPLE_LINE)
+    changed = dict(sample, temperature=dict(sample["temperature"], gpu=40.0))
+    assert layout_id(sample) != layout_id(changed)
+    assert layout_id(sample) == layout_id(TegrastatsParser.parse_line(SAMPLE_LINE))
+
+    with pytest.raises(ValueError):
+        decode_frame(encode_sample(1, 0, sample)[:-1])
+
+
+def test_binary_endpoints():
+    server = TegrastatsServer(Config(log_file=None))
+    client = server.app.test_client()
+    assert client.get('/api/status.bin').status_code == 503
+
+    feed(server, SAMPLE_LINE)
+    response = client.get('/api/status.bin')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/octet-stream'
+    descriptor = client.get('/api/status.schema').get_json()
+    assert decode_frame(response.data, descriptor)["seq"] == 1
+    assert client.get('/api/status.bin', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    # Encoded once per sample
+    snapshot = server.snapshots.get()
+    assert snapshot.encoded('status.bin') is snapshot.encoded('status.bin')
+
+
+def test_binary_websocket_frames():
+    server = TegrastatsServer(Config(log_file=None))
+    feed(server, SAMPLE_LINE)
+    full = server.socketio.test_client(server.app)
+    device = server.socketio.test_client(server.app)
+    assert device.emit('binary_subscribe', {'interval': 5}, callback=True) == {'interval': 5.0}
+
+    server._broadcast_update(server.scheduler.cohorts())
+    [message] = device.get_received()
+    assert message["name"] == "tegrastats_binary"
+    assert message["args"][0] == server.snapshots.get().encoded('status.bin')
+    assert [m["name"] for m in full.get_received()] == ["tegrastats_update"]
+
+    device.emit('binary_unsubscribe')
+    server._broadcast_update(server.scheduler.cohorts())
+    assert [m["name"] for m in device.get_received()] == ["tegrastats_update"]
@@ -0,0 +1,114 @@
+"""
+Tests for the native procfs/sysfs collector.
+"""
+
+import os
+import time
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.collector import NativeCollector
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.sources import NativeSource, source_from_config
+
+from test_server import SAMPLE_LINE
+
+
+def write(root, relative, content):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def stat(*cores):
+    """Build /proc/stat from per-core (busy, idle) jiffies."""
+    lines = ["cpu  0 0 0 0 0 0 0 0 0 0"]
+    for i, (busy, idle) in enumerate(cores):
+        lines.append(f"cpu{i} {busy} 0 0 {idle} 0 0 0 0 0 0")
+    lines.append("intr 12345 0 0")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    root = str(tmp_path)
+    write(root, "proc/stat", stat((100, 900), (500, 500)))
+    write(root, "proc/meminfo", "MemTotal:       64350208 kB\nMemFree:        60000000 kB\n"
+                                "MemAvailable:   62305280 kB\nSwapCached:         1024 kB\n"
+                                "SwapTotal:      32175104 kB\nSwapFree:       32175104 kB\n")
+    for cpu, khz in ((0, 1574400), (1, 729600)):
+        write(root, f"sys/devices/system/cpu/cpu{cpu}/cpufreq/scaling_cur_freq", f"{khz}\n")
+    for zone, (kind, temp) in enumerate((("cpu-thermal", "45750"), ("tj-thermal", "46500"),
+                                         ("cv0-thermal", None))):
+        write(root, f"sys/class/thermal/thermal_zone{zone}/type", kind + "\n")
+        if temp is not None:
+            write(root, f"sys/class/thermal/thermal_zone{zone}/temp", temp + "\n")
+    write(root, "sys/class/hwmon/hwmon0/name", "tmp451\n")
+    hwmon = "sys/class/hwmon/hwmon1"
+    write(root, f"{hwmon}/name", "ina3221\n")
+    for channel, (label, mv, ma) in enumerate((("VDD_GPU_SOC", 5000, 400), ("VDD_CPU_CV", 5000, 100)), 1):
+        write(root, f"{hwmon}/in{channel}_label", label + "\n")
+        write(root, f"{hwmon}/in{channel}_input", f"{mv}\n")
+        write(root, f"{hwmon}/curr{channel}_input", f"{ma}\n")
+    write(root, "sys/devices/platform/17000000.ga10b/load", "523\n")
+    return root
+
+
+def test_collect_matches_parser_schema(sysfs):
+    collector = NativeCollector(sysfs)
+    write(sysfs, "proc/stat", stat((150, 950), (500, 600)))
+    sample = collector.collect()
+    collector.close()
+
+    parsed = TegrastatsParser.parse_line(SAMPLE_LINE)
+    assert list(sample) == list(parsed)
+    assert list(sample["memory"]["ram"]) == list(parsed["memory"]["ram"])
+    assert list(sample["memory"]["swap"]) == list(parsed["memory"]["swap"])
+    assert sample["cpu"]["cores"] == [{"id": 0, "usage": 50, "freq": 1574},
+                                      {"id": 1, "usage": 0, "freq": 729}]
+    assert sample["memory"]["ram"] == {"used": 1997, "total": 62842, "unit": "MB"}
+    assert sample["memory"]["swap"] == {"used": 0, "total": 31421, "cached": 1, "unit": "MB"}
+    assert sample["temperature"] == {"cpu": 45.75, "tj": 46.5}
+    assert sample["power"]["vdd_gpu_soc"] == {"current": 2000, "average": 2000, "unit": "mW"}
+    assert sample["gpu"] == {"gr3d_freq": 52}
+
+
+def test_files_stay_open_and_are_reread(sysfs):
+    collector = NativeCollector(sysfs)
+    collector.collect()
+    write(sysfs, "sys/class/hwmon/hwmon1/curr1_input", "800\n")
+    write(sysfs, "sys/class/thermal/thermal_zone0/temp", "50000\n")
+    sample = collector.collect()
+    assert sample["power"]["vdd_gpu_soc"] == {"current": 4000, "average": 3000, "unit": "mW"}
+    assert sample["temperature"]["cpu"] == 50.0
+
+    # Unreadable sensors are left out of the sample
+    write(sysfs, "sys/class/thermal/thermal_zone1/temp", "\n")
+    sample = collector.collect()
+    assert "tj" not in sample["temperature"]
+    collector.close()
+
+
+def test_native_source_feeds_pipeline(sysfs):
+    source = source_from_config(Config(log_file=None, source="native", sysfs_root=sysfs,
+                                       tegrastats_interval=20))
+    assert isinstance(source, NativeSource)
+    assert source.describe() == f"native (20ms, root {sysfs})"
+    with pytest.raises(ValueError):
+        source_from_config(Config(log_file=None, source="bogus"))
+
+    server = TegrastatsServer(Config(log_file=None, source="native", sysfs_root=sysfs,
+                                     tegrastats_interval=20, rollup_tiers=""))
+    server.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(server.history) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = server.app.test_client().get('/api/status')
+        assert response.status_code == 200
+        assert response.get_json()["gpu"] == {"gr3d_freq": 52}
+    finally:
+        server.stop()
+    assert len(server.history) >= 2
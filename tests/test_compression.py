@@ -0,0 +1,88 @@
+"""
+Tests for negotiated response and WebSocket compression.
+"""
+
+import gzip
+import json
+import zlib
+
+from tegrastats_api import Config, TegrastatsServer
+
+from test_server import SAMPLE_LINE, feed
+
+
+def make_server(**options):
+    server = TegrastatsServer(Config(log_file=None, **options))
+    feed(server, SAMPLE_LINE)
+    return server
+
+
+def test_status_compressed_once_per_sample():
+    server = make_server(compression_threshold=256, perf_enabled=True)
+    client = server.app.test_client()
+
+    plain = client.get('/api/status')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/api/status', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] != plain.headers['ETag']
+    assert client.get('/api/status', headers={'Accept-Encoding': 'gzip'}).data == response.data
+
+    response = client.get('/api/status', headers={'Accept-Encoding': 'deflate, gzip;q=0.5'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(response.data) == plain.data
+    not_modified = client.get('/api/status', headers={
+        'Accept-Encoding': 'deflate', 'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+
+    timers = client.get('/api/debug/perf').get_json()["timers"]
+    assert timers["compress.status.gzip"]["count"] == 1
+    assert timers["compress.status.deflate"]["count"] == 1
+
+
+def test_threshold_and_disabled():
+    server = make_server()
+    client = server.app.test_client()
+    # The temperature section is far below the default 512 byte threshold
+    response = client.get('/api/temperature', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+    server = make_server(compression=False, compression_threshold=1)
+    response = server.app.test_client().get('/api/status', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+
+
+def test_dynamic_responses_compressed():
+    server = make_server(compression_threshold=256)
+    for _ in range(5):
+        feed(server, SAMPLE_LINE)
+    response = server.app.test_client().get('/api/history',
+                                            headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))["count"] == 6
+
+
+def test_compressed_websocket_updates():
+    server = make_server(compression_threshold=256)
+    compressed = server.socketio.test_client(server.app)
+    plain = server.socketio.test_client(server.app)
+    assert compressed.emit('compressed_subscribe', callback=True)["encoding"] == 'deflate'
+
+    server._broadcast_update(server.scheduler.cohorts())
+    [message] = compressed.get_received()
+    assert message["name"] == 'tegrastats_update'
+    document = json.loads(zlib.decompress(message["args"][0]))
+    [message] = plain.get_received()
+    assert document == message["args"][0]
+    # One compression shared by every compressed client
+    snapshot = server.snapshots.get()
+    assert snapshot.compressed('status', 'deflate') is snapshot.compressed('status', 'deflate')
+
+    compressed.emit('compressed_unsubscribe')
+    server._broadcast_update(server.scheduler.cohorts())
+    [message] = compressed.get_received()
+    assert isinstance(message["args"][0], dict)
@@ -0,0 +1,92 @@
+"""
+Tests for delta-encoded WebSocket updates.
+"""
+
+import json
+
+from tegrastats_api import Config, DeltaDecoder, TegrastatsServer
+from tegrastats_api.delta import DeltaEncoder, diff_documents
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.snapshot import format_timestamp
+
+from bench_parser import load_corpus
+
+
+def documents(device="orin_agx"):
+    docs = []
+    for i, line in enumerate(load_corpus()[device]):
+        data = TegrastatsParser.parse_line(line)
+        data["timestamp"] = format_timestamp(1759472000 + i)
+        docs.append(data)
+    return docs
+
+
+def test_diff_documents():
+    old = {"a": 1, "b": {"c": [1, 2], "d": 3}, "e": [1]}
+    new = {"a": 1, "b": {"c": [1, 5], "f": 4}, "e": [1, 2]}
+    changed, removed = diff_documents(old, new)
+    assert changed == {"b.c.1": 5, "b.f": 4, "e": [1, 2]}
+    assert removed == ["b.d"]
+
+
+def test_round_trip_and_keyframes():
+    encoder = DeltaEncoder(keyframe_interval=3)
+    decoder = DeltaDecoder()
+    docs = documents() * 2
+    
+    types = []
+    for seq, doc in enumerate(docs, start=1):
+        frame = encoder.encode(seq, doc)
+        types.append(frame["type"])
+        # Frames go over the wire as JSON
+        assert decoder.apply(json.loads(json.dumps(frame))) == doc
+    
+    assert types == ["key", "delta", "delta", "delta", "key", "delta", "delta", "delta", "key", "delta"]
+    assert encoder.encode(len(docs), docs[-1]) is None
+
+
+def test_delta_frames_are_smaller():
+    docs = [TegrastatsParser.parse_line(load_corpus()["orin_agx"][1]) for _ in range(2)]
+    docs[1]["cpu"]["cores"][0]["usage"] += 1
+    docs[1]["temperature"]["tj"] += 0.5
+    docs[1]["timestamp"] += 1
+    encoder = DeltaEncoder()
+    key = json.dumps(encoder.encode(1, docs[0]))
+    delta = json.dumps(encoder.encode(2, docs[1]))
+    assert len(delta) * 5 < len(key)
+
+
+def test_decoder_detects_gap():
+    encoder = DeltaEncoder()
+    decoder = DeltaDecoder()
+    docs = documents()
+    decoder.apply(encoder.encode(1, docs[0]))
+    encoder.encode(2, docs[1])
+    assert decoder.apply(encoder.encode(3, docs[2])) is None
+    assert decoder.apply(encoder.keyframe(3, docs[2])) == docs[2]
+
+
+def test_socketio_delta_subscription():
+    server = TegrastatsServer(Config(log_file=None))
+    server.parser._store_sample(TegrastatsParser.parse_line(load_corpus()["orin_agx"][0]))
+    
+    full = server.socketio.test_client(server.app)
+    delta = server.socketio.test_client(server.app)
+    delta.emit('delta_subscribe')
+    decoder = DeltaDecoder()
+    [keyframe] = delta.get_received()
+    assert keyframe["name"] == "tegrastats_delta"
+    assert decoder.apply(keyframe["args"][0]) == server.snapshots.get().data
+    
+    for line in load_corpus()["orin_agx"][1:3]:
+        server.parser._store_sample(TegrastatsParser.parse_line(line))
+        server._broadcast_update(server.scheduler.cohorts())
+    
+    received = delta.get_received()
+    assert [m["args"][0]["type"] for m in received] == ["delta", "delta"]
+    for message in received:
+        document = decoder.apply(message["args"][0])
+    assert document == server.snapshots.get().data
+    
+    updates = full.get_received()
+    assert [m["name"] for m in updates] == ["tegrastats_update", "tegrastats_update"]
@@ -0,0 +1,148 @@
+"""
+Tests for the in-memory sample history and /api/history.
+"""
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.history import HistoryBuffer
+from tegrastats_api.rollup import RollupEngine
+from tegrastats_api.parser import TegrastatsParser
+
+from test_server import SAMPLE_LINE
+
+
+def sample(timestamp, line=SAMPLE_LINE):
+    data = TegrastatsParser.parse_line(line)
+    data["timestamp"] = timestamp
+    return data
+
+
+def test_ring_keeps_latest_samples():
+    history = HistoryBuffer(capacity=5)
+    for t in range(8):
+        history.append(sample(100.0 + t))
+    
+    result = history.query()
+    assert len(history) == 5
+    assert result["count"] == 5
+    assert result["timestamps"] == [103.0, 104.0, 105.0, 106.0, 107.0]
+    assert result["fields"]["temperature.soc0"] == [43.437] * 5
+    assert result["fields"]["power.vdd_gpu_soc.current"] == [2468] * 5
+
+
+def test_query_range_and_fields():
+    history = HistoryBuffer(capacity=10)
+    for t in range(15):
+        history.append(sample(float(t)))
+    
+    result = history.query(since=7, until=9.5, fields=["cpu.cores.0", "gpu"])
+    assert result["timestamps"] == [7.0, 8.0, 9.0]
+    assert sorted(result["fields"]) == ["cpu.cores.0.freq", "cpu.cores.0.usage", "gpu.gr3d_freq"]
+    assert result["fields"]["cpu.cores.0.usage"] == [3, 3, 3]
+    
+    assert history.query(since=100)["count"] == 0
+    assert history.query(until=4)["count"] == 0
+
+
+def test_missing_fields_are_none():
+    history = HistoryBuffer(capacity=3)
+    history.append(sample(1.0, "RAM 100/200MB"))
+    history.append(sample(2.0))
+    history.append(sample(3.0, "RAM 100/200MB"))
+    history.append(sample(4.0, "RAM 100/200MB"))
+    
+    result = history.query(fields=["memory.ram.used", "temperature.tj"])
+    assert result["fields"]["memory.ram.used"] == [1997, 100, 100]
+    assert result["fields"]["temperature.tj"] == [45.75, None, None]
+
+
+def test_memory_is_preallocated():
+    history = HistoryBuffer(capacity=1000)
+    history.append(sample(1.0))
+    size = history.memory_bytes()
+    for t in range(2, 2000):
+        history.append(sample(float(t)))
+    assert history.memory_bytes() == size
+    # 8 bytes timestamp + 12 cores * 3 + 5 temps * 4 + 3 rails * 4 + 2 memory * 4 + 1 gpu
+    assert size == 1000 * (8 + 36 + 20 + 12 + 8 + 1)
+
+
+def test_history_route():
+    server = TegrastatsServer(Config(log_file=None, history_size=100))
+    client = server.app.test_client()
+    for t in range(3):
+        server.parser._store_sample(sample(10.0 + t))
+    
+    data = client.get('/api/history?since=11&fields=temperature.tj').get_json()
+    assert data["timestamps"] == [11.0, 12.0]
+    assert data["fields"] == {"temperature.tj": [45.75, 45.75]}
+    
+    assert client.get('/api/history?since=abc').status_code == 400
+    for query in ('since=nan', 'until=inf', 'max_points=nan', 'max_points=inf',
+                  'max_points=-1', 'max_points=2.5', 'max_points=²'):
+        assert client.get(f'/api/history?{query}').status_code == 400, query
+
+
+def test_history_route_before_first_sample():
+    for tiers in ("", "10:1000"):
+        server = TegrastatsServer(Config(log_file=None, history_size=100, rollup_tiers=tiers))
+        response = server.app.test_client().get('/api/history')
+        assert response.status_code == 200, tiers
+        data = response.get_json()
+        assert data["resolution"] == 0 and data["count"] == 0 and data["timestamps"] == []
+    assert server.app.test_client().get('/api/history?max_points=0').status_code == 400
+
+
+def test_history_disabled():
+    server = TegrastatsServer(Config(log_file=None, history_size=0, rollup_tiers=""))
+    assert server.history is None
+    assert server.app.test_client().get('/api/history').status_code == 404
+
+
+def test_rollup_tiers_aggregate():
+    engine = RollupEngine([(10, 200), (60, 600)])
+    for t in range(125):
+        data = sample(1000.0 + t)
+        data["cpu"]["cores"][0]["usage"] = t % 10
+        engine.append(data)
+    
+    fine, coarse = engine.tiers
+    result = fine.query(fields=["cpu.cores.0.usage", "temperature.tj"])
+    assert result["timestamps"][:2] == [1000.0, 1010.0]
+    assert result["count"] == 12  # buckets 1000..1110 closed, 1120 still open
+    usage = result["fields"]["cpu.cores.0.usage"]
+    assert usage["min"][0] == 0 and usage["max"][0] == 9
+    assert usage["avg"][0] == 4.5 and usage["last"][0] == 9
+    assert result["fields"]["temperature.tj"]["avg"][0] == 45.75
+    
+    # Coarse buckets start at multiples of 60; 1080..1139 is still open
+    result = coarse.query(fields=["cpu.cores.0.usage"])
+    assert result["timestamps"] == [960.0, 1020.0]
+    assert result["fields"]["cpu.cores.0.usage"]["avg"] == [4.5, 4.5]
+
+
+def test_rollup_select_by_point_budget():
+    history = HistoryBuffer(capacity=600)
+    engine = RollupEngine([(10, 3600), (60, 36000)])
+    for t in range(3000):
+        data = sample(float(t))
+        history.append(data)
+        engine.append(data)
+    
+    assert engine.select(history, 2900, None, 200) is history
+    assert engine.select(history, 2000, None, 200) is engine.tiers[0]
+    assert engine.select(history, 0, None, 200) is engine.tiers[1]
+    assert engine.select(history, 0, None, 10) is engine.tiers[1]
+
+
+def test_history_route_max_points():
+    server = TegrastatsServer(Config(log_file=None, history_size=50, rollup_tiers="10:1000"))
+    client = server.app.test_client()
+    for t in range(200):
+        server.parser._store_sample(sample(float(t)))
+    
+    raw = client.get('/api/history?since=180&fields=temperature.tj').get_json()
+    assert raw["resolution"] == 0 and raw["count"] == 20
+    
+    rolled = client.get('/api/history?since=0&max_points=50&fields=temperature.tj').get_json()
+    assert rolled["resolution"] == 10 and rolled["count"] == 19
+    assert rolled["fields"]["temperature.tj"]["max"][0] == 45.75
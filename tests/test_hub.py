@@ -0,0 +1,139 @@
+"""
+Tests for hub mode, against real upstream servers on local ports.
+"""
+
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.hub import aggregate, fleet_section, parse_nodes
+
+from test_metrics import parse_exposition
+from test_server import SAMPLE_LINE
+
+
+HOT_LINE = SAMPLE_LINE.replace("tj@45.75C", "tj@61.5C").replace("[3%@1574", "[51%@1574")
+
+
+def test_parse_nodes():
+    assert parse_nodes("orin1=10.10.99.98, 10.10.99.99:6000,http://[::1]:7000") == [
+        ("orin1", "http://10.10.99.98:58090"),
+        ("10-10-99-99-6000", "http://10.10.99.99:6000"),
+        ("--1-7000", "http://[::1]:7000"),
+    ]
+    for spec in ("", "a=x,a=y", "bad.name=x", "a=:80"):
+        with pytest.raises(ValueError):
+            parse_nodes(spec)
+
+
+def test_aggregate():
+    from tegrastats_api.parser import TegrastatsParser
+    metrics = aggregate({
+        "a": TegrastatsParser.parse_line(SAMPLE_LINE),
+        "b": TegrastatsParser.parse_line(HOT_LINE),
+    })
+    assert metrics["temperature"]["tj"] == {
+        "min": 45.75, "max": 61.5, "avg": 53.625, "count": 2, "min_node": "a", "max_node": "b"}
+    assert metrics["cpu"]["usage"]["max_node"] == "b"
+    assert metrics["power"]["vdd_gpu_soc"]["current"]["avg"] == 2468
+
+
+def test_fleet_section():
+    from tegrastats_api.parser import TegrastatsParser
+    status = TegrastatsParser.parse_line(SAMPLE_LINE)
+    document = {
+        "nodes": {"a": {"online": True, "status": status},
+                  "b": {"online": False, "status": status},
+                  "c": {"online": True, "status": None}},
+        "fleet": {"metrics": aggregate({"a": status})},
+    }
+    section = fleet_section(document, "memory")
+    assert section["nodes"] == {"a": status["memory"]}
+    assert section["fleet"]["ram"]["used"]["max_node"] == "a"
+    assert fleet_section(status, "memory") is None
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Start upstream servers replaying a log on free local ports."""
+    servers = []
+
+    def start(line):
+        log = tmp_path / f"node{len(servers)}.log"
+        log.write_text(line + "\n")
+        server = TegrastatsServer(Config(log_file=None, replay_file=str(log), replay_loop=True,
+                                         tegrastats_interval=100, update_interval=0.1,
+                                         min_update_interval=0.1))
+        http = make_server("127.0.0.1", 0, server.app, threaded=True)
+        threading.Thread(target=http.serve_forever, daemon=True).start()
+        server.start()
+        servers.append((server, http))
+        return server, http.server_port
+
+    yield start
+    for server, http in servers:
+        server.stop()
+        http.shutdown()
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_hub_merges_upstream_servers(upstream):
+    node_a, port_a = upstream(SAMPLE_LINE)
+    node_b, port_b = upstream(HOT_LINE)
+    hub = TegrastatsServer(Config(
+        log_file=None, source="hub", tegrastats_interval=100, update_interval=0.1,
+        min_update_interval=0.1,
+        hub_nodes=f"a=127.0.0.1:{port_a},b=127.0.0.1:{port_b},down=127.0.0.1:1"
+    ))
+    client = hub.app.test_client()
+    hub.start()
+    try:
+        assert wait_for(lambda: client.get('/api/health').get_json()["hub"]["online"] == 2)
+        assert wait_for(lambda: client.get('/api/status').get_json()["fleet"]["online"] == 2)
+        status = client.get('/api/status').get_json()
+        assert status["fleet"]["size"] == 3
+        assert status["fleet"]["metrics"]["temperature"]["tj"]["max_node"] == "b"
+        assert status["nodes"]["a"]["status"]["temperature"]["tj"] == 45.75
+        assert status["nodes"]["down"]["online"] is False
+
+        # Section routes serve each online node's section plus fleet statistics
+        temperature = client.get('/api/temperature').get_json()["temperature"]
+        assert temperature["nodes"]["a"]["tj"] == 45.75
+        assert temperature["fleet"]["tj"]["max"] == 61.5
+        assert set(client.get('/api/cpu').get_json()["cpu"]["nodes"]) == {"a", "b"}
+        for section in ("memory", "power"):
+            assert client.get(f'/api/{section}').status_code == 200
+        assert client.get('/api/temperature?fields=tj').status_code == 400
+
+        # Each node serves exactly one consumer: the hub
+        assert node_a.limiter.get_count() == 1 and node_b.limiter.get_count() == 1
+
+        nodes = client.get('/api/nodes').get_json()["nodes"]
+        assert [n["name"] for n in nodes if n["online"]] == ["a", "b"]
+        assert [n for n in nodes if n["name"] == "down"][0]["error"]
+
+        values = parse_exposition(client.get('/metrics').data.decode())
+        assert values['tegrastats_temperature_celsius{node="b",sensor="tj"}'] == 61.5
+        assert values['tegrastats_node_up{node="down"}'] == 0
+
+        dashboard = hub.socketio.test_client(hub.app)
+        ack = dashboard.emit('subscribe', {'topics': ['fleet.metrics.temperature.tj']},
+                             callback=True)
+        assert ack == {'topics': ['fleet.metrics.temperature.tj']}
+        assert wait_for(lambda: any(m["name"] == 'tegrastats_topic'
+                                    for m in dashboard.get_received()))
+    finally:
+        hub.stop()
+    assert wait_for(lambda: node_a.limiter.get_count() == 0)
+    assert TegrastatsServer(Config(log_file=None)).hub is None
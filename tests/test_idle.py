@@ -0,0 +1,152 @@
+"""
+Tests for demand-driven sampling.
+"""
+
+import os
+import stat
+import threading
+import time
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.bench import SyntheticSource
+from tegrastats_api.idle import IdleMonitor
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.sources import Pacer, SampleSource, TegrastatsSource
+
+from test_server import SAMPLE_LINE
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def make_server(idle_interval):
+    config = Config(log_file=None, idle_timeout=0.2, idle_interval=idle_interval,
+                    tegrastats_interval=20, rollup_tiers="")
+    parser = TegrastatsParser(interval=20, source=SyntheticSource(interval=20))
+    return TegrastatsServer(config, parser=parser)
+
+
+def test_keep_warm_and_resume_on_request():
+    server = make_server(idle_interval=500)
+    server.start()
+    try:
+        assert wait_until(lambda: server.idle.idle)
+        assert server.parser.source.interval == 500
+        http = server.app.test_client()
+        assert http.get('/api/health').get_json()['sampling'] == 'idle'
+        # Health checks do not count as demand
+        time.sleep(0.3)
+        assert server.idle.idle
+
+        # The first request is served from the cache and wakes the source
+        sequence, _ = server.parser.get_current_sample()
+        assert http.get('/api/status').status_code == 200
+        assert wait_until(lambda: not server.idle.idle, timeout=1.0)
+        assert server.parser.source.interval == 20
+        assert wait_until(lambda: server.parser.get_current_sample()[0] > sequence + 3, timeout=1.0)
+    finally:
+        server.stop()
+
+
+def test_stop_when_idle_and_resume_on_connect():
+    server = make_server(idle_interval=0)
+    server.start()
+    try:
+        assert wait_until(lambda: server.idle.idle)
+        assert not server.parser._running
+        sequence, _ = server.parser.get_current_sample()
+
+        client = server.socketio.test_client(server.app)
+        assert wait_until(lambda: server.parser._running, timeout=1.0)
+        assert wait_until(lambda: server.parser.get_current_sample()[0] > sequence)
+        # Connected clients keep sampling active
+        time.sleep(0.3)
+        assert not server.idle.idle
+        client.disconnect()
+        assert wait_until(lambda: server.idle.idle)
+        assert server.idle.suspensions == 2
+    finally:
+        server.stop()
+
+
+def test_pacer_resumes_immediately():
+    pacer = Pacer(10000, delay_first=True)
+    pacer.set_interval(10)
+    start = time.monotonic()
+    assert pacer.wait()
+    assert time.monotonic() - start < 0.5
+    pacer.close()
+    assert not pacer.wait()
+
+
+def test_tegrastats_restart_continues_stream(tmp_path, monkeypatch):
+    script = tmp_path / "tegrastats"
+    script.write_text('#!/bin/sh\nwhile true; do echo "interval $2"; sleep 0.02; done\n')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    source = TegrastatsSource(100)
+    source.open()
+    lines = source.lines()
+    assert next(lines).strip() == "interval 100"
+    source.set_interval(5000)
+    assert any(next(lines).strip() == "interval 5000" for _ in range(50))
+    source.close()
+    assert list(lines) == []
+
+
+class StuckSource(SampleSource):
+    """Source whose first run ignores close() until released."""
+
+    def __init__(self):
+        self.opens = 0
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def open(self):
+        self.opens += 1
+        self.closed.clear()
+
+    def samples(self, parse):
+        yield TegrastatsParser.parse_line(SAMPLE_LINE)
+        if self.opens == 1:
+            self.release.wait(10)
+            yield TegrastatsParser.parse_line(SAMPLE_LINE)
+        else:
+            self.closed.wait(10)
+
+    def close(self):
+        self.closed.set()
+
+    def describe(self):
+        return "stuck"
+
+
+def test_resume_waits_for_stuck_parse_thread():
+    source = StuckSource()
+    parser = TegrastatsParser(interval=20, source=source)
+    monitor = IdleMonitor(parser, timeout=0.2, idle_interval=0, active_interval=20,
+                          clients=lambda: 0)
+    parser.start()
+    assert wait_until(lambda: parser.get_current_sample()[0] == 1)
+    old = parser._thread
+    monitor._suspend()
+    assert old.is_alive()
+
+    # The old thread is still inside the source: stay idle
+    monitor._resume()
+    assert monitor.idle and source.opens == 1
+
+    # A parser restarted anyway owns _running; the old thread stores nothing
+    parser.start()
+    source.release.set()
+    old.join(timeout=2)
+    assert not old.is_alive()
+    assert wait_until(lambda: parser.get_current_sample()[0] >= 2)
+    assert parser._running and parser._thread.is_alive()
+    assert parser.get_current_sample()[0] == 2
+    parser.stop()
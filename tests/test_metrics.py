@@ -0,0 +1,57 @@
+"""
+Tests for the Prometheus /metrics exposition.
+"""
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.metrics import render_metrics
+from tegrastats_api.parser import TegrastatsParser
+
+from test_server import SAMPLE_LINE, feed
+
+
+def parse_exposition(text):
+    """Map 'name{labels}' to value, skipping comments."""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            values[series] = float(value)
+    return values
+
+
+def test_render_metrics():
+    sample = TegrastatsParser.parse_line(SAMPLE_LINE)
+    text = render_metrics(7, 1700000000.5, sample).decode("utf-8")
+    values = parse_exposition(text)
+
+    assert values['tegrastats_cpu_usage_percent{core="0"}'] == 3
+    assert values['tegrastats_cpu_frequency_hertz{core="4"}'] == 1420e6
+    assert values['tegrastats_memory_used_bytes{type="ram"}'] == 1997 * 1024 * 1024
+    assert values['tegrastats_memory_total_bytes{type="swap"}'] == 31421 * 1024 * 1024
+    assert values['tegrastats_temperature_celsius{sensor="tj"}'] == 45.75
+    assert values['tegrastats_power_watts{rail="vdd_gpu_soc"}'] == 2.468
+    assert values['tegrastats_power_average_watts{rail="vin_sys_5v0"}'] == 3.383
+    assert values['tegrastats_gpu_usage_percent'] == 0
+    assert values['tegrastats_samples_total'] == 7
+    assert values['tegrastats_sample_timestamp_seconds'] == 1700000000.5
+    assert "# TYPE tegrastats_samples_total counter" in text
+    # Every series of a metric follows its HELP/TYPE lines
+    assert text.count("# TYPE tegrastats_temperature_celsius gauge") == 1
+
+
+def test_metrics_endpoint_is_cached():
+    server = TegrastatsServer(Config(log_file=None))
+    client = server.app.test_client()
+    assert client.get('/metrics').status_code == 503
+
+    feed(server, SAMPLE_LINE)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    assert b'tegrastats_samples_total 1' in response.data
+    snapshot = server.snapshots.get()
+    assert snapshot.encoded('metrics') is snapshot.encoded('metrics')
+    assert client.get('/metrics', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    feed(server, SAMPLE_LINE)
+    assert b'tegrastats_samples_total 2' in client.get('/metrics').data
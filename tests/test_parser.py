@@ -0,0 +1,85 @@
+"""
+Golden-corpus tests for TegrastatsParser.parse_line.
+"""
+
+import json
+import os
+
+import pytest
+
+from tegrastats_api.parser import TegrastatsParser
+from legacy_parser import parse_line_regex
+from bench_parser import load_corpus, measure
+
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "tegrastats_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+CORPUS = [
+    (f"{device}-{i}", line)
+    for device, lines in load_corpus().items()
+    for i, line in enumerate(lines)
+]
+
+
+def _without_timestamp(data):
+    data = dict(data)
+    data.pop("timestamp", None)
+    return data
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[case["name"] for case in GOLDEN])
+def test_parse_line_matches_golden(case):
+    result = TegrastatsParser.parse_line(case["line"])
+    assert isinstance(result["timestamp"], float)
+    # Compare serialized form so key order is checked as well
+    assert json.dumps(_without_timestamp(result)) == json.dumps(case["expected"])
+
+
+@pytest.mark.parametrize("line", [case["line"] for case in GOLDEN] + [line for _, line in CORPUS],
+                         ids=[case["name"] for case in GOLDEN] + [name for name, _ in CORPUS])
+def test_parse_line_matches_regex_parser(line):
+    new = _without_timestamp(TegrastatsParser.parse_line(line))
+    old = _without_timestamp(parse_line_regex(line))
+    
+    new_power = new.pop("power")
+    old_power = old.pop("power")
+    assert json.dumps(new) == json.dumps(old)
+    
+    # The regex parser also reported "RAM a/b" and "SWAP a/b" as rails and
+    # missed rails written as "NAMEcurmW/avgmW"; every real rail it found
+    # must still be reported with the same values.
+    for rail, values in old_power.items():
+        if rail not in ("ram", "swap", "iram"):
+            assert new_power[rail] == values
+
+
+def test_parse_line_empty_fields():
+    result = TegrastatsParser.parse_line("")
+    assert _without_timestamp(result) == {
+        "cpu": {"cores": []},
+        "memory": {"ram": {}, "swap": {}},
+        "temperature": {},
+        "power": {},
+        "gpu": {}
+    }
+
+
+@pytest.mark.parametrize("line", [line for _, line in CORPUS], ids=[name for name, _ in CORPUS])
+def test_corpus_lines_have_all_sections(line):
+    result = TegrastatsParser.parse_line(line)
+    assert result["memory"]["ram"] and result["memory"]["swap"]
+    assert result["cpu"]["cores"]
+    assert result["temperature"]
+    assert result["power"]
+    assert "gr3d_freq" in result["gpu"]
+
+
+def test_benchmark_reports_metrics():
+    lines = [line for _, line in CORPUS]
+    report = measure(TegrastatsParser.parse_line, lines, iterations=50)
+    assert report["lines_per_sec"] > 0
+    assert 0 < report["p50_us"] <= report["p99_us"]
+    assert report["retained_blocks_per_line"] > 0
@@ -0,0 +1,66 @@
+"""
+Tests for self-instrumentation.
+"""
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.perf import PerfMonitor
+
+from test_server import SAMPLE_LINE, feed
+
+
+def test_disabled_monitor_records_nothing():
+    perf = PerfMonitor()
+    assert perf.start() is None
+    perf.record("parse", 0.0)
+    perf.count("samples")
+    summary = perf.summary()
+    assert summary["enabled"] is False
+    assert summary["timers"] == {} and summary["counters"] == {}
+    assert summary["process"]["rss_bytes"] > 0
+
+    perf.set_enabled(True)
+    perf.record("parse", perf.start())
+    perf.count("samples", 2)
+    summary = perf.summary()
+    assert summary["timers"]["parse"]["count"] == 1
+    assert summary["counters"] == {"samples": 2}
+
+
+def test_pipeline_instrumentation():
+    server = TegrastatsServer(Config(log_file=None, perf_enabled=True))
+    server.socketio.test_client(server.app)
+    server.parser._store_sample(server.parser._parse(SAMPLE_LINE))
+    server.parser._parse("garbage")
+    client = server.app.test_client()
+    client.get('/api/status')
+    client.get('/api/status')
+    server._broadcast_update(server.scheduler.cohorts())
+
+    summary = client.get('/api/debug/perf').get_json()
+    assert summary["counters"]["samples"] == 1
+    assert summary["counters"]["parse_errors"] == 1
+    for timer in ("parse", "lock_wait", "listeners", "serialize.status", "emit"):
+        assert summary["timers"][timer]["count"] >= 1, timer
+    # Encoded once, served twice
+    assert summary["timers"]["serialize.status"]["count"] == 1
+    assert summary["timers"]["request./api/status"]["count"] == 2
+    assert summary["process"]["cpu_seconds"] > 0
+
+
+def test_toggle_at_runtime():
+    server = TegrastatsServer(Config(log_file=None))
+    client = server.app.test_client()
+    feed(server, SAMPLE_LINE)
+    assert client.get('/api/debug/perf').get_json()["counters"] == {}
+
+    response = client.post('/api/debug/perf', json={'enabled': True})
+    assert response.get_json()["enabled"] is True
+    feed(server, SAMPLE_LINE)
+    assert client.get('/api/debug/perf').get_json()["counters"]["samples"] == 1
+
+    assert client.post('/api/debug/perf', json={'reset': True}).get_json()["counters"] == {}
+    assert client.post('/api/debug/perf', json={'enabled': 'yes'}).status_code == 400
+    assert client.post('/api/debug/perf', data='x').status_code == 400
+    client.post('/api/debug/perf', json={'enabled': False})
+    feed(server, SAMPLE_LINE)
+    assert client.get('/api/debug/perf').get_json()["counters"] == {}
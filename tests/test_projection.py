@@ -0,0 +1,85 @@
+"""
+Tests for sparse field projections on REST and WebSocket.
+"""
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.projection import compile_projection, parse_fields, projection_key
+
+from test_server import SAMPLE_LINE, feed
+
+
+def project(fields, document):
+    return compile_projection(projection_key(parse_fields(fields))).apply(document)
+
+
+def test_projection_paths():
+    document = TegrastatsParser.parse_line(SAMPLE_LINE)
+    document["timestamp"] = "2025-10-03T03:20:36Z"
+    result = project("temperature.tj,cpu.cores.usage,power.vdd_gpu_soc.current,bogus.path",
+                     document)
+    assert result == {
+        "temperature": {"tj": 45.75},
+        "cpu": {"cores": [{"usage": core["usage"]} for core in document["cpu"]["cores"]]},
+        "power": {"vdd_gpu_soc": {"current": 2468}},
+        "timestamp": "2025-10-03T03:20:36Z",
+    }
+    assert project("cpu.cores.4.freq,cpu.cores.0", document)["cpu"]["cores"] == [
+        document["cpu"]["cores"][0], {"freq": 1420}]
+    # A shorter path keeps the whole subtree
+    assert project("memory,memory.ram.used", document)["memory"] == document["memory"]
+
+
+def test_parse_fields_is_canonical():
+    assert parse_fields(" b.x ,a,,b.x") == ("a", "b.x")
+    assert parse_fields(["a"]) == parse_fields("a")
+    assert compile_projection(projection_key(("a", "b"))) is compile_projection("status?fields=a,b")
+    for bad in ("a..b", ".a", ["a", 1], ",".join(f"f{i}" for i in range(65))):
+        with pytest.raises(ValueError):
+            parse_fields(bad)
+
+
+@pytest.fixture
+def server():
+    server = TegrastatsServer(Config(log_file=None, perf_enabled=True))
+    feed(server, SAMPLE_LINE)
+    return server
+
+
+def test_rest_projection_cached_per_sample(server):
+    client = server.app.test_client()
+    response = client.get('/api/status?fields=temperature.tj,power.vdd_gpu_soc.current')
+    body = response.get_json()
+    assert set(body) == {"temperature", "power", "timestamp"}
+    assert body["temperature"] == {"tj": 45.75}
+    # Same projection in another order: served from the same cached bytes
+    again = client.get('/api/status?fields=power.vdd_gpu_soc.current,temperature.tj')
+    assert again.data == response.data
+    timers = client.get('/api/debug/perf').get_json()["timers"]
+    assert timers["serialize.projection"]["count"] == 1
+
+    assert client.get('/api/temperature?fields=tj').get_json()["temperature"] == {"tj": 45.75}
+    assert client.get('/api/status?fields=a..b').status_code == 400
+    assert "cpu" in client.get('/api/status?fields=').get_json()
+
+
+def test_websocket_projection(server):
+    narrow = server.socketio.test_client(server.app, query_string='fields=temperature.tj')
+    same = server.socketio.test_client(server.app)
+    full = server.socketio.test_client(server.app)
+    ack = same.emit('set_fields', {'fields': ['temperature.tj']}, callback=True)
+    assert ack == {'fields': ['temperature.tj'], 'interval': 1.0}
+    assert same.emit('set_fields', {'fields': 'a..b'}, callback=True)["error"]
+
+    server._broadcast_update(server.scheduler.cohorts())
+    [a] = narrow.get_received()
+    [b] = same.get_received()
+    assert a["args"][0] == b["args"][0]
+    assert set(a["args"][0]) == {"temperature", "timestamp"}
+    assert "cpu" in full.get_received()[0]["args"][0]
+
+    same.emit('set_fields', {'fields': []})
+    server._broadcast_update(server.scheduler.cohorts())
+    assert "cpu" in same.get_received()[0]["args"][0]
@@ -0,0 +1,124 @@
+"""
+Tests for the on-disk segment recorder and its memory-mapped reader.
+"""
+
+import os
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.recorder import RecordingReader, SegmentRecorder, list_segments
+
+from test_server import SAMPLE_LINE, feed
+
+
+BASE = 1700000000.0
+
+
+def sample_at(timestamp, **overrides):
+    sample = TegrastatsParser.parse_line(SAMPLE_LINE)
+    sample["timestamp"] = timestamp
+    sample.update(overrides)
+    return sample
+
+
+def test_round_trip_and_range_queries(tmp_path):
+    recorder = SegmentRecorder(str(tmp_path))
+    for i in range(100):
+        recorder.append(sample_at(BASE + i, gpu={"gr3d_freq": i}))
+    recorder.close()
+
+    reader = RecordingReader(str(tmp_path))
+    records = list(reader.samples())
+    assert len(records) == 100
+    assert records[0]["timestamp"] == BASE
+    assert records[5]["temperature"]["tj"] == 45.75
+    assert records[5]["power"]["vdd_gpu_soc"]["current"] == 2468
+
+    result = reader.query(since=BASE + 10, until=BASE + 19, fields=["gpu"])
+    assert result["count"] == 10
+    assert result["timestamps"][0] == BASE + 10
+    assert result["fields"] == {"gpu.gr3d_freq": list(range(10, 20))}
+    limited = reader.query(since=BASE + 95, limit=2)
+    assert limited["count"] == 2 and limited["truncated"]
+    assert not reader.query(since=BASE + 95, limit=5)["truncated"]
+    assert reader.query(since=BASE + 500)["count"] == 0
+
+
+def test_max_points_strides_across_segments(tmp_path):
+    recorder = SegmentRecorder(str(tmp_path), segment_duration=10)
+    for i in range(100):
+        recorder.append(sample_at(BASE + i, gpu={"gr3d_freq": i}))
+    recorder.close()
+
+    reader = RecordingReader(str(tmp_path))
+    assert len(list_segments(str(tmp_path))) == 10
+    assert reader.count(since=BASE + 5, until=BASE + 94) == 90
+    result = reader.query(fields=["gpu"], max_points=7)
+    assert result["step"] == 15
+    assert result["fields"]["gpu.gr3d_freq"] == list(range(0, 100, 15))
+    assert reader.query(max_points=200)["step"] == 1
+
+
+def test_rotation_layout_change_and_retention(tmp_path):
+    recorder = SegmentRecorder(str(tmp_path), segment_duration=10, retention=25)
+    for i in range(30):
+        recorder.append(sample_at(BASE + i))
+    # A new sensor starts a new segment with its own layout
+    extra = sample_at(BASE + 30)
+    extra["temperature"]["gpu"] = 40.0
+    recorder.append(extra)
+    assert len(list_segments(str(tmp_path))) == 4
+
+    # Rotation at BASE + 40 drops the segment that ended at BASE + 10
+    for i in range(40, 45):
+        recorder.append(sample_at(BASE + i))
+    recorder.close()
+    starts = [start for start, _ in list_segments(str(tmp_path))]
+    assert starts[0] == (BASE + 10) * 1000
+
+    reader = RecordingReader(str(tmp_path))
+    [record] = reader.samples(since=BASE + 30, until=BASE + 30)
+    assert record["temperature"]["gpu"] == 40.0
+    result = reader.query(since=BASE + 29, until=BASE + 31, fields=["temperature.gpu"])
+    assert result["fields"]["temperature.gpu"] == [None, 40.0]
+
+
+def test_partial_record_and_clock_step(tmp_path):
+    recorder = SegmentRecorder(str(tmp_path))
+    recorder.append(sample_at(BASE + 1))
+    # Wall clock stepping back does not break timestamp order
+    recorder.append(sample_at(BASE))
+    recorder.close()
+    [(_, path)] = list_segments(str(tmp_path))
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 7)
+
+    records = list(RecordingReader(str(tmp_path)).samples())
+    assert [r["timestamp"] for r in records] == [BASE + 1, BASE + 1]
+
+
+def test_recordings_endpoint(tmp_path):
+    server = TegrastatsServer(Config(log_file=None))
+    assert server.app.test_client().get('/api/recordings').status_code == 404
+
+    directory = str(tmp_path / "rec")
+    server = TegrastatsServer(Config(log_file=None, record_dir=directory))
+    for _ in range(3):
+        feed(server, SAMPLE_LINE)
+    client = server.app.test_client()
+    body = client.get('/api/recordings?fields=temperature.tj').get_json()
+    assert body["count"] == 3
+    assert body["fields"]["temperature.tj"] == [45.75] * 3
+    assert client.get('/api/recordings?since=abc').status_code == 400
+    for query in ('limit=nan', 'limit=inf', 'limit=-1', 'limit=1.5', 'max_points=0',
+                  'since=nan'):
+        assert client.get(f'/api/recordings?{query}').status_code == 400, query
+    server.stop()
+
+    # Responses are capped by record_query_limit
+    server = TegrastatsServer(Config(log_file=None, record_dir=directory, record_query_limit=2))
+    client = server.app.test_client()
+    body = client.get('/api/recordings?limit=100').get_json()
+    assert body["count"] == 2 and body["truncated"]
+    assert client.get('/api/recordings?max_points=100').get_json()["count"] == 2
+    assert os.listdir(directory)
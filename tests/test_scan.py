@@ -0,0 +1,75 @@
+"""
+Tests for the concurrent fleet scanner.
+"""
+
+import json
+import socket
+import threading
+
+import pytest
+from click.testing import CliRunner
+from werkzeug.serving import make_server
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.cli import cli
+from tegrastats_api.scan import expand_targets, format_table, run_scan, sort_results
+
+from test_server import SAMPLE_LINE, feed
+
+
+def test_expand_targets():
+    assert expand_targets(["orin1", "orin2:6000", "10.0.0.0/30", "10.0.0.1", "[::1]:7000"]) == [
+        ("orin1", 58090), ("orin2", 6000), ("10.0.0.1", 58090), ("10.0.0.2", 58090),
+        ("::1", 7000),
+    ]
+    assert expand_targets(["10.0.0.5/32"], port=80) == [("10.0.0.5", 80)]
+    for bad in (["10.0.0.0/8"], ["host:http"], ["10.0.0.300/24"]):
+        with pytest.raises(ValueError):
+            expand_targets(bad)
+
+
+@pytest.fixture
+def node():
+    server = TegrastatsServer(Config(log_file=None))
+    feed(server, SAMPLE_LINE)
+    http = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    yield http.server_port
+    http.shutdown()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_scan_mixed_fleet(node):
+    report = run_scan([("127.0.0.1", closed_port()), ("127.0.0.1", node)], timeout=2.0)
+    assert report["scanned"] == 2 and report["online"] == 1
+    offline, online = report["hosts"]
+    assert offline["error"] == "unreachable" and offline["temperature"] is None
+    assert online["error"] is None and online["clients"] == 0
+    assert online["temperature"] == 45.75
+    assert online["ram_used"] == 1997 and online["ram_percent"] == 3.2
+    assert online["power_w"] == 6.097
+    assert online["latency_ms"] is not None
+
+    ordered = sort_results(report["hosts"], "temperature")
+    assert ordered[0]["online"] and not ordered[1]["online"]
+    table = format_table(ordered)
+    assert table[0].split()[:2] == ["HOST", "TEMP(C)"]
+    assert "45.75" in table[1] and "unreachable" in table[2]
+
+
+def test_scan_command_json(node, tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text(f"# lab\n127.0.0.1:{node}\n")
+    result = CliRunner().invoke(cli, ["scan", "-f", str(hosts), "--json"])
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert report["online"] == 1 and report["hosts"][0]["port"] == node
+
+    result = CliRunner().invoke(cli, ["scan", f"127.0.0.1:{node}", "--sort", "power"])
+    assert result.exit_code == 0 and "1/1" in result.output
+    assert CliRunner().invoke(cli, ["scan"]).exit_code == 1
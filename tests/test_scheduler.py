@@ -0,0 +1,112 @@
+"""
+Tests for per-client update intervals.
+"""
+
+import threading
+import time
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.scheduler import BroadcastScheduler
+
+from test_server import SAMPLE_LINE, feed
+
+
+def test_clients_grouped_by_interval():
+    scheduler = BroadcastScheduler(default_interval=1.0, min_interval=0.1, max_interval=60)
+    assert scheduler.set_interval("a", None) == 1.0
+    assert scheduler.set_interval("b", 5) == 5.0
+    assert scheduler.set_interval("c", 5.001) == 5.0
+    assert scheduler.set_interval("d", 0.01) == 0.1
+    assert scheduler.set_interval("e", 600) == 60
+    assert sorted(c.interval for c in scheduler.cohorts()) == [0.1, 1.0, 5.0, 60]
+
+    scheduler.set_interval("b", 1.0)
+    scheduler.remove("c")
+    scheduler.remove("d")
+    assert sorted(c.interval for c in scheduler.cohorts()) == [1.0, 60]
+    assert scheduler.get_cohort("b").members == {"a", "b"}
+
+
+def test_due_once_per_period():
+    scheduler = BroadcastScheduler()
+    scheduler.set_interval("fast", 0.1)
+    scheduler.set_interval("slow", 5)
+    start = time.monotonic()
+
+    counts = {0.1: 0, 5.0: 0}
+    for step in range(101):
+        for cohort in scheduler.due(start + step * 0.1 + 0.001):
+            counts[cohort.interval] += 1
+    assert counts == {0.1: 101, 5.0: 3}
+
+    # A stalled loop does not get a burst of missed periods
+    assert len(scheduler.due(start + 100)) == 2
+    assert scheduler.due(start + 100.05) == []
+
+
+def test_cohorts_receive_their_own_rate():
+    server = TegrastatsServer(Config(log_file=None))
+    feed(server, SAMPLE_LINE)
+    fast = server.socketio.test_client(server.app)
+    slow = server.socketio.test_client(server.app, query_string='interval=5')
+    badge = server.socketio.test_client(server.app)
+    badge.emit('subscribe', {'topics': ['temperature.tj']})
+    assert badge.emit('set_interval', {'interval': 5}, callback=True) == {'interval': 5.0}
+    assert fast.emit('set_interval', 'abc', callback=True) == {'error': 'Invalid interval: abc'}
+
+    start = time.monotonic()
+    for step in range(10):
+        feed(server, SAMPLE_LINE)
+        server._broadcast_update(server.scheduler.due(start + step + 0.001))
+
+    assert len(fast.get_received()) == 10
+    assert len(slow.get_received()) == 2
+    assert [m["name"] for m in badge.get_received()] == ["tegrastats_topic"] * 2
+
+    slow.disconnect()
+    badge.disconnect()
+    assert [c.interval for c in server.scheduler.cohorts()] == [1.0]
+
+
+def test_each_sample_sent_once():
+    scheduler = BroadcastScheduler(default_interval=1.0)
+    scheduler.set_interval("a", None)
+    start = time.monotonic()
+    assert len(scheduler.due(start, sequence=1)) == 1
+    assert scheduler.due(start + 5, sequence=1) == []
+    # Samples arriving a little early are not skipped
+    assert len(scheduler.due(start + 0.95, sequence=2)) == 1
+    assert scheduler.due(start + 1.2, sequence=3) == []
+
+
+def test_parser_wakes_broadcaster():
+    server = TegrastatsServer(Config(log_file=None))
+    client = server.socketio.test_client(server.app)
+    server._running = True
+    thread = threading.Thread(target=server._update_data_thread, daemon=True)
+    thread.start()
+    try:
+        for _ in range(3):
+            feed(server, SAMPLE_LINE)
+            deadline = time.monotonic() + 2
+            while server.latency.count < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        server._running = False
+        thread.join(timeout=2)
+
+    # Only the first sample falls into the 1 s period, and it is sent once
+    assert [m["name"] for m in client.get_received()] == ["tegrastats_update"]
+    latency = server.latency.summary()
+    assert latency["count"] == 1
+    assert 0 <= latency["max_ms"] < 1000
+
+
+def test_wait_for_sample():
+    parser = TegrastatsParser()
+    assert parser.wait_for_sample(0, timeout=0.01) == 0
+    timer = threading.Timer(0.05, parser._store_sample, [TegrastatsParser.parse_line(SAMPLE_LINE)])
+    timer.start()
+    assert parser.wait_for_sample(0, timeout=2) == 1
+    timer.join()
@@ -0,0 +1,95 @@
+"""
+Tests for the REST routes of TegrastatsServer (no tegrastats binary needed).
+"""
+
+import json
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+
+
+SAMPLE_LINE = (
+    "10-03-2025 03:20:36 RAM 1997/62841MB (lfb 68x4MB) SWAP 0/31421MB (cached 0MB) "
+    "CPU [3%@1574,0%@1574,0%@1574,0%@1574,2%@1420,0%@1420,0%@1420,0%@1420,"
+    "0%@729,0%@729,0%@729,0%@729] GR3D_FREQ 0% cpu@45.75C soc2@43.875C soc0@43.437C "
+    "tj@45.75C soc1@44.281C VDD_GPU_SOC 2468mW/2468mW VDD_CPU_CV 246mW/246mW "
+    "VIN_SYS_5V0 3383mW/3383mW"
+)
+
+
+@pytest.fixture
+def server():
+    return TegrastatsServer(Config(log_file=None))
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+
+def feed(server, line=SAMPLE_LINE):
+    server.parser._store_sample(TegrastatsParser.parse_line(line))
+
+
+def test_status_without_data(client):
+    response = client.get('/api/status')
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'No data available'}
+
+
+@pytest.mark.parametrize("section", ["cpu", "memory", "temperature", "power"])
+def test_section_routes(server, client, section):
+    feed(server)
+    response = client.get(f'/api/{section}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data) == {section, 'timestamp'}
+    assert data[section] == server.parser.get_current_status()[section]
+
+
+def test_status_etag_and_not_modified(server, client):
+    feed(server)
+    first = client.get('/api/status')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert len(first.get_json()['cpu']['cores']) == 12
+    
+    cached = client.get('/api/status', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+    
+    feed(server)
+    fresh = client.get('/api/status', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+
+
+def test_sample_encoded_once(server, client):
+    feed(server)
+    snapshot = server.snapshots.get()
+    assert client.get('/api/power').data == snapshot.encoded('power')
+    assert snapshot.encoded('power') is snapshot.encoded('power')
+    assert server.snapshots.get() is snapshot
+    assert json.loads(snapshot.encoded('status'))['timestamp'].endswith('Z')
+
+
+@pytest.mark.filterwarnings("ignore:(?s).*Eventlet is deprecated")
+def test_eventlet_mode():
+    server = TegrastatsServer(Config(log_file=None, async_mode='eventlet'))
+    assert server.socketio.async_mode == 'eventlet'
+    feed(server)
+    assert server.app.test_client().get('/api/status').status_code == 200
+    # Waiting for samples goes through eventlet's thread pool
+    assert server._wait_for_sample(0) == 1
+    
+    ws = server.socketio.test_client(server.app)
+    server._broadcast_update(server.scheduler.cohorts())
+    assert [m['name'] for m in ws.get_received()] == ['tegrastats_update']
+
+
+def test_invalid_async_mode():
+    with pytest.raises(ValueError):
+        TegrastatsServer(Config(log_file=None, async_mode='asyncio'))
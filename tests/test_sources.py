@@ -0,0 +1,84 @@
+"""
+Tests for sample sources and log replay.
+"""
+
+import os
+import time
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.sources import ReplaySource, TegrastatsSource, source_from_config
+
+
+LOG = os.path.join(os.path.dirname(__file__), "data", "corpus", "orin_agx.log")
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_replay_max_speed_and_loop():
+    with open(LOG) as f:
+        expected = [line for line in f if line.strip()]
+
+    source = ReplaySource(LOG, speed=0)
+    source.open()
+    assert list(source.lines()) == expected
+
+    looping = ReplaySource(LOG, speed=0, loop=True)
+    looping.open()
+    lines = looping.lines()
+    assert [next(lines) for _ in range(len(expected) * 3)] == expected * 3
+    looping.close()
+    assert list(lines) == []
+
+
+def test_replay_pacing():
+    source = ReplaySource(LOG, interval=100, speed=10)
+    source.open()
+    start = time.monotonic()
+    count = len(list(source.lines()))
+    elapsed = time.monotonic() - start
+    # First line immediately, then one line per 10 ms
+    assert (count - 1) * 0.01 <= elapsed < 0.5
+
+
+def test_source_from_config():
+    assert source_from_config(Config(log_file=None)) is None
+    source = source_from_config(Config(log_file=None, replay_file=LOG, replay_speed=5, replay_loop=True))
+    assert isinstance(source, ReplaySource)
+    assert (source.path, source.speed, source.loop) == (LOG, 5, True)
+    with pytest.raises(ValueError):
+        ReplaySource(LOG, speed=-1)
+    assert TegrastatsSource(500).describe() == "tegrastats --interval 500"
+
+
+def test_replay_feeds_pipeline():
+    server = TegrastatsServer(Config(log_file=None, replay_file=LOG, replay_speed=0, rollup_tiers=""))
+    client = server.socketio.test_client(server.app)
+    server.start()
+    try:
+        assert wait_until(lambda: not server.parser._running)
+        assert len(server.history) == 5
+        assert server.app.test_client().get('/api/status').status_code == 200
+        assert wait_until(lambda: server.latency.count >= 1)
+    finally:
+        server.stop()
+    assert any(m["name"] == "tegrastats_update" for m in client.get_received())
+
+
+def test_replay_rate():
+    parser = TegrastatsParser(source=ReplaySource(LOG, speed=0, loop=True))
+    parser.start()
+    try:
+        time.sleep(0.5)
+        sequence, _ = parser.get_current_sample()
+    finally:
+        parser.stop()
+    # Looping at max speed goes well beyond 100 samples per second
+    assert sequence > 50
@@ -0,0 +1,86 @@
+"""
+Tests for the /api/stream SSE and NDJSON endpoint.
+"""
+
+import json
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+
+from test_server import SAMPLE_LINE, feed
+
+
+@pytest.fixture
+def server():
+    server = TegrastatsServer(Config(log_file=None, stream_replay_size=4))
+    feed(server, SAMPLE_LINE)
+    return server
+
+
+def open_stream(server, url, **kwargs):
+    response = server.app.test_client().get(url, buffered=False, **kwargs)
+    return response, iter(response.response)
+
+
+def test_ndjson_stream_and_resume(server):
+    response, frames = open_stream(server, '/api/stream?format=ndjson&fields=temperature.tj')
+    assert response.mimetype == 'application/x-ndjson'
+    assert server.limiter.get_count() == 1
+
+    first = json.loads(next(frames))
+    assert first["data"]["temperature"] == {"tj": 45.75}
+    feed(server, SAMPLE_LINE.replace("tj@45.75C", "tj@50C"))
+    second = json.loads(next(frames))
+    assert second["data"]["temperature"] == {"tj": 50}
+    response.close()
+    assert server.limiter.get_count() == 0
+
+    # Resuming after the first event replays the second one
+    response, frames = open_stream(server, '/api/stream?format=ndjson&fields=temperature.tj',
+                                   headers={'Last-Event-ID': first["id"]})
+    assert json.loads(next(frames)) == second
+    response.close()
+
+    # Every client gets the same cached frame
+    snapshot = server.snapshots.get()
+    assert snapshot.stream_frame('status?fields=temperature.tj', 'ndjson') is \
+        snapshot.stream_frame('status?fields=temperature.tj', 'ndjson')
+
+
+def test_sse_stream(server):
+    response, frames = open_stream(server, '/api/stream',
+                                   headers={'Accept': 'text/event-stream'})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert next(frames) == b"retry: 2000\n\n"
+    frame = next(frames).decode()
+    event_id, data = frame.rstrip("\n").split("\n")
+    assert event_id == f"id: {server.snapshots.get().etag}"
+    assert json.loads(data[len("data: "):])["temperature"]["tj"] == 45.75
+    assert frame.endswith("\n\n")
+    response.close()
+
+    # Unknown ids (another process, or no replay kept) start at the current sample
+    response, frames = open_stream(server, '/api/stream?last_event_id=deadbeef-1')
+    next(frames)
+    assert next(frames) == server.snapshots.get().stream_frame('status', 'sse')
+    response.close()
+
+
+def test_stream_rejects_bad_arguments(server):
+    client = server.app.test_client()
+    assert client.get('/api/stream?format=xml').status_code == 400
+    assert client.get('/api/stream?fields=a..b').status_code == 400
+    assert client.get('/api/stream?interval=-1').status_code == 400
+    assert server.limiter.get_count() == 0
+
+
+def test_ndjson_heartbeat_while_stalled(server, monkeypatch):
+    monkeypatch.setattr('tegrastats_api.server.STREAM_KEEPALIVE', 0.0)
+    monkeypatch.setattr(server, '_wait_for_sample', lambda sequence: sequence)
+    response, frames = open_stream(server, '/api/stream?format=ndjson',
+                                   headers={'Last-Event-ID': server.snapshots.get().etag})
+    assert next(frames) == b"\n"
+    response.close()
+    assert server.limiter.get_count() == 0
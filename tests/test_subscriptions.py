@@ -0,0 +1,70 @@
+"""
+Tests for WebSocket topic subscriptions.
+"""
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.parser import TegrastatsParser
+from tegrastats_api.subscriptions import TopicRegistry, is_valid_topic, resolve_path
+
+from test_server import SAMPLE_LINE
+
+
+def test_resolve_path():
+    data = TegrastatsParser.parse_line(SAMPLE_LINE)
+    assert resolve_path(data, "temperature.tj") == 45.75
+    assert resolve_path(data, "cpu.cores.1.freq") == 1574
+    assert resolve_path(data, "power.vdd_gpu_soc") == {"current": 2468, "average": 2468, "unit": "mW"}
+    for missing in ("temperature.gpu", "cpu.cores.20.usage", "cpu.cores.x", "gpu.gr3d_freq.x"):
+        with pytest.raises(KeyError):
+            resolve_path(data, missing)
+
+
+def test_topic_validation():
+    assert is_valid_topic("temperature")
+    assert is_valid_topic("cpu.cores.0.usage")
+    assert not is_valid_topic("timestamp")
+    assert not is_valid_topic("temperature..tj")
+    assert not is_valid_topic(42)
+
+
+def test_registry():
+    registry = TopicRegistry()
+    assert registry.subscribe("a", ["temperature.tj", "power"]) == ["temperature.tj", "power"]
+    assert registry.subscribe("b", ["power"]) == ["power"]
+    assert registry.subscribe("a", ["power"]) == []
+    assert sorted(registry.active_topics()) == ["power", "temperature.tj"]
+    
+    assert registry.unsubscribe("a", ["power", "gpu"]) == ["power"]
+    registry.remove_client("b")
+    assert registry.active_topics() == ["temperature.tj"]
+    assert registry.client_topics("a") == {"temperature.tj"}
+
+
+def test_topic_messages_only_reach_subscribers():
+    server = TegrastatsServer(Config(log_file=None))
+    server.parser._store_sample(TegrastatsParser.parse_line(SAMPLE_LINE))
+    fan = server.socketio.test_client(server.app)
+    dashboard = server.socketio.test_client(server.app)
+    
+    assert fan.emit('subscribe', {'topics': ['temperature.tj']}, callback=True) == {
+        'topics': ['temperature.tj']
+    }
+    assert 'error' in fan.emit('subscribe', {'topics': ['bogus']}, callback=True)
+    
+    server._broadcast_update(server.scheduler.cohorts())
+    [message] = fan.get_received()
+    assert message['name'] == 'tegrastats_topic'
+    payload = message['args'][0]
+    assert payload['topic'] == 'temperature.tj'
+    assert payload['data'] == 45.75
+    assert payload['seq'] == 1
+    
+    [update] = dashboard.get_received()
+    assert update['name'] == 'tegrastats_update'
+    
+    # Without topics the client falls back to full updates
+    assert fan.emit('unsubscribe', callback=True) == {'topics': []}
+    server._broadcast_update(server.scheduler.cohorts())
+    assert [m['name'] for m in fan.get_received()] == ['tegrastats_update']
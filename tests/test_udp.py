@@ -0,0 +1,95 @@
+"""
+Tests for the UDP publisher and reference listener, on loopback.
+"""
+
+import socket
+
+import pytest
+
+from tegrastats_api import Config, TegrastatsServer
+from tegrastats_api.udp import UdpListener, decode_datagram, encode_datagram, parse_targets
+
+from test_server import SAMPLE_LINE, feed
+
+
+@pytest.fixture
+def listeners():
+    opened = [UdpListener(port=0, interface="127.0.0.1") for _ in range(2)]
+    yield opened
+    for listener in opened:
+        listener.close()
+
+
+def test_parse_targets():
+    assert parse_targets("239.255.0.1, 10.10.99.50:6000") == [
+        ("239.255.0.1", 58091), ("10.10.99.50", 6000)]
+    for spec in ("", "host:x", ":80", "host:70000"):
+        with pytest.raises(ValueError):
+            parse_targets(spec)
+    with pytest.raises(ValueError):
+        encode_datagram("bad id", b"")
+
+
+def test_server_publishes_each_sample(listeners):
+    targets = ",".join(f"127.0.0.1:{listener.port}" for listener in listeners)
+    server = TegrastatsServer(Config(log_file=None, udp_targets=targets, udp_node_id="orin-7"))
+    server.udp.start()
+    try:
+        feed(server, SAMPLE_LINE)
+        feed(server, SAMPLE_LINE.replace("tj@45.75C", "tj@50C"))
+        schema = server.app.test_client().get('/api/status.schema').get_json()
+        for listener in listeners:
+            listener.names = schema
+            first = listener.receive(timeout=2)
+            second = listener.receive(timeout=2)
+            assert first["node"] == "orin-7"
+            assert first["temperature"]["tj"] == 45.75
+            assert second["temperature"]["tj"] == 50
+            assert second["seq"] == first["seq"] + 1 and second["missed"] == 0
+
+        # The datagram carries the same cached frame as /api/status.bin
+        frame = server.app.test_client().get('/api/status.bin').data
+        assert encode_datagram("orin-7", frame)[-len(frame):] == frame
+        health = server.app.test_client().get('/api/health').get_json()
+        assert health["udp"]["sent"] == 4 and health["udp"]["errors"] == 0
+    finally:
+        server.stop()
+
+
+def test_multicast_on_loopback():
+    try:
+        listener = UdpListener(port=0, group="239.255.58.91", interface="127.0.0.1")
+    except OSError as e:
+        pytest.skip(f"multicast unavailable: {e}")
+    server = TegrastatsServer(Config(log_file=None, udp_node_id="orin-7",
+                                     udp_targets=f"239.255.58.91:{listener.port}",
+                                     udp_interface="127.0.0.1"))
+    server.udp.start()
+    try:
+        feed(server, SAMPLE_LINE)
+        sample = listener.receive(timeout=2)
+        assert sample is not None and sample["node"] == "orin-7"
+    finally:
+        server.stop()
+        listener.close()
+
+
+def test_listener_counts_gaps_and_skips_garbage(listeners):
+    listener = listeners[0]
+    server = TegrastatsServer(Config(log_file=None))
+    feed(server, SAMPLE_LINE)
+    frame = server.app.test_client().get('/api/status.bin').data
+    sequence = decode_datagram(encode_datagram("a", frame))["seq"]
+    later = bytearray(frame)
+    later[12:16] = (sequence + 3).to_bytes(4, "little")
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        address = ("127.0.0.1", listener.port)
+        sender.sendto(encode_datagram("a", frame), address)
+        sender.sendto(b"not a datagram", address)
+        sender.sendto(encode_datagram("a", bytes(later)), address)
+    assert listener.receive(timeout=2)["missed"] == 0
+    assert listener.receive(timeout=2)["missed"] == 2
+    assert listener.receive(timeout=0.05) is None
+    assert (listener.received, listener.missed) == (2, 2)
+